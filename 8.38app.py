@@ -1,11 +1,30 @@
 # app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.serving import WSGIRequestHandler
 import google.generativeai as genai
+import contextlib
+import json
 import os
-import math
+import time
+import numpy as np
 from dotenv import load_dotenv  # .env dosyasını yüklemek için
 
+from pose_angles import FEEDBACK_ANGLES, JSON_MISSING_VALUE, compute_angles, angles_to_dict
+from pose_payload import PosePayloadError, parse_pose, parse_poses
+from llm_gateway import CircuitOpen, ModelGateway, ModelTimeout, RequestCancelled, client_disconnected
+from llm_resilience import OPEN, STATE_VALUES, breaker_from_env
+from llm_batcher import FeedbackBatcher
+from feedback_cache import bucket_angles, cache_from_env
+from reference_store import ReferenceStore
+from pose_index import PoseIndex
+from pose_alignment import StreamingAligner
+from pose_sessions import SessionManager
+from metrics import Metrics
+from prompt_builder import (FEEDBACK_INSTRUCTIONS, SEQUENCE_INSTRUCTIONS, estimate_tokens, pose_prompt,
+                            sequence_prompt, with_instructions)
+from local_feedback import evaluate_locally, feedback_from_errors, policy_from_env, score_sequence
+
 # .env dosyasını yükle
 load_dotenv()
 
@@ -27,36 +46,245 @@ else:
 # Gemini modelini başlat
 model = genai.GenerativeModel('models/gemini-1.5-flash')
 
-
-def calculate_angle(p1, p2, p3):
+# YORUM: Model çağrıları eşzamanlılığı sınırlı bir kapıdan (gateway) geçer.
+# Yavaş bir yanıt sadece kendi isteğini bekletir; aynı anda en fazla LLM_MAX_CONCURRENCY çağrı yapılır,
+# her çağrının LLM_TIMEOUT_SECONDS süresi vardır ve istemci bağlantıyı kapatırsa çağrı iptal edilir.
+# Gemini yavaşladığında veya hata verdiğinde: son çağrıların LLM_HEDGE_PERCENTILE yüzdeliğini (en az
+# LLM_HEDGE_MIN_SECONDS) aşan çağrı için yedek bir çağrı gönderilir (0 = kapalı); hata/yavaşlık oranı
+# eşiği aşarsa devre kesici açılır ve geri bildirim LLM'e gitmeden yerel motordan verilir (bkz. llm_resilience.py).
+gateway = ModelGateway(
+    model,
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "20")),
+    breaker=breaker_from_env(lambda previous, state: metrics.inc("dance_llm_circuit_transitions_total", state=state)),
+    hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")) or None,
+    hedge_min_seconds=float(os.getenv("LLM_HEDGE_MIN_SECONDS", "0.5")),
+)
+
+# YORUM: Aynı anda LLM'e giden /evaluate_pose istekleri (ör. bütün sınıf dans ederken) birkaç ms toplanıp
+# tek bir model çağrısında, öğrenci kimlikleriyle anahtarlanmış JSON yanıt istenerek birleştirilir.
+# LLM_BATCH_MAX_SIZE: bir çağrıdaki en fazla öğrenci (1 = toplama kapalı), LLM_BATCH_WAIT_MS: toplama süresi.
+feedback_batcher = FeedbackBatcher(
+    gateway,
+    FEEDBACK_INSTRUCTIONS,
+    max_batch=int(os.getenv("LLM_BATCH_MAX_SIZE", "8")),
+    max_wait_ms=float(os.getenv("LLM_BATCH_WAIT_MS", "20")),
+)
+
+# YORUM: Aynı hatayı tekrarlayan öğrencilere aynı geri bildirimi LLM'e sormadan döndürmek için önbellek.
+# Ayarlar: FEEDBACK_CACHE_SIZE, FEEDBACK_CACHE_TTL_SECONDS, FEEDBACK_CACHE_BIN_DEGREES,
+# FEEDBACK_CACHE_DB (verilirse tüm işçi süreçlerin paylaştığı SQLite disk katmanı).
+feedback_cache = cache_from_env()
+
+# YORUM: Yerel (şablon tabanlı) geri bildirim motoru çoğu isteği LLM'e gitmeden mikro saniyelerde yanıtlar.
+# LOCAL_FEEDBACK_MODE: auto (belirsizse veya her LOCAL_FEEDBACK_LLM_EVERY_N. istekte LLM), local (hiç LLM yok),
+# llm (her istek LLM'e gider, eski davranış).
+feedback_policy = policy_from_env()
+
+# YORUM: Referans dans kütüphanesi (json_datas/) açılışta bir kez yüklenir ve açıları önceden hesaplanır.
+# İstemci her istekte referans pozu göndermek yerine sadece dance_id + timestamp_ms gönderebilir.
+# Dizin REFERENCE_DATA_DIR ortam değişkeniyle değiştirilebilir.
+reference_data_dir = os.getenv("REFERENCE_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_datas"))
+reference_store = ReferenceStore()
+if os.path.isdir(reference_data_dir):
+    reference_store.load_directory(reference_data_dir)
+    print(f"{len(reference_store.dances)} referans dans yüklendi: {reference_data_dir}")
+else:
+    print(f"Uyarı: referans veri dizini bulunamadı: {reference_data_dir}")
+
+# YORUM: Tüm referans karelerinin üzerinde en yakın komşu indeksi (KD-ağacı). "Hangi adımı yapıyorsun?"
+# sorusunu tüm kütüphaneyi taramadan yanıtlar. Bkz. /dances/search.
+pose_index = PoseIndex.from_references(reference_store.dances.values())
+
+# YORUM: /dances/search için en fazla sonuç ve pencere boyutu
+MAX_SEARCH_RESULTS = 50
+MAX_SEARCH_WINDOW = 120
+
+# YORUM: Canlı akış oturumları (dans, kayan açı penceresi, yumuşatılmış skor). Bkz. /sessions uç noktaları.
+sessions = SessionManager()
+
+# YORUM: /evaluate_poses tek istekte kabul edilen en fazla kare sayısı
+MAX_BATCH_FRAMES = int(os.getenv("MAX_BATCH_FRAMES", "20000"))
+
+# YORUM: Prompt ve model yanıtlarının konsola yazdırılması (yük altında zaman alır). VERBOSE_LOGGING=0 kapatır.
+VERBOSE_LOGGING = os.getenv("VERBOSE_LOGGING", "1") != "0"
+
+# YORUM: Aşama süreleri, LLM/önbellek sayaçları ve istek gecikmeleri; /metrics uç noktasından (Prometheus) okunur.
+metrics = Metrics()
+metrics.counter("dance_requests_total", "Uç nokta ve durum koduna göre istek sayısı")
+metrics.histogram("dance_request_seconds", "Uç noktaya göre toplam istek süresi")
+metrics.histogram("dance_stage_seconds", "Uç nokta içindeki aşamaların süresi (parse, angles, prompt, llm, ...)")
+metrics.counter("dance_llm_calls_total", "Modele yapılan çağrı sayısı")
+metrics.counter("dance_llm_errors_total", "Başarısız model çağrıları (timeout, cancelled, circuit_open, error)")
+metrics.counter("dance_llm_circuit_transitions_total", "Devre kesicinin girdiği duruma göre geçiş sayısı")
+metrics.counter("dance_feedback_total",
+                "Kaynağına göre verilen geri bildirim sayısı (local, cache, llm, local_fallback)")
+metrics.counter("dance_feedback_cache_lookups_total", "Geri bildirim önbelleği sorguları (hit, miss)")
+metrics.histogram("dance_prompt_tokens", "Uç noktaya göre modele giden prompt'un tahmini token sayısı",
+                  buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096))
+metrics.gauge("dance_llm_in_flight", "Şu anda modelde olan çağrı sayısı", lambda: gateway.in_flight)
+metrics.gauge("dance_llm_waiting", "Eşzamanlılık sınırı nedeniyle sırada bekleyen çağrı sayısı", lambda: gateway.waiting)
+metrics.gauge("dance_llm_circuit_state", "Devre kesici durumu (0 kapalı, 1 yarı açık, 2 açık)",
+              lambda: STATE_VALUES[gateway.breaker.state] if gateway.breaker is not None else 0)
+metrics.counter("dance_llm_circuit_rejected_total", "Devre açıkken modele gönderilmeyen çağrı sayısı",
+                lambda: gateway.breaker.rejected if gateway.breaker is not None else 0)
+metrics.counter("dance_llm_hedged_calls_total", "Yavaş kaldığı için yedek çağrı başlatılan istek sayısı",
+                lambda: gateway.hedged)
+metrics.counter("dance_llm_hedge_wins_total", "Yanıtı yedek çağrıdan gelen istek sayısı", lambda: gateway.hedge_wins)
+metrics.counter("dance_llm_batched_calls_total", "Birden fazla öğrencinin birleştirildiği model çağrısı sayısı",
+                lambda: feedback_batcher.batches)
+metrics.counter("dance_llm_batch_fallbacks_total",
+                "Toplu yanıtı çözümlenemediği için tek tek sorulan geri bildirim sayısı",
+                lambda: feedback_batcher.fallbacks)
+metrics.gauge("dance_feedback_cache_entries", "Bellekteki önbellek kaydı sayısı", lambda: feedback_cache.stats()["entries"])
+metrics.gauge("dance_stream_sessions", "Açık canlı akış oturumu sayısı", lambda: len(sessions))
+
+
+def verbose_print(*args):
+    if VERBOSE_LOGGING:
+        print(*args)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or "unknown"
+    metrics.inc("dance_requests_total", endpoint=endpoint, status=response.status_code)
+    if 'request_start' in g:
+        started = g.request_start
+
+        def observe_duration():
+            metrics.observe("dance_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+
+        # YORUM: Akış (SSE) yanıtları burada sadece başlar; süre, gövde tamamen gönderilip yanıt kapandığında ölçülür
+        if response.is_streamed:
+            response.call_on_close(observe_duration)
+        else:
+            observe_duration()
+    return response
+
+
+def generate_text(prompt, client=None):
     """
-    Üç eklem noktasının (p1, p2, p3) arasındaki açıyı derece cinsinden hesaplar.
-    Hata kontrolü eklenerek eksik verilerde None döndürür.
+    Prompt'u gateway (veya verilirse client, ör. feedback_batcher) üzerinden modele gönderir;
+    istemci ayrılırsa çağrıyı iptal eder.
     """
-    if not p1 or not p2 or not p3:
-        return None
-
+    environ = request.environ
+    endpoint = request.endpoint
+    metrics.inc("dance_llm_calls_total", endpoint=endpoint)
     try:
-        # Landmark koordinatlarını al
-        v1 = (p1['x'] - p2['x'], p1['y'] - p2['y'])
-        v2 = (p3['x'] - p2['x'], p3['y'] - p2['y'])
+        with metrics.span(endpoint, "llm"):
+            return (client or gateway).generate(prompt, cancelled=lambda: client_disconnected(environ))
+    except RequestCancelled:
+        metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="cancelled")
+        raise
+    except ModelTimeout:
+        metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="timeout")
+        raise
+    except CircuitOpen:
+        metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="circuit_open")
+        raise
+    except Exception:
+        metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="error")
+        raise
+
+
+def circuit_open():
+    """Devre kesici açık mı? Açıksa handler'lar LLM'e hiç gitmeden yerel geri bildirim verir."""
+    return gateway.breaker is not None and gateway.breaker.state == OPEN
+
+
+def record_prompt_tokens(prompt):
+    """Tek çağrılık tam prompt'un tahmini token sayısını metriğe yazar ve (verbose modda) loglar."""
+    tokens = estimate_tokens(prompt)
+    metrics.observe("dance_prompt_tokens", tokens, endpoint=request.endpoint)
+    verbose_print(f"Tahmini prompt boyutu: {tokens} token ({len(prompt)} karakter)")
+    return tokens
 
-        # Vektörler arasındaki açıyı hesapla
-        dot_product = v1[0] * v2[0] + v1[1] * v2[1]
-        magnitude_v1 = math.sqrt(v1[0] ** 2 + v1[1] ** 2)
-        magnitude_v2 = math.sqrt(v2[0] ** 2 + v2[1] ** 2)
 
-        if magnitude_v1 == 0 or magnitude_v2 == 0:
-            return None
+def wants_stream():
+    """İstemci akış (SSE) yanıtı mı istiyor? İstek gövdesinde "stream": true veya Accept: text/event-stream."""
+    return bool(request.json.get('stream')) or request.accept_mimetypes.best == 'text/event-stream'
 
-        # Cosinüs teorisi ile açıyı bul
-        angle = math.acos(min(max(dot_product / (magnitude_v1 * magnitude_v2), -1.0), 1.0))
 
-        # Radyanı dereceye çevir
-        return math.degrees(angle)
-    except (KeyError, TypeError):
-        # YORUM: Gelen veride 'x' veya 'y' anahtarları eksikse None döndür.
-        return None
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def stream_text(prompt, text_field, payload, on_complete=None, timeout_message=None, error_message=None,
+                fallback=None):
+    """
+    Model yanıtını üretildikçe SSE olayları olarak gönderir: her parça için "chunk" ({"text": ...}), sonunda
+    "done" (payload + text_field alanında tam metin). Hata veya zaman aşımında "error" ({"error": ...}) gönderilir.
+    İstemci bağlantıyı kapatırsa (ör. sonraki adıma geçtiyse) model akışı bırakılır ve eşzamanlılık yuvası boşalır.
+    on_complete(tam metin): akış başarıyla bittiğinde çağrılır (ör. önbelleğe yazmak için).
+    fallback: verilirse hata, zaman aşımı veya açık devrede "error" yerine bu içerikle "done" gönderilir
+    (istemci o ana kadar gelen parçaları done metniyle değiştirir).
+    """
+    environ = request.environ
+    endpoint = request.endpoint
+    metrics.inc("dance_llm_calls_total", endpoint=endpoint)
+
+    def failure_event(message):
+        if fallback is None:
+            return sse_event('error', {'error': message})
+        metrics.inc("dance_feedback_total", endpoint=endpoint, source='local_fallback')
+        return sse_event('done', fallback)
+
+    def events():
+        started = time.perf_counter()
+        parts = []
+        try:
+            with contextlib.closing(gateway.stream(prompt, cancelled=lambda: client_disconnected(environ))) as chunks:
+                for text in chunks:
+                    if not parts:
+                        metrics.observe("dance_stage_seconds", time.perf_counter() - started, endpoint=endpoint,
+                                        stage="llm_first_chunk")
+                    parts.append(text)
+                    yield sse_event('chunk', {'text': text})
+        except RequestCancelled:
+            metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="cancelled")
+            return
+        except ModelTimeout as e:
+            print(f"Gemini API zaman aşımı ({endpoint}, akış): {e}")
+            metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="timeout")
+            yield failure_event(timeout_message or "Model zamanında yanıt veremedi.")
+            return
+        except CircuitOpen as e:
+            print(f"Gemini API devre dışı ({endpoint}, akış): {e}")
+            metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="circuit_open")
+            yield failure_event(error_message or "Model yanıtı alınamadı.")
+            return
+        except Exception as e:
+            print(f"Gemini API hatası ({endpoint}, akış): {e}")
+            metrics.inc("dance_llm_errors_total", endpoint=endpoint, kind="error")
+            yield failure_event(error_message or "Model yanıtı alınamadı.")
+            return
+        finally:
+            metrics.observe("dance_stage_seconds", time.perf_counter() - started, endpoint=endpoint, stage="llm")
+
+        full_text = "".join(parts)
+        if on_complete is not None:
+            on_complete(full_text)
+        yield sse_event('done', {**payload, text_field: full_text})
+
+    return sse_response(events())
+
+
+def feedback_response(payload, stream):
+    """Hazır geri bildirimi JSON olarak veya akış modunda tek bir SSE "done" olayı olarak döndürür."""
+    if stream:
+        return sse_response(iter([sse_event('done', payload)]))
+    return jsonify(payload)
 
 
 @app.route('/')
@@ -69,6 +297,8 @@ def home():
 def chat():
     """
     Chatbot mesajlarını işler, Gemini API'ye gönderir ve yanıtı döndürür.
+    "stream": true ile (veya Accept: text/event-stream) yanıt üretildikçe SSE olarak gönderilir (bkz. stream_text);
+    son "done" olayı {"response": ...} içerir.
     """
     if not request.is_json:
         return jsonify({"error": "Request must be JSON"}), 400
@@ -78,12 +308,25 @@ def chat():
     if not user_message:
         return jsonify({"error": "Message field is required"}), 400
 
+    # YORUM: Gemini'ye gönderilecek prompt'u oluştur
+    prompt = f"Bir dans eğitmenisin ve bir öğrenciyle konuşuyorsun. Bu öğrencinin mesajı: '{user_message}'. Ona kısa ve motive edici bir şekilde cevap ver. Cevabın çok uzun olmasın."
+    record_prompt_tokens(prompt)
+    if wants_stream():
+        return stream_text(prompt, 'response', {},
+                           timeout_message="Chatbot zamanında yanıt veremedi. Lütfen tekrar deneyin.",
+                           error_message="Chatbot yanıtı alınamadı. API anahtarını kontrol edin veya tekrar deneyin.")
+
     try:
-        # YORUM: Gemini'ye gönderilecek prompt'u oluştur
-        prompt = f"Bir dans eğitmenisin ve bir öğrenciyle konuşuyorsun. Bu öğrencinin mesajı: '{user_message}'. Ona kısa ve motive edici bir şekilde cevap ver. Cevabın çok uzun olmasın."
-        response = model.generate_content(prompt)
-        bot_response_text = response.text
+        bot_response_text = generate_text(prompt)
         return jsonify({"response": bot_response_text})
+    except RequestCancelled:
+        return '', 499  # İstemci bağlantıyı kapattı, yanıt gönderilmeyecek
+    except ModelTimeout as e:
+        print(f"Gemini API zaman aşımı (chat): {e}")
+        return jsonify({"error": "Chatbot zamanında yanıt veremedi. Lütfen tekrar deneyin."}), 504
+    except CircuitOpen as e:
+        print(f"Gemini API devre dışı (chat): {e}")
+        return jsonify({"error": "Chatbot şu anda yanıt veremiyor. Lütfen biraz sonra tekrar deneyin."}), 503
     except Exception as e:
         print(f"Gemini API hatası (chat): {e}")
         return jsonify({"error": "Chatbot yanıtı alınamadı. API anahtarını kontrol edin veya tekrar deneyin."}), 500
@@ -94,6 +337,9 @@ def evaluate_pose():
     """
     Kullanıcının dans pozunu referans pozla karşılaştırır ve Gemini API'den detaylı geri bildirim alır.
     Poz verilerinde indeks hatasını önlemek için kapsamlı kontroller yapıldı.
+    "stream": true ile yanıt SSE olarak gelir: LLM geri bildirimi üretildikçe "chunk" olayları, sonunda normal
+    JSON yanıtla aynı alanları taşıyan "done" olayı. Yerel/önbellek yanıtlarında sadece "done" gönderilir.
+    Model hata verirse veya zamanında yanıt vermezse yerel geri bildirim döner ("source": "local_fallback").
     """
     if not request.is_json:
         return jsonify({'error': 'Request must be JSON'}), 400
@@ -101,94 +347,364 @@ def evaluate_pose():
     data = request.json
     user_pose = data.get('user_pose')
     reference_pose = data.get('reference_pose')
+    dance_id = data.get('dance_id')
 
-    # YORUM: En kritik kontrol! Gelen poz listelerinin yeterli sayıda eleman içerdiğinden emin ol.
-    # Mediapipe 33 landmark döndürdüğü için en az 33 eleman bekliyoruz.
-    if not user_pose or not reference_pose or len(user_pose) < 33 or len(reference_pose) < 33:
-        print("Hata: Gelen poz verisi eksik veya geçersiz. Devam edilemiyor.")
+    # YORUM: En kritik kontrol! Pozlar tek seferde (33, 4) float32 dizilere çevrilip doğrulanır.
+    # Mediapipe 33 landmark döndürdüğü için 33 landmark bekliyoruz. Sözlük listesi, düz sayı listesi
+    # [x0, y0, z0, v0, x1, ...] veya base64 float32 kabul edilir (bkz. pose_payload.py).
+    # Referans ya dance_id + timestamp_ms ile sunucudaki kütüphaneden ya da reference_pose ile istekten gelir.
+    try:
+        with metrics.span('evaluate_pose', 'parse'):
+            user_array = parse_pose(user_pose)
+            reference_array = parse_pose(reference_pose) if dance_id is None else None
+    except PosePayloadError as e:
+        print(f"Hata: Gelen poz verisi eksik veya geçersiz ({e}). Devam edilemiyor.")
         return jsonify({'error': 'Eksik veya geçersiz poz verisi'}), 400
 
-    print("\n----------------------------------")
-    print("Poz Değerlendirme İsteği Alındı.")
-
-    # YORUM: Anahtar açıları hesapla. Artık hata olmayacak çünkü listenin uzunluğunu kontrol ettik.
-    user_angles = {
-        'right_elbow': calculate_angle(user_pose[11], user_pose[13], user_pose[15]),
-        'left_elbow': calculate_angle(user_pose[12], user_pose[14], user_pose[16]),
-        'right_shoulder': calculate_angle(user_pose[13], user_pose[11], user_pose[23]),
-        'left_shoulder': calculate_angle(user_pose[14], user_pose[12], user_pose[24]),
-        'right_knee': calculate_angle(user_pose[23], user_pose[25], user_pose[27]),
-        'left_knee': calculate_angle(user_pose[24], user_pose[26], user_pose[28]),
-        'right_hip': calculate_angle(user_pose[11], user_pose[23], user_pose[25]),
-        'left_hip': calculate_angle(user_pose[12], user_pose[24], user_pose[26])
-    }
+    verbose_print("\n----------------------------------")
+    verbose_print("Poz Değerlendirme İsteği Alındı.")
+
+    angles_started = time.perf_counter()
+    if dance_id is not None:
+        dance = reference_store.get(dance_id)
+        if dance is None:
+            return jsonify({'error': f"Bilinmeyen dans: {dance_id}"}), 404
+        try:
+            timestamp_ms = float(data.get('timestamp_ms'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'timestamp_ms alanı sayı olmalıdır'}), 400
+        if not np.isfinite(timestamp_ms):  # float() "nan" ve "inf" metinlerini de kabul eder
+            return jsonify({'error': 'timestamp_ms alanı sayı olmalıdır'}), 400
+
+        # YORUM: Referans açıları önceden hesaplandı; zamana en yakın kare ikili aramayla bulunur.
+        frame_index = dance.frame_index(timestamp_ms)
+        reference_angle_row = dance.feedback_angles[frame_index]
+        user_angle_row = compute_angles(user_array, FEEDBACK_ANGLES)
+        reference_id = f"{dance_id}:{dance.frame_number(frame_index)}"
+    else:
+        # YORUM: Anahtar açıları iki poz için tek seferde (vektörel) hesapla.
+        # Eksik landmark veya sıfır uzunluklu vektörlerde açı None olur.
+        pose_arrays = np.stack([user_array, reference_array])
+        user_angle_row, reference_angle_row = compute_angles(pose_arrays, FEEDBACK_ANGLES)
+        reference_id = "pose:" + bucket_angles(reference_angle_row, feedback_cache.bin_size)
+
+    metrics.observe('dance_stage_seconds', time.perf_counter() - angles_started, endpoint='evaluate_pose', stage='angles')
+
+    # YORUM: Önce yerel motorla değerlendir; politika gerek görmezse LLM'e hiç gidilmez.
+    with metrics.span('evaluate_pose', 'local_feedback'):
+        session_key = data.get('session_id') or request.remote_addr
+        request_number = feedback_policy.next_request(session_key)
+        local_result = evaluate_locally(user_angle_row, reference_angle_row, variant=request_number)
+        escalate = feedback_policy.should_escalate(local_result, request_number)
+    stream = wants_stream()
+    if not escalate:
+        metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='local')
+        return feedback_response({'feedback': local_result['feedback'], 'cached': False, 'source': 'local',
+                                  'accuracy': local_result['accuracy'], 'worst_joint': local_result['worst_joint']},
+                                 stream)
+
+    # YORUM: Önbellek anahtarı = referans kare kimliği + kovalanmış işaretli açı farkları
+    with metrics.span('evaluate_pose', 'cache'):
+        cache_key = feedback_cache.make_key(reference_id, user_angle_row - reference_angle_row)
+        cached_feedback = feedback_cache.get(cache_key)
+    metrics.inc('dance_feedback_cache_lookups_total', result='miss' if cached_feedback is None else 'hit')
+    if cached_feedback is not None:
+        verbose_print("Geri bildirim önbellekten döndürüldü.")
+        metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='cache')
+        return feedback_response({'feedback': cached_feedback, 'cached': True, 'source': 'cache',
+                                  'accuracy': local_result['accuracy'], 'worst_joint': local_result['worst_joint']},
+                                 stream)
+
+    # YORUM: Gemini hata verirse, zamanında yanıt vermezse veya devre kesici açıksa öğrenci beklemez ve
+    # hata almaz: yerel motorun geri bildirimi döndürülür. Böylece geri bildirim süresi LLM_TIMEOUT_SECONDS ile sınırlıdır.
+    fallback = {'feedback': local_result['feedback'], 'cached': False, 'source': 'local_fallback',
+                'accuracy': local_result['accuracy'], 'worst_joint': local_result['worst_joint']}
+    if circuit_open():
+        verbose_print("Devre kesici açık; yerel geri bildirim döndürüldü.")
+        metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='local_fallback')
+        return feedback_response(fallback, stream)
+
+    # YORUM: Gemini'ye gönderilecek prompt'un öğrenciye özel kısmını oluştur: sadece referanstan en çok ayrılan
+    # birkaç eklem, yuvarlanmış açılarla ve sabit biçimde (bkz. prompt_builder.py). Ortak talimatlar
+    # (FEEDBACK_INSTRUCTIONS) feedback_batcher tarafından tek çağrıda önüne, toplu çağrıda bir kez eklenir.
+    with metrics.span('evaluate_pose', 'prompt'):
+        prompt = pose_prompt(user_angle_row, reference_angle_row)
+
+    verbose_print("Gemini'ye gönderilen prompt: \n", prompt)
+    record_prompt_tokens(feedback_batcher.single_prompt(prompt))
+
+    # YORUM: Akış modunda toplama (batch) yapılmaz; ilk kelimeler beklemeden gönderilir.
+    if stream:
+        def on_complete(feedback_text):
+            feedback_cache.put(cache_key, feedback_text)
+            metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='llm')
+
+        return stream_text(feedback_batcher.single_prompt(prompt), 'feedback',
+                           {'cached': False, 'source': 'llm', 'accuracy': local_result['accuracy'],
+                            'worst_joint': local_result['worst_joint']},
+                           on_complete=on_complete, fallback=fallback)
 
-    reference_angles = {
-        'right_elbow': calculate_angle(reference_pose[11], reference_pose[13], reference_pose[15]),
-        'left_elbow': calculate_angle(reference_pose[12], reference_pose[14], reference_pose[16]),
-        'right_shoulder': calculate_angle(reference_pose[13], reference_pose[11], reference_pose[23]),
-        'left_shoulder': calculate_angle(reference_pose[14], reference_pose[12], reference_pose[24]),
-        'right_knee': calculate_angle(reference_pose[23], reference_pose[25], reference_pose[27]),
-        'left_knee': calculate_angle(reference_pose[24], reference_pose[26], reference_pose[28]),
-        'right_hip': calculate_angle(reference_pose[11], reference_pose[23], reference_pose[25]),
-        'left_hip': calculate_angle(reference_pose[12], reference_pose[24], reference_pose[26])
-    }
+    try:
+        feedback_text = generate_text(prompt, feedback_batcher)
+        verbose_print("\n----------------------------------")
+        verbose_print("Gemini'den Gelen Geri Bildirim:")
+        verbose_print(feedback_text)
+        verbose_print("----------------------------------")
+        feedback_cache.put(cache_key, feedback_text)
+        metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='llm')
+        return jsonify({'feedback': feedback_text, 'cached': False, 'source': 'llm',
+                        'accuracy': local_result['accuracy'], 'worst_joint': local_result['worst_joint']})
+    except RequestCancelled:
+        print("İstemci bağlantıyı kapattı, Gemini çağrısı iptal edildi.")
+        return '', 499
+    except ModelTimeout as e:
+        print(f"Gemini API zaman aşımı (evaluate_pose), yerel geri bildirim döndürüldü: {e}")
+    except CircuitOpen as e:
+        print(f"Gemini API devre dışı (evaluate_pose), yerel geri bildirim döndürüldü: {e}")
+    except Exception as e:
+        print(f"Gemini API hatası (evaluate_pose), yerel geri bildirim döndürüldü: {e}")
+    metrics.inc('dance_feedback_total', endpoint='evaluate_pose', source='local_fallback')
+    return jsonify(fallback)
 
-    # YORUM: Açısal farkları hesapla
-    angle_diffs = {
-        key: abs(user_angles[key] - reference_angles[key]) if user_angles.get(key) is not None and reference_angles.get(
-            key) is not None else 999
-        for key in user_angles.keys()
-    }
 
-    # YORUM: Gemini'ye gönderilecek prompt'u oluştur
-    prompt = f"""
-    Sen, bir dans eğitmenisin ve bir öğrencinin dans performansını değerlendiriyorsun. Öğrenci, referans bir dans pozunu taklit etmeye çalışıyor.
-    Aşağıda öğrencinin ve referansın eklem açıları var.
+@app.route('/evaluate_poses', methods=['POST'])
+def evaluate_poses():
+    """
+    Bir dansa karşı zaman damgalı kullanıcı karelerini tek istekte puanlar (cümle sonu / oturum sonu değerlendirme).
 
-    Sadece en belirgin pozisyon farkını tespit et ve bunu düzeltmek için bir tane net, eyleme geçirilebilir bir öneri sun.
-    Yanıtın en fazla 2-3 cümle uzunluğunda, motive edici ve teşvik edici olsun.
+    İstek: {"dance_id": ..., "frames": [{"timestamp_ms": ..., "user_pose": [...]}, ...], "coaching": "local" | "llm"}
+    Yanıt: kare başına doğruluk ve en kötü eklem, eklem başına ortalama hata ve tek bir özet geri bildirim.
+    """
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
 
-    Eğer tüm açılar birbirine çok yakınsa, harika bir iş çıkardığına dair motive edici bir geri bildirim ver.
+    data = request.json
+    dance = reference_store.get(data.get('dance_id'))
+    if dance is None:
+        return jsonify({'error': f"Bilinmeyen dans: {data.get('dance_id')}"}), 404
 
-    Örnek geri bildirim: "Harika gidiyorsun! Sol kolunu referansa göre biraz daha bükük tutmaya çalış. Devam et!"
+    frames = data.get('frames')
+    if not isinstance(frames, list) or not frames:
+        return jsonify({'error': 'frames alanı boş olmayan bir liste olmalıdır'}), 400
+    if len(frames) > MAX_BATCH_FRAMES:
+        return jsonify({'error': f"Tek istekte en fazla {MAX_BATCH_FRAMES} kare gönderilebilir"}), 413
 
-    Kullanıcı Pozu Açıları:
-    Sağ Dirsek: {user_angles['right_elbow'] if user_angles['right_elbow'] is not None else 'verilemedi'} derece
-    Sol Dirsek: {user_angles['left_elbow'] if user_angles['left_elbow'] is not None else 'verilemedi'} derece
-    Sağ Omuz: {user_angles['right_shoulder'] if user_angles['right_shoulder'] is not None else 'verilemedi'} derece
-    Sol Omuz: {user_angles['left_shoulder'] if user_angles['left_shoulder'] is not None else 'verilemedi'} derece
-    Sağ Diz: {user_angles['right_knee'] if user_angles['right_knee'] is not None else 'verilemedi'} derece
-    Sol Diz: {user_angles['left_knee'] if user_angles['left_knee'] is not None else 'verilemedi'} derece
-    Sağ Kalça: {user_angles['right_hip'] if user_angles['right_hip'] is not None else 'verilemedi'} derece
-    Sol Kalça: {user_angles['left_hip'] if user_angles['left_hip'] is not None else 'verilemedi'} derece
+    try:
+        timestamps = np.array([float(frame['timestamp_ms']) for frame in frames])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Her karede sayısal timestamp_ms alanı olmalıdır'}), 400
+    if not np.isfinite(timestamps).all():
+        return jsonify({'error': 'Her karede sayısal timestamp_ms alanı olmalıdır'}), 400
+
+    # YORUM: Tüm karelerin açıları tek seferde hesaplanır; referans kareler ikili aramayla eşlenir.
+    # user_pose'u olmayan (kişi görünmeyen) kareler NaN olarak puanlanır.
+    try:
+        user_arrays = parse_poses([frame.get('user_pose') for frame in frames])
+    except PosePayloadError as e:
+        return jsonify({'error': f"Geçersiz poz verisi: {e}"}), 400
+    user_rows = compute_angles(user_arrays, FEEDBACK_ANGLES)
+    reference_indices = dance.frame_indices(timestamps)
+    reference_rows = dance.feedback_angles[reference_indices]
+
+    accuracy, worst, median_signed, mean_absolute = score_sequence(user_rows, reference_rows)
+    overall_accuracy = int(accuracy.mean())
+
+    # YORUM: Zamanlama toleranslı skor: kareler zaman sırasıyla bantlı DTW'ye verilir.
+    # Ritmin biraz gerisinde/önünde kalan öğrenci her eklemi yanlış yapmış gibi cezalandırılmaz.
+    aligner = StreamingAligner(dance.feedback_angles, dance.times_ms)
+    alignments = [None] * len(frames)
+    for i in np.argsort(timestamps, kind='stable'):
+        alignments[i] = aligner.update(timestamps[i], user_rows[i])
+    summary = feedback_from_errors(median_signed.tolist(), overall_accuracy)
+
+    response = {
+        'dance_id': dance.dance_id,
+        'accuracy': overall_accuracy,
+        'frames': [
+            {
+                'timestamp_ms': float(t),
+                'reference_frame': dance.frame_number(i),
+                'accuracy': int(a),
+                'worst_joint': FEEDBACK_ANGLES.names[w] if w >= 0 else None,
+                'aligned_accuracy': alignment['score'],
+                'lag_ms': alignment['lag_ms'],
+            }
+            for t, i, a, w, alignment in zip(timestamps.tolist(), reference_indices.tolist(), accuracy.tolist(),
+                                             worst.tolist(), alignments)
+        ],
+        'aligned_accuracy': int(np.mean([alignment['score'] for alignment in alignments])),
+        'lag_ms': float(np.median([alignment['lag_ms'] for alignment in alignments])),
+        'joint_errors': {
+            name: (round(float(error), 1) if not np.isnan(error) else None)
+            for name, error in zip(FEEDBACK_ANGLES.names, mean_absolute)
+        },
+        'feedback': summary['feedback'],
+        'source': 'local',
+    }
 
-    Referans Pozu Açıları:
-    Sağ Dirsek: {reference_angles['right_elbow'] if reference_angles['right_elbow'] is not None else 'verilemedi'} derece
-    Sol Dirsek: {reference_angles['left_elbow'] if reference_angles['left_elbow'] is not None else 'verilemedi'} derece
-    Sağ Omuz: {reference_angles['right_shoulder'] if reference_angles['right_shoulder'] is not None else 'verilemedi'} derece
-    Sol Omuz: {reference_angles['left_shoulder'] if reference_angles['left_shoulder'] is not None else 'verilemedi'} derece
-    Sağ Diz: {reference_angles['right_knee'] if reference_angles['right_knee'] is not None else 'verilemedi'} derece
-    Sol Diz: {reference_angles['left_knee'] if reference_angles['left_knee'] is not None else 'verilemedi'} derece
-    Sağ Kalça: {reference_angles['right_hip'] if reference_angles['right_hip'] is not None else 'verilemedi'} derece
-    Sol Kalça: {reference_angles['left_hip'] if reference_angles['left_hip'] is not None else 'verilemedi'} derece
-    """
+    if data.get('coaching') != 'llm' or feedback_policy.mode == 'local':
+        return jsonify(response)
+    if circuit_open():
+        response['source'] = 'local_fallback'
+        return jsonify(response)
 
-    print("Gemini'ye gönderilen prompt: \n", prompt)
+    # YORUM: İstenirse tüm dizinin özeti için tek bir LLM çağrısı yapılır (sadece en çok ayrılan eklemler)
+    prompt = with_instructions(SEQUENCE_INSTRUCTIONS, sequence_prompt(len(frames), overall_accuracy, mean_absolute))
+    record_prompt_tokens(prompt)
 
     try:
-        response = model.generate_content(prompt)
-        feedback_text = response.text
-        print("\n----------------------------------")
-        print("Gemini'den Gelen Geri Bildirim:")
-        print(feedback_text)
-        print("----------------------------------")
-        return jsonify({'feedback': feedback_text})
+        response['feedback'] = generate_text(prompt)
+        response['source'] = 'llm'
+        return jsonify(response)
+    except RequestCancelled:
+        print("İstemci bağlantıyı kapattı, Gemini çağrısı iptal edildi.")
+        return '', 499
+    except ModelTimeout as e:
+        print(f"Gemini API zaman aşımı (evaluate_poses), yerel özet döndürüldü: {e}")
+    except CircuitOpen as e:
+        print(f"Gemini API devre dışı (evaluate_poses), yerel özet döndürüldü: {e}")
     except Exception as e:
-        print(f"Gemini API hatası (evaluate_pose): {e}")
-        return jsonify({'error': "Gemini API'den geri bildirim alınırken bir hata oluştu."}), 500
+        print(f"Gemini API hatası (evaluate_poses), yerel özet döndürüldü: {e}")
+    # YORUM: Puanlar zaten hesaplandı; LLM özeti alınamazsa yerel özetle yanıt verilir
+    response['source'] = 'local_fallback'
+    return jsonify(response)
+
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """
+    Canlı akış oturumu açar. İstek: {"dance_id": ...}. Yanıt: {"session_id": ...}.
+    İstemci karelerini POST /sessions/<id>/frames ile gönderir, skorları GET /sessions/<id>/events
+    (Server-Sent Events) ile dinler. Sunucu sadece skor veya geri bildirim değiştiğinde olay gönderir.
+    """
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
+    dance = reference_store.get(request.json.get('dance_id'))
+    if dance is None:
+        return jsonify({'error': f"Bilinmeyen dans: {request.json.get('dance_id')}"}), 404
+    session = sessions.create(dance)
+    return jsonify({'session_id': session.session_id, 'dance_id': dance.dance_id}), 201
+
+
+@app.route('/sessions/<session_id>/frames', methods=['POST'])
+def session_frames(session_id):
+    """Oturuma bir veya birden fazla kare ekler: {"frames": [...]} ya da tek kare {"timestamp_ms", "user_pose"}."""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Oturum bulunamadı veya süresi doldu'}), 404
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
+
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'İstek gövdesi bir JSON nesnesi olmalıdır'}), 400
+    frames = data.get('frames') if 'frames' in data else [data]
+    if not isinstance(frames, list) or not frames or len(frames) > MAX_BATCH_FRAMES:
+        return jsonify({'error': 'frames alanı geçersiz'}), 400
+    try:
+        published = session.add_frames(frames)
+    except PosePayloadError as e:
+        return jsonify({'error': f"Geçersiz poz verisi: {e}"}), 400
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Her karede sayısal timestamp_ms alanı olmalıdır'}), 400
+    return jsonify({'frames': session.frames, 'events': published})
+
+
+@app.route('/sessions/<session_id>/events', methods=['GET'])
+def session_events(session_id):
+    """Oturumun skor/geri bildirim olaylarını Server-Sent Events olarak akıtır."""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Oturum bulunamadı veya süresi doldu'}), 404
+    return Response(stream_with_context(session.event_stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """Oturumu kapatır; açık olay akışı da sonlanır."""
+    if not sessions.close(session_id):
+        return jsonify({'error': 'Oturum bulunamadı'}), 404
+    return '', 204
+
+
+@app.route('/dances', methods=['GET'])
+def list_dances():
+    """Sunucuda yüklü referans dansları (kimlik, kare sayısı, süre) listeler."""
+    return jsonify(reference_store.summary())
+
+
+@app.route('/dances/search', methods=['POST'])
+def search_dances():
+    """
+    Bir poza veya kısa bir poz penceresine en çok benzeyen referans karelerini tüm kütüphanede arar.
+    İstek: {"user_pose": ...} veya {"user_poses": [...]} (en eski kare başta), isteğe bağlı "k" (varsayılan 5).
+    Yanıt: {"matches": [{"dance_id", "frame_number", "timestamp_ms", "distance"}, ...]} (en benzer başta).
+    Pencere için dönen kare, pencerenin son karesine karşılık gelir (istemci adımı oradan ilerletebilir).
+    """
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
+    data = request.json
+    k = data.get('k', 5)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= MAX_SEARCH_RESULTS:
+        return jsonify({'error': f"k 1 ile {MAX_SEARCH_RESULTS} arasında bir tam sayı olmalıdır"}), 400
+
+    user_poses = data.get('user_poses')
+    if user_poses is not None and (not isinstance(user_poses, list) or not 0 < len(user_poses) <= MAX_SEARCH_WINDOW):
+        return jsonify({'error': f"user_poses en fazla {MAX_SEARCH_WINDOW} pozluk boş olmayan bir liste olmalıdır"}), 400
+    try:
+        with metrics.span('search_dances', 'parse'):
+            poses = parse_poses(user_poses) if user_poses is not None else parse_pose(data.get('user_pose'))
+    except PosePayloadError as e:
+        return jsonify({'error': f'Eksik veya geçersiz poz verisi: {e}'}), 400
+
+    with metrics.span('search_dances', 'index'):
+        matches = pose_index.query_window(poses, k) if user_poses is not None else pose_index.query(poses, k)
+    return jsonify({'matches': matches})
+
+
+@app.route('/dances/<dance_id>/pose', methods=['GET'])
+def dance_pose(dance_id):
+    """
+    Verilen zamandaki (timestamp_ms, dansın başından itibaren) referans karesini döndürür.
+    İstemcinin tüm dans dosyasını önceden indirmesi gerekmez.
+    """
+    dance = reference_store.get(dance_id)
+    if dance is None:
+        return jsonify({'error': f"Bilinmeyen dans: {dance_id}"}), 404
+    timestamp_ms = request.args.get('timestamp_ms', type=float)
+    if timestamp_ms is None or not np.isfinite(timestamp_ms):
+        return jsonify({'error': 'timestamp_ms parametresi gerekli'}), 400
+
+    frame_index = dance.frame_index(timestamp_ms)
+    landmarks = dance.landmarks(frame_index)
+    return jsonify({
+        'dance_id': dance_id,
+        'frame_number': dance.frame_number(frame_index),
+        'timestamp_ms': float(dance.times_ms[frame_index]),
+        'angles': angles_to_dict(dance.feedback_angles[frame_index], FEEDBACK_ANGLES, JSON_MISSING_VALUE),
+        'landmarks': [
+            {'id': i, 'x': float(x), 'y': float(y), 'z': float(z), 'visibility': float(v)}
+            for i, (x, y, z, v) in enumerate(landmarks.tolist())
+        ],
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metin biçiminde sayaçlar, aşama süreleri ve gecikme histogramları."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/feedback_cache/stats', methods=['GET'])
+def feedback_cache_stats():
+    """Geri bildirim önbelleğinin isabet/ıskalama sayaçlarını döndürür."""
+    return jsonify(feedback_cache.stats())
 
 
 if __name__ == '__main__':
     print("Flask backend sunucusu başlatılıyor...")
-    app.run(debug=True, port=5000)
+    # YORUM: HTTP/1.1 ile istemciler bağlantıyı açık tutar; canlı akışta her kare için yeni bağlantı kurulmaz
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    # threaded=True: her istek kendi thread'inde işlenir, model çağrıları gateway ile sınırlanır
+    app.run(debug=True, port=5000, threaded=True)
@@ -4,101 +4,128 @@ import numpy as np
 import json
 import os
 
+from pose_angles import JSON_MISSING_VALUE, ZEYBEK_ANGLES, compute_angles, landmarks_to_array, angles_to_dict
+from frame_stream import FrameStreamWriter, recover_stream
+from frame_sampling import FrameSampler, downscale, interpolate_records, sampling_step
+from pose_filter import MISSING_POSE, PoseFilter, is_missing
+
 mp_drawing = mp.solutions.drawing_utils
 mp_pose = mp.solutions.pose
 
-# Açı hesaplama fonksiyonu
-def calculateAngle(a, b, c):
-    a, b, c = np.array(a), np.array(b), np.array(c)
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    return 360 - angle if angle > 180 else angle
-
 # Video dosyasının yolu
 video_path = "path_x"
 
+# JSON çıktısı (tüm kareler bellekte toplanıp sonda yazılır)
+output_path = r"C:\Users\MS\dance-tracker\src\zeybek_angle.json"
+
+# Akış modu: kareler üretildikçe NDJSON dosyasına yazılır (uzun videolarda bellek sabit kalır).
+# Yarıda kalırsa tekrar çalıştırıldığında son yazılan kareden devam eder.
+STREAMING = False
+stream_output_path = r"C:\Users\MS\dance-tracker\src\zeybek_angle.ndjson"
+STREAM_CHUNK_SIZE = 256
+
+# Hızlı çıkarım (None/False = kapalı): sadece TARGET_FPS hızında kare işle, kareyi poz çıkarımından önce
+# uzun kenarı MAX_INFERENCE_SIZE piksel olacak şekilde küçült, atlanan kareleri doğrusal olarak doldur.
+TARGET_FPS = None
+MAX_INFERENCE_SIZE = None
+INTERPOLATE_SKIPPED = False
+
+# Landmark'ları One-Euro filtresiyle yumuşat; kısa süre poz algılanamayan kareleri atlamak yerine doldur
+SMOOTH_LANDMARKS = False
+
 cap = cv2.VideoCapture(video_path)
 if not cap.isOpened():
     print("Video açılamadı!")
     exit()
 
-frame_angles = []
+
+def chunk_to_frames(frame_numbers, landmark_frames, previous=None):
+    """
+    Bir parça karenin açılarını tek seferde hesaplar.
+    Doldurma açıksa atlanan kareler önce komşu karelerden doldurulur (previous: önceki parçanın son karesi).
+    """
+    if max_gap and frame_numbers:
+        records = interpolate_records([(n, 0.0, lm) for n, lm in zip(frame_numbers, landmark_frames)], max_gap,
+                                      previous and (previous[0], 0.0, previous[1]))
+        frame_numbers = [record[0] for record in records]
+        landmark_frames = [record[2] for record in records]
+    angles = compute_angles(np.array(landmark_frames).reshape(-1, 33, 4), ZEYBEK_ANGLES)
+    return [{"frame_number": n, "angles": angles_to_dict(row, ZEYBEK_ANGLES, JSON_MISSING_VALUE)}
+            for n, row in zip(frame_numbers, angles)]
+
+
+step = sampling_step(cap.get(cv2.CAP_PROP_FPS), TARGET_FPS)
+max_gap = int(np.ceil(step)) if INTERPOLATE_SKIPPED and step > 1 else 0
+
+writer = None
+start_frame = 0
+if STREAMING:
+    stream_header = {"video": os.path.basename(video_path), "angles": list(ZEYBEK_ANGLES.names)}
+    recovered = recover_stream(stream_output_path, stream_header)
+    if recovered is not None:
+        start_frame = recovered[0]
+        print(f"{start_frame}. kareden devam ediliyor.")
+    writer = FrameStreamWriter(stream_output_path, stream_header, resume=recovered is not None)
+
+frame_numbers = []
+landmark_frames = []
+previous = None  # Akış modunda önceki parçanın son karesi (kare numarası, landmark'lar)
+frame_count = 0
+sampler = FrameSampler(step, start_frame)
+pose_filter = PoseFilter() if SMOOTH_LANDMARKS else None
+
+# Devam ediliyorsa önceden yazılmış kareleri çözümlemeden atla
+while frame_count < start_frame and cap.grab():
+    frame_count += 1
 
 with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
     while cap.isOpened():
+        if not sampler.keep(frame_count + 1):
+            # Örneklenmeyen kare: çözümlemeden atla
+            if not cap.grab():
+                break
+            frame_count += 1
+            continue
+
         ret, frame = cap.read()
         if not ret:
             break
+        frame_count += 1
 
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image = cv2.cvtColor(downscale(frame, MAX_INFERENCE_SIZE), cv2.COLOR_BGR2RGB)
         image.flags.writeable = False
         results = pose.process(image)
         image.flags.writeable = True
 
-        try:
-            landmarks = results.pose_landmarks.landmark
-
-            # Sol taraf koordinatları
-            left_shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                             landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            left_elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                          landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-            left_wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                          landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-            left_waist = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                          landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-            left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                         landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
-            left_ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                          landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
-            left_ear = [landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].y]
-            left_mouth = [landmarks[mp_pose.PoseLandmark.MOUTH_LEFT.value].x,
-                          landmarks[mp_pose.PoseLandmark.MOUTH_LEFT.value].y]
-
-            # Sağ taraf koordinatları
-            right_shoulder = [landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                              landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            right_elbow = [landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                           landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-            right_wrist = [landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                           landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-            right_waist = [landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                           landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y]
-            right_knee = [landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].x,
-                          landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y]
-            right_ankle = [landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                           landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
-            right_ear = [landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].x,
-                         landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].y]
-            right_mouth = [landmarks[mp_pose.PoseLandmark.MOUTH_RIGHT.value].x,
-                           landmarks[mp_pose.PoseLandmark.MOUTH_RIGHT.value].y]
-
-            # Açılar
-            angles = {
-                "left_inner_arm_angle": calculateAngle(left_shoulder, left_elbow, left_wrist),
-                "left_armpit_angle": calculateAngle(left_elbow, left_shoulder, left_waist),
-                "left_waist_angle": calculateAngle(left_shoulder, left_waist, left_knee),
-                "left_leg_angle": calculateAngle(left_waist, left_knee, left_ankle),
-                "left_neck_angle": calculateAngle(left_ear, left_mouth, left_shoulder),
-
-                "right_inner_arm_angle": calculateAngle(right_shoulder, right_elbow, right_wrist),
-                "right_armpit_angle": calculateAngle(right_elbow, right_shoulder, right_waist),
-                "right_waist_angle": calculateAngle(right_shoulder, right_waist, right_knee),
-                "right_leg_angle": calculateAngle(right_waist, right_knee, right_ankle),
-                "right_neck_angle": calculateAngle(right_ear, right_mouth, right_shoulder)
-            }
-
-            frame_angles.append(angles)
-
-        except:
+        landmarks = None if results.pose_landmarks is None else landmarks_to_array(results.pose_landmarks.landmark)
+        if pose_filter is not None:
+            landmarks = pose_filter.filter(MISSING_POSE if landmarks is None else landmarks,
+                                           cap.get(cv2.CAP_PROP_POS_MSEC))
+            if is_missing(landmarks):
+                landmarks = None
+        if landmarks is None:
             continue
 
+        frame_numbers.append(frame_count)
+        landmark_frames.append(landmarks)
+
+        if writer is not None and len(landmark_frames) >= STREAM_CHUNK_SIZE:
+            writer.write_frames(chunk_to_frames(frame_numbers, landmark_frames, previous))
+            previous = (frame_numbers[-1], landmark_frames[-1])
+            frame_numbers, landmark_frames = [], []
+
 cap.release()
 
-# JSON'a yaz
-output_path = r"C:\Users\MS\dance-tracker\src\zeybek_angle.json"
-with open(output_path, 'w') as f:
-    json.dump(frame_angles, f, indent=4)
+if writer is not None:
+    writer.write_frames(chunk_to_frames(frame_numbers, landmark_frames, previous))
+    writer.close()
+    print("Açı verileri başarıyla kaydedildi:", stream_output_path)
+else:
+    # Açılar (tüm kareler için tek seferde)
+    frame_angles = [frame["angles"] for frame in chunk_to_frames(frame_numbers, landmark_frames)]
+
+    # JSON'a yaz
+    with open(output_path, 'w') as f:
+        json.dump(frame_angles, f, indent=4)
 
-print("Açı verileri başarıyla kaydedildi:", output_path)
+    print("Açı verileri başarıyla kaydedildi:", output_path)
@@ -0,0 +1,7 @@
+# Performans ölçümleri. Depo kök dizininden çalıştırılır:
+#   python -m benchmarks.micro                 # açı hesabı, segment arama, dosya okuma
+#   python -m benchmarks.load                  # sahte Gemini modeliyle uçtan uca yük testi
+#   python -m benchmarks.extraction video.mp4  # hızlı çıkarım ayarlarının süre/doğruluk etkisi
+#   python -m benchmarks.prompts               # geri bildirim prompt'larının tahmini token boyutu
+#   python -m benchmarks.compare eski.json yeni.json
+# Sonuçlar benchmarks/results/<ad>-<commit>.json dosyalarına kaydedilir.
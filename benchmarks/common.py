@@ -0,0 +1,85 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Depo kök dizini (benchmarks/ bir üst dizin); düz modüller (pose_angles, ...) buradan içe aktarılır
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+REFERENCE_DATA_DIR = os.path.join(REPO_DIR, "json_datas")
+ZEYBEK_JSON = os.path.join(REPO_DIR, "zeybek.json")
+
+# Sonuç dosyalarının varsayılan dizini
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+
+def percentile(values, q):
+    """Sıralı değerlerden q (0-1) yüzdeliğini döndürür (en yakın sıra yöntemi)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(durations, items_per_call=1):
+    """Süre listesini (saniye) p50/p95/p99 (ms) ve saniyedeki işlem sayısına özetler."""
+    total = sum(durations)
+    return {
+        "calls": len(durations),
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "throughput_per_s": len(durations) * items_per_call / total if total else 0.0,
+    }
+
+
+def measure(function, repeat=50, warmup=3, items_per_call=1):
+    """function()'ı warmup kez ısındırıp repeat kez ölçer ve summarize sonucunu döndürür."""
+    for _ in range(warmup):
+        function()
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return summarize(durations, items_per_call)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(name, results, output_path=None):
+    """
+    Sonuçları commit ve ortam bilgisiyle JSON olarak kaydeder. Varsayılan dosya:
+    benchmarks/results/<name>-<commit>.json. Kaydedilen dosyanın yolunu döndürür.
+    """
+    commit = git_commit()
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"{name}-{commit or 'unknown'}.json")
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(output_path, "w") as f:
+        json.dump(document, f, indent=2)
+    return output_path
+
+
+def print_results(results):
+    for name, result in results.items():
+        print(f"{name:40s} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+              f"p99 {result['p99_ms']:9.3f} ms  {result['throughput_per_s']:12.1f} /sn")
@@ -0,0 +1,48 @@
+import argparse
+import json
+import sys
+
+# Bu orandan fazla yavaşlama gerileme (regression) sayılır
+DEFAULT_TOLERANCE = 0.10
+
+
+def compare(baseline, candidate, tolerance=DEFAULT_TOLERANCE):
+    """
+    İki sonuç dosyasındaki ortak ölçümleri karşılaştırır.
+    Döndürür: [(ölçüm, eski p50, yeni p50, oran, gerileme mi)] — oran > 1 yavaşlama demektir.
+    """
+    rows = []
+    for name, old in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if not isinstance(old, dict) or not isinstance(new, dict) or "p50_ms" not in old or "p50_ms" not in new:
+            continue
+        ratio = new["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float('inf')
+        rows.append((name, old["p50_ms"], new["p50_ms"], ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İki benchmark sonuç dosyasını (JSON) karşılaştırır.")
+    parser.add_argument("baseline", help="Eski commit'in sonuç dosyası")
+    parser.add_argument("candidate", help="Yeni commit'in sonuç dosyası")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="İzin verilen göreli yavaşlama (0.10 = %%10)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"{baseline['benchmark']}: {baseline.get('commit')} -> {candidate.get('commit')}")
+    rows = compare(baseline, candidate, args.tolerance)
+    for name, old_p50, new_p50, ratio, regressed in rows:
+        marker = "  GERİLEME" if regressed else ""
+        print(f"{name:40s} p50 {old_p50:9.3f} ms -> {new_p50:9.3f} ms  x{ratio:5.2f}{marker}")
+
+    # CI'da kullanılabilmesi için gerileme varsa sıfırdan farklı çıkış kodu
+    sys.exit(1 if any(row[4] for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import time
+
+from benchmarks.common import print_results, save_results
+
+import numpy as np
+
+from general_jsonmaker_withangle import create_pose, extract_video, sampling_options
+
+# Karşılaştırılan ayarlar: (ad, hedef FPS, en büyük çıkarım boyutu, doldurma, aşamalar ayrı thread'lerde)
+DEFAULT_VARIANTS = (
+    ("full", None, None, False, True),
+    ("full_serial", None, None, False, False),
+    ("fps30", 30, None, False, True),
+    ("fps30_interpolated", 30, None, True, True),
+    ("size640", None, 640, False, True),
+    ("size640_serial", None, 640, False, False),
+    ("fps30_size640_interpolated", 30, 640, True, True),
+    ("fps15_size480_interpolated", 15, 480, True, True),
+)
+
+
+def angle_error(reference_track, track):
+    """
+    İki izin ortak karelerindeki ortalama mutlak açı farkı (derece) ve ortak kare oranı.
+    reference_track tam çıkarım (her kare, tam çözünürlük) sonucudur.
+    """
+    common, reference_index, track_index = np.intersect1d(reference_track.frame_numbers, track.frame_numbers,
+                                                          return_indices=True)
+    if len(common) == 0:
+        return float('nan'), 0.0
+    diffs = np.abs(np.asarray(reference_track.angles)[reference_index] - np.asarray(track.angles)[track_index])
+    return float(np.nanmean(diffs)), len(common) / len(reference_track)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hızlı çıkarım ayarlarının (kare atlama, küçültme, doldurma) süre ve doğruluk etkisini ölçer.")
+    parser.add_argument("video", help="Ölçümde kullanılacak video (ör. 60 FPS 1080p bir klip)")
+    parser.add_argument("--repeat", type=int, default=1, help="Her ayarın tekrar sayısı")
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/results/extraction-<commit>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    tracks = {}
+    with create_pose() as pose:
+        for name, target_fps, max_size, interpolate, pipeline in DEFAULT_VARIANTS:
+            sampling = sampling_options(target_fps, max_size, interpolate)
+            durations = []
+            for _ in range(args.repeat):
+                start_time = time.perf_counter()
+                extracted = extract_video(args.video, pose, sampling, pipeline)
+                durations.append(time.perf_counter() - start_time)
+                if extracted is None:
+                    parser.error(f"Video açılamadı: {args.video}")
+            tracks[name] = extracted[0]
+            seconds = min(durations)
+            results[name] = {
+                "p50_ms": seconds * 1000, "p95_ms": max(durations) * 1000, "p99_ms": max(durations) * 1000,
+                "throughput_per_s": len(tracks[name]) / seconds if seconds else 0.0,
+                "frames": len(tracks[name]), "sampling": sampling, "pipeline": pipeline,
+            }
+
+    full = tracks["full"]
+    for name, result in results.items():
+        result["speedup"] = results["full"]["p50_ms"] / result["p50_ms"] if result["p50_ms"] else 0.0
+        result["mean_angle_error_deg"], result["frame_coverage"] = angle_error(full, tracks[name])
+
+    print_results(results)
+    print()
+    for name, result in results.items():
+        print(f"{name:40s} x{result['speedup']:4.2f} hız, ortalama açı farkı {result['mean_angle_error_deg']:5.2f}°, "
+              f"kare kapsamı %{result['frame_coverage'] * 100:.0f}")
+    print(f"\nSonuçlar kaydedildi: {save_results('extraction', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import glob
+import http.client
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+
+from benchmarks.common import REFERENCE_DATA_DIR, REPO_DIR, print_results, save_results, summarize
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from llm_gateway import ModelGateway
+from llm_batcher import BatchFakeModel, FeedbackBatcher
+from pose_payload import encode_pose, parse_pose
+
+APP_PATH = os.path.join(REPO_DIR, "8.38app.py")
+
+SCENARIOS = ("evaluate_pose_legacy", "evaluate_pose_dance", "evaluate_pose_base64", "evaluate_poses_batch",
+             "session_frames")
+
+
+def load_app(feedback_mode, cache_enabled, model_latency, verbose=False, **faults):
+    """
+    8.38app.py'yi modül olarak yükler ve Gemini modelini sahte modelle değiştirir (gerçek API çağrılmaz).
+    Ayarlar modül yüklenirken ortam değişkenlerinden okunduğu için önce ortam değişkenleri ayarlanır.
+    faults: sahte modelin hata enjeksiyonu ayarları (slow_rate, slow_latency, error_rate).
+    """
+    os.environ["LOCAL_FEEDBACK_MODE"] = feedback_mode
+    os.environ["REFERENCE_DATA_DIR"] = REFERENCE_DATA_DIR
+    os.environ["VERBOSE_LOGGING"] = "1" if verbose else "0"
+    if not cache_enabled:
+        os.environ["FEEDBACK_CACHE_SIZE"] = "0"
+
+    spec = importlib.util.spec_from_file_location("dance_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    module.gateway.close()
+    module.gateway = ModelGateway(BatchFakeModel(model_latency, **faults),
+                                  max_concurrency=module.gateway.max_concurrency,
+                                  timeout=module.gateway.timeout, breaker=module.gateway.breaker,
+                                  hedge_percentile=module.gateway.hedge_percentile,
+                                  hedge_min_seconds=module.gateway.hedge_min_seconds)
+    module.feedback_batcher.close()
+    module.feedback_batcher = FeedbackBatcher(module.gateway, module.FEEDBACK_INSTRUCTIONS,
+                                              max_batch=module.feedback_batcher.max_batch,
+                                              max_wait_ms=module.feedback_batcher.max_wait * 1000)
+    return module
+
+
+def load_recordings():
+    """json_datas/ altındaki kayıtlı poz akışları: dans kimliği -> [(göreli zaman ms, landmark listesi)]."""
+    recordings = {}
+    for path in sorted(glob.glob(os.path.join(REFERENCE_DATA_DIR, "*.json"))):
+        with open(path) as f:
+            frames = json.load(f)
+        frames = [frame for frame in frames if frame.get('landmarks')]
+        if not frames:
+            continue
+        start_ms = frames[0].get('timestamp_ms') or 0.0
+        recordings[os.path.splitext(os.path.basename(path))[0]] = [
+            ((frame.get('timestamp_ms') or 0.0) - start_ms, frame['landmarks']) for frame in frames
+        ]
+    return recordings
+
+
+class ReplayClient(threading.Thread):
+    """Kayıtlı bir poz akışını seçilen senaryoyla sunucuya gönderir ve istek sürelerini toplar."""
+
+    def __init__(self, port, scenario, dance_id, recording, requests, batch):
+        super().__init__(daemon=True)
+        self.port = port
+        self.scenario = scenario
+        self.dance_id = dance_id
+        self.recording = recording
+        self.requests = requests
+        self.batch = batch
+        self.durations = []
+        self.errors = 0
+        self._connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    def _post(self, path, body):
+        self._connection.request('POST', path, body=json.dumps(body), headers={'Content-Type': 'application/json'})
+        response = self._connection.getresponse()
+        data = response.read()
+        return response.status, data
+
+    def _frame(self, i):
+        return self.recording[i % len(self.recording)]
+
+    def _request_body(self, i):
+        timestamp_ms, pose = self._frame(i)
+        if self.scenario == "evaluate_pose_legacy":
+            # Referans olarak kaydın biraz ilerisindeki kare gönderilir (eski istemci davranışı)
+            return '/evaluate_pose', {'user_pose': pose, 'reference_pose': self._frame(i + 3)[1]}
+        if self.scenario == "evaluate_pose_dance":
+            return '/evaluate_pose', {'dance_id': self.dance_id, 'timestamp_ms': timestamp_ms, 'user_pose': pose}
+        if self.scenario == "evaluate_pose_base64":
+            return '/evaluate_pose', {'dance_id': self.dance_id, 'timestamp_ms': timestamp_ms,
+                                      'user_pose': encode_pose(parse_pose(pose))}
+        frames = [{'timestamp_ms': t, 'user_pose': p} for t, p in
+                  (self._frame(i * self.batch + k) for k in range(self.batch))]
+        if self.scenario == "evaluate_poses_batch":
+            return '/evaluate_poses', {'dance_id': self.dance_id, 'frames': frames}
+        return f"/sessions/{self.session_id}/frames", {'frames': frames}
+
+    def run(self):
+        if self.scenario == "session_frames":
+            status, data = self._post('/sessions', {'dance_id': self.dance_id})
+            if status != 201:
+                self.errors += 1
+                return
+            self.session_id = json.loads(data)['session_id']
+
+        # İstek gövdeleri önceden hazırlanır; ölçülen süre sadece istek-yanıt süresidir
+        bodies = [self._request_body(i) for i in range(self.requests)]
+        for path, body in bodies:
+            start_time = time.perf_counter()
+            try:
+                status, _ = self._post(path, body)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                self._connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+                continue
+            self.durations.append(time.perf_counter() - start_time)
+            if status != 200:
+                self.errors += 1
+
+
+def run_scenario(port, scenario, recordings, clients, requests, batch):
+    dance_ids = sorted(recordings)
+    workers = [ReplayClient(port, scenario, dance_ids[i % len(dance_ids)], recordings[dance_ids[i % len(dance_ids)]],
+                            requests, batch) for i in range(clients)]
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start_time
+
+    durations = [duration for worker in workers for duration in worker.durations]
+    result = summarize(durations)
+    # Eşzamanlı istemcilerde verim, istek sürelerinin toplamına değil duvar saatine göre hesaplanır
+    result["throughput_per_s"] = len(durations) / elapsed if elapsed else 0.0
+    result["frames_per_s"] = result["throughput_per_s"] * (batch if scenario in ("evaluate_poses_batch",
+                                                                                  "session_frames") else 1)
+    result["errors"] = sum(worker.errors for worker in workers)
+    result["clients"] = clients
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Kayıtlı poz akışlarını (json_datas/) sahte Gemini modeliyle çalışan Flask uygulamasına gönderir.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=8, help="Eşzamanlı istemci sayısı")
+    parser.add_argument("--requests", type=int, default=200, help="İstemci başına istek sayısı")
+    parser.add_argument("--batch", type=int, default=30, help="Toplu/akış senaryolarında istek başına kare")
+    parser.add_argument("--feedback-mode", default="auto", choices=("auto", "local", "llm"),
+                        help="LOCAL_FEEDBACK_MODE (llm: her istek sahte modele gider)")
+    parser.add_argument("--model-latency", type=float, default=0.5, help="Sahte modelin yanıt gecikmesi (saniye)")
+    parser.add_argument("--slow-rate", type=float, default=0.0,
+                        help="Sahte model çağrılarının --slow-latency kadar süren oranı (kuyruk gecikmesi)")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Yavaş çağrıların süresi (saniye)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Sahte model çağrılarının hata veren oranı")
+    parser.add_argument("--no-cache", action="store_true", help="Geri bildirim önbelleğini kapat")
+    parser.add_argument("--verbose", action="store_true", help="Uygulamanın prompt/yanıt yazdırmasını açık bırak")
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # İstek başına log satırlarını kapat
+    app_module = load_app(args.feedback_mode, not args.no_cache, args.model_latency, args.verbose,
+                          slow_rate=args.slow_rate, slow_latency=args.slow_latency, error_rate=args.error_rate)
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"  # İstemciler bağlantıyı açık tutar (8.38app.py ile aynı)
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    recordings = load_recordings()
+    results = {}
+    try:
+        for scenario in args.scenarios:
+            results[scenario] = run_scenario(server.server_port, scenario, recordings, args.clients,
+                                             args.requests, args.batch)
+    finally:
+        server.shutdown()
+
+    print_results(results)
+    for scenario, result in results.items():
+        print(f"{scenario:40s} {result['frames_per_s']:10.1f} kare/sn, hata: {result['errors']}")
+    settings = {"clients": args.clients, "requests": args.requests, "batch": args.batch,
+                "feedback_mode": args.feedback_mode, "model_latency": args.model_latency, "cache": not args.no_cache,
+                "slow_rate": args.slow_rate, "slow_latency": args.slow_latency, "error_rate": args.error_rate}
+    print(f"\nSonuçlar kaydedildi: {save_results('load', {'settings': settings, **results}, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import glob
+import json
+import math
+import os
+import tempfile
+
+from benchmarks.common import (REFERENCE_DATA_DIR, ZEYBEK_JSON, measure, print_results, save_results)
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES, compute_angles
+from pose_track import load_track, save_track, track_from_frames
+from pose_payload import encode_pose, parse_pose
+from pose_alignment import StreamingAligner
+from segment_search import best_windows
+from reference_store import DanceReference
+from local_feedback import evaluate_locally
+from extract_ideal_json import track_quality_scores
+from pose_filter import PoseFilter
+from pose_index import PoseIndex, pose_features
+
+
+def legacy_calculate_angle(p1, p2, p3):
+    """Eski 8.38app.py'deki sözlük tabanlı, tek açılık hesap (karşılaştırma için taban çizgisi)."""
+    if not p1 or not p2 or not p3:
+        return None
+    try:
+        v1 = (p1['x'] - p2['x'], p1['y'] - p2['y'])
+        v2 = (p3['x'] - p2['x'], p3['y'] - p2['y'])
+        dot_product = v1[0] * v2[0] + v1[1] * v2[1]
+        magnitude_v1 = math.sqrt(v1[0] ** 2 + v1[1] ** 2)
+        magnitude_v2 = math.sqrt(v2[0] ** 2 + v2[1] ** 2)
+        if magnitude_v1 == 0 or magnitude_v2 == 0:
+            return None
+        return math.degrees(math.acos(min(max(dot_product / (magnitude_v1 * magnitude_v2), -1.0), 1.0)))
+    except (KeyError, TypeError):
+        return None
+
+
+def legacy_window_search(scores, window):
+    """Eski extract_ideal_json.py'deki her pencereyi baştan toplayan O(F·W) arama (taban çizgisi)."""
+    best_start, best_sum = None, float('inf')
+    for start in range(len(scores) - window + 1):
+        window_sum = float(np.sum(scores[start:start + window]))
+        if window_sum < best_sum:
+            best_start, best_sum = start, window_sum
+    return best_start, best_sum
+
+
+def run(repeat, dance_path):
+    with open(dance_path) as f:
+        frames = json.load(f)
+    track = track_from_frames(frames)
+    poses = [frame['landmarks'] for frame in frames]
+    dance = DanceReference("bench", track)
+    results = {}
+
+    # Açı hesabı: eski kare kare Python döngüsü ve vektörel motor
+    def legacy_angles():
+        for pose in poses:
+            for _, (a, b, c) in zip(FEEDBACK_ANGLES.names, FEEDBACK_ANGLES.triples.tolist()):
+                legacy_calculate_angle(pose[a], pose[b], pose[c])
+
+    results["angles/legacy_python_per_frame"] = measure(legacy_angles, repeat, items_per_call=len(poses))
+    results["angles/vectorized_track"] = measure(lambda: compute_angles(track.landmarks, FEEDBACK_ANGLES),
+                                                 repeat, items_per_call=len(track))
+    single_pose = np.asarray(track.landmarks[0])
+    results["angles/vectorized_single_pose"] = measure(lambda: compute_angles(single_pose, FEEDBACK_ANGLES),
+                                                       repeat * 20)
+
+    # İstek ayrıştırma: sözlük listesi ve base64 float32
+    encoded = encode_pose(single_pose)
+    results["payload/parse_dict_pose"] = measure(lambda: parse_pose(poses[0]), repeat * 20)
+    results["payload/parse_base64_pose"] = measure(lambda: parse_pose(encoded), repeat * 20)
+
+    # Segment arama: eski kayan pencere döngüsü ve kümülatif toplam
+    scores = track_quality_scores(track)
+    window = min(25, len(scores))
+    results["segments/quality_scores"] = measure(lambda: track_quality_scores(track), repeat)
+    results["segments/legacy_window_loop"] = measure(lambda: legacy_window_search(scores, window), repeat)
+    results["segments/cumulative_best_window"] = measure(lambda: best_windows(scores, [window]), repeat)
+    results["segments/cumulative_three_windows_top3"] = measure(
+        lambda: best_windows(scores, [max(window // 2, 1), window, min(window * 2, len(scores))], 3), repeat)
+
+    # Referans arama, hizalama ve yerel geri bildirim (istek başına maliyetler)
+    middle_ms = dance.duration_ms / 2
+    results["reference/frame_index"] = measure(lambda: dance.frame_index(middle_ms), repeat * 20)
+    aligner = StreamingAligner(dance.feedback_angles, dance.times_ms)
+    user_row = dance.feedback_angles[len(dance) // 2] + 5.0
+    results["alignment/streaming_update"] = measure(lambda: aligner.update(middle_ms, user_row), repeat * 20)
+    reference_row = dance.feedback_angles[len(dance) // 2]
+    results["feedback/evaluate_locally"] = measure(lambda: evaluate_locally(user_row, reference_row), repeat * 20)
+    pose_filter = PoseFilter()
+    filter_pose = dance.landmarks(len(dance) // 2)
+    results["filter/one_euro_frame"] = measure(lambda: pose_filter.filter(filter_pose), repeat * 20)
+
+    # Kütüphane araması: KD-ağacı ve tüm karelerin doğrusal taranması (kütüphane = aynı dansın 20 kopyası)
+    pose_index = PoseIndex.from_references([DanceReference(f"bench{i}", track) for i in range(20)])
+    query = pose_features(filter_pose + 0.01)[0]
+    results["search/kdtree_top5"] = measure(lambda: pose_index.nearest(query, 5), repeat * 20)
+    results["search/linear_scan_top5"] = measure(
+        lambda: np.argsort(((pose_index.features - query) ** 2).mean(axis=1))[:5], repeat * 20)
+
+    # Dosya okuma: JSON kütüphanesi, zeybek.json ve ikili .dtrk
+    library = sorted(glob.glob(os.path.join(REFERENCE_DATA_DIR, "*.json")))
+
+    def load_library():
+        for path in library:
+            with open(path) as f:
+                json.load(f)
+
+    results["io/json_load_library"] = measure(load_library, max(repeat // 5, 3), items_per_call=len(library))
+    if os.path.exists(ZEYBEK_JSON):
+        def load_zeybek():
+            with open(ZEYBEK_JSON) as f:
+                json.load(f)
+        results["io/json_load_zeybek"] = measure(load_zeybek, max(repeat // 5, 3))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "bench.dtrk")
+        save_track(binary_path, track)
+        results["io/dtrk_load_mmap"] = measure(lambda: load_track(binary_path), repeat)
+        results["io/dtrk_load_full_read"] = measure(
+            lambda: np.asarray(load_track(binary_path, mmap=False).landmarks).sum(), repeat)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Açı hesabı, segment arama ve dosya okuma mikro ölçümleri.")
+    parser.add_argument("--repeat", type=int, default=50, help="Her ölçümün tekrar sayısı")
+    parser.add_argument("--dance", default=os.path.join(REFERENCE_DATA_DIR, "dance1.json"),
+                        help="Ölçümlerde kullanılacak referans dans dosyası")
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.dance)
+    print_results(results)
+    print(f"\nSonuçlar kaydedildi: {save_results('micro', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import glob
+import json
+import os
+
+from benchmarks.common import REFERENCE_DATA_DIR, measure, percentile, print_results, save_results
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES, angles_to_dict
+from pose_track import track_from_frames
+from reference_store import DanceReference
+from prompt_builder import (FEEDBACK_INSTRUCTIONS, PROMPT_JOINT_NAMES, estimate_tokens, pose_prompt,
+                            with_instructions)
+
+# Eski 8.38app.py /evaluate_pose talimatları (karşılaştırma için taban çizgisi)
+LEGACY_INSTRUCTIONS = """
+    Sen, bir dans eğitmenisin ve bir öğrencinin dans performansını değerlendiriyorsun. Öğrenci, referans bir dans pozunu taklit etmeye çalışıyor.
+    Aşağıda öğrencinin ve referansın eklem açıları var.
+
+    Sadece en belirgin pozisyon farkını tespit et ve bunu düzeltmek için bir tane net, eyleme geçirilebilir bir öneri sun.
+    Yanıtın en fazla 2-3 cümle uzunluğunda, motive edici ve teşvik edici olsun.
+
+    Eğer tüm açılar birbirine çok yakınsa, harika bir iş çıkardığına dair motive edici bir geri bildirim ver.
+
+    Örnek geri bildirim: "Harika gidiyorsun! Sol kolunu referansa göre biraz daha bükük tutmaya çalış. Devam et!"
+"""
+
+# Eski app.py /evaluate_pose talimatları (ham landmark JSON'u gönderen ilk sürüm)
+LEGACY_RAW_INSTRUCTIONS = """
+    Aşağıda iki insan vücudunun çeşitli eklem noktalarını temsil eden koordinat verileri yer alıyor.
+    Birinci poz 'Kullanıcı Pozu', ikinci poz ise 'Referans Pozu'dur.
+    Lütfen 'Kullanıcı Pozu'nu 'Referans Pozu' ile karşılaştırarak dans performansı için detaylı ve yapıcı geri bildirim ver.
+"""
+
+
+def legacy_angle_prompt(user_row, reference_row):
+    """Eski 8.38app.py prompt'u: iki pozun 8 açısı tam hassasiyetle, her satırda girintiyle."""
+    user_angles = angles_to_dict(user_row, FEEDBACK_ANGLES)
+    reference_angles = angles_to_dict(reference_row, FEEDBACK_ANGLES)
+
+    def block(title, angles):
+        lines = [f"    {PROMPT_JOINT_NAMES[name]}: {angles[name] if angles[name] is not None else 'verilemedi'} derece"
+                 for name in FEEDBACK_ANGLES.names]
+        return f"    {title}:\n" + "\n".join(lines)
+
+    return f"{LEGACY_INSTRUCTIONS}\n\n{block('Kullanıcı Pozu Açıları', user_angles)}\n\n" \
+           f"{block('Referans Pozu Açıları', reference_angles)}\n    "
+
+
+def legacy_raw_prompt(user_pose, reference_pose):
+    """Eski app.py prompt'u: ham landmark listeleri olduğu gibi metne dökülür."""
+    return f"{LEGACY_RAW_INSTRUCTIONS}\n    Kullanıcı Pozu (JSON):\n    {user_pose}\n\n" \
+           f"    Referans Pozu (JSON):\n    {reference_pose}\n    "
+
+
+def token_summary(tokens, baseline=None):
+    tokens = sorted(tokens)
+    summary = {
+        "prompts": len(tokens),
+        "tokens_mean": float(np.mean(tokens)),
+        "tokens_p50": percentile(tokens, 0.50),
+        "tokens_p95": percentile(tokens, 0.95),
+    }
+    if baseline is not None:
+        summary["reduction_pct"] = 100.0 * (1.0 - summary["tokens_mean"] / baseline["tokens_mean"])
+    return summary
+
+
+def run(repeat, reference_path):
+    with open(reference_path) as f:
+        reference_frames = json.load(f)
+    reference = DanceReference("reference", track_from_frames(reference_frames))
+
+    # Öğrenci pozları: kütüphanedeki tüm danslar; her kare referansın aynı sıradaki karesiyle karşılaştırılır
+    pairs = []
+    for path in sorted(glob.glob(os.path.join(REFERENCE_DATA_DIR, "*.json"))):
+        with open(path) as f:
+            frames = json.load(f)
+        dance = DanceReference(os.path.basename(path), track_from_frames(frames))
+        for i, frame in enumerate(frames):
+            j = i % len(reference_frames)
+            pairs.append((frame.get("landmarks"), reference_frames[j].get("landmarks"),
+                          dance.feedback_angles[i], reference.feedback_angles[j]))
+
+    results = {}
+    raw = [estimate_tokens(legacy_raw_prompt(user_pose, reference_pose)) for user_pose, reference_pose, _, _ in pairs]
+    results["tokens/legacy_raw_landmarks"] = token_summary(raw)
+    legacy = [estimate_tokens(legacy_angle_prompt(user_row, reference_row)) for _, _, user_row, reference_row in pairs]
+    results["tokens/legacy_all_angles"] = token_summary(legacy)
+    compact = [estimate_tokens(with_instructions(FEEDBACK_INSTRUCTIONS, pose_prompt(user_row, reference_row)))
+               for _, _, user_row, reference_row in pairs]
+    results["tokens/compact_single_call"] = token_summary(compact, results["tokens/legacy_all_angles"])
+    # Toplu çağrıda talimatlar bir kez gönderilir; öğrenci başına maliyet sadece öğrenciye özel kısımdır
+    student_only = [estimate_tokens(pose_prompt(user_row, reference_row)) for _, _, user_row, reference_row in pairs]
+    results["tokens/compact_student_part"] = token_summary(student_only, results["tokens/legacy_all_angles"])
+
+    # Prompt oluşturma süresi (istek başına)
+    _, _, user_row, reference_row = pairs[len(pairs) // 2]
+    results["build/legacy_all_angles"] = measure(lambda: legacy_angle_prompt(user_row, reference_row), repeat * 20)
+    results["build/compact"] = measure(lambda: pose_prompt(user_row, reference_row), repeat * 20)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geri bildirim prompt'larının tahmini token boyutlarını karşılaştırır.")
+    parser.add_argument("--repeat", type=int, default=50, help="Süre ölçümlerinin tekrar sayısı")
+    parser.add_argument("--reference", default=os.path.join(REFERENCE_DATA_DIR, "dance1.json"),
+                        help="Öğrenci pozlarının karşılaştırılacağı referans dans dosyası")
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/results/prompts-<commit>.json)")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.reference)
+    for name, result in results.items():
+        if "tokens_mean" in result:
+            reduction = f"  {result['reduction_pct']:5.1f}% daha az" if "reduction_pct" in result else ""
+            print(f"{name:40s} ortalama {result['tokens_mean']:8.1f} token  p95 {result['tokens_p95']:6d}{reduction}")
+    print_results({name: result for name, result in results.items() if "p50_ms" in result})
+    print(f"\nSonuçlar kaydedildi: {save_results('prompts', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
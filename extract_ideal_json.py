@@ -1,10 +1,13 @@
+import argparse
 import json
 import os
-import numpy as np
-import mediapipe as mp  # MediaPipe kütüphanesini içe aktar
 
-# MediaPipe poz çözümlerini başlat (mp_pose'u burada tanımlıyoruz)
-mp_pose = mp.solutions.pose
+import pose_angles
+from pose_angles import REFERENCE_ANGLES, compute_angles
+from pose_track import TRACK_EXTENSION, PoseTrack, load_track, save_track, track_from_frames
+from frame_stream import STREAM_EXTENSION, read_stream
+from segment_search import best_windows, frame_quality_scores
+from pose_filter import smooth_landmarks
 
 # JSON dosyalarının bulunduğu dizin
 # ÖNEMLİ: Kendi referans veri dizininizin yolunu buraya yazın
@@ -12,16 +15,20 @@ reference_data_directory = r"C:\Users\MS\dance-tracker\src\reference_data"
 
 # İdeal segmentlerin kaydedileceği çıktı dizini (aynı dizin olabilir)
 output_directory = r"C:\Users\MS\dance-tracker\src\reference_data"
-os.makedirs(output_directory, exist_ok=True)  # Dizin yoksa oluştur
 
-# İşlenecek JSON dosyalarının uzantısı
+# İşlenecek poz dosyalarının uzantıları (JSON, ikili .dtrk veya akış modunda yazılmış .ndjson)
 json_extension = '_pose_data.json'
+track_extension = '_pose_data' + TRACK_EXTENSION
+stream_extension = '_pose_data' + STREAM_EXTENSION
 
 # İdeal segment penceresi boyutu (kare sayısı)
 # 20-30 kare arası, video FPS'ine göre ayarlanmalıdır.
 # Örneğin 30 FPS bir video için 30 kare = 1 saniye.
 WINDOW_SIZE = 25  # Varsayılan olarak 25 kare (yaklaşık 0.8 saniye @ 30 FPS)
 
+# Her pencere boyutu için bulunacak (birbiriyle örtüşmeyen) en iyi segment sayısı
+TOP_K = 1
+
 # Açı değişimini hesaplarken dikkate alınacak ana eklemler
 # Tüm eklemler yerine daha az ve kritik eklemleri kullanmak gürültüyü azaltabilir.
 IMPORTANT_ANGLES = [
@@ -31,18 +38,19 @@ IMPORTANT_ANGLES = [
     "left_knee_angle", "right_knee_angle",
     # "left_neck_angle", "right_neck_angle" # İsteğe bağlı, boyun hareketleri için
 ]
+IMPORTANT_ANGLE_TABLE = REFERENCE_ANGLES.subset(IMPORTANT_ANGLES)
 
 # Önemli landmark ID'leri (MediaPipe PoseLandmark değerleri)
 # Bu ID'ler, IMPORTANT_ANGLES'ı oluşturan eklemlerin kendilerine karşılık gelir.
 # visibility değerlerini almak için kullanılır.
-IMPORTANT_LANDMARK_IDS = list(set([
-    mp_pose.PoseLandmark.LEFT_SHOULDER.value, mp_pose.PoseLandmark.RIGHT_SHOULDER.value,
-    mp_pose.PoseLandmark.LEFT_ELBOW.value, mp_pose.PoseLandmark.RIGHT_ELBOW.value,
-    mp_pose.PoseLandmark.LEFT_WRIST.value, mp_pose.PoseLandmark.RIGHT_WRIST.value,
-    mp_pose.PoseLandmark.LEFT_HIP.value, mp_pose.PoseLandmark.RIGHT_HIP.value,
-    mp_pose.PoseLandmark.LEFT_KNEE.value, mp_pose.PoseLandmark.RIGHT_KNEE.value,
-    mp_pose.PoseLandmark.LEFT_ANKLE.value, mp_pose.PoseLandmark.RIGHT_ANKLE.value,
-    mp_pose.PoseLandmark.NOSE.value, mp_pose.PoseLandmark.LEFT_EAR.value, mp_pose.PoseLandmark.RIGHT_EAR.value
+IMPORTANT_LANDMARK_IDS = sorted(set([
+    pose_angles.LEFT_SHOULDER, pose_angles.RIGHT_SHOULDER,
+    pose_angles.LEFT_ELBOW, pose_angles.RIGHT_ELBOW,
+    pose_angles.LEFT_WRIST, pose_angles.RIGHT_WRIST,
+    pose_angles.LEFT_HIP, pose_angles.RIGHT_HIP,
+    pose_angles.LEFT_KNEE, pose_angles.RIGHT_KNEE,
+    pose_angles.LEFT_ANKLE, pose_angles.RIGHT_ANKLE,
+    pose_angles.NOSE, pose_angles.LEFT_EAR, pose_angles.RIGHT_EAR
     # Boyun için
 ]))
 
@@ -53,106 +61,126 @@ IMPORTANT_LANDMARK_IDS = list(set([
 # Burada, her 1 birim görünürlük eksikliği için 50 derece açı değişimi kadar ceza veriyoruz.
 VISIBILITY_PENALTY_FACTOR = len(IMPORTANT_ANGLES) * 50  # Önemli açı sayısı * 50 (ayarlanabilir)
 
-print(f"Referans veri dizini: {reference_data_directory}")
-print(f"Çıktı dizini: {output_directory}")
-print(f"Pencere boyutu (kare): {WINDOW_SIZE}")
-print(f"Görünürlük ceza faktörü: {VISIBILITY_PENALTY_FACTOR}")
 
-# Dizindeki tüm JSON dosyalarını tara
-for filename in os.listdir(reference_data_directory):
-    if filename.endswith(json_extension):
-        json_path = os.path.join(reference_data_directory, filename)
-        video_name = filename.replace(json_extension, '')  # Video adını al
+def quality_inputs(track, smooth=False):
+    """
+    Kalite skorunun girdileri: önemli açılar ve önemli landmark'ların visibility değerleri.
+    smooth=True ise landmark'lar önce One-Euro filtresinden geçirilir (titreme açı farklarını şişirmez).
+    """
+    landmarks = smooth_landmarks(track.landmarks, track.timestamps_ms) if smooth else track.landmarks
+    return compute_angles(landmarks, IMPORTANT_ANGLE_TABLE), landmarks[:, IMPORTANT_LANDMARK_IDS, 3]
+
+
+def track_quality_scores(track, smooth=False):
+    """Bir izin tüm kareleri için kalite skorlarını tek seferde hesaplar (bkz. segment_search.py)."""
+    important_angles, visibility = quality_inputs(track, smooth)
+    return frame_quality_scores(important_angles, visibility, VISIBILITY_PENALTY_FACTOR)
+
+
+def segment_filename(video_name, window, rank, primary_window, extension):
+    """
+    İlk pencere boyutunun en iyi segmenti eski adla (<video>_ideal_segment) kaydedilir;
+    diğerlerinin adına pencere boyutu ve sırası eklenir.
+    """
+    if window == primary_window and rank == 1:
+        return f"{video_name}_ideal_segment{extension}"
+    return f"{video_name}_ideal_segment_w{window}_{rank}{extension}"
+
+
+def save_segment(output_dir, video_name, window, rank, primary_window, segment):
+    """
+    Segmenti kaydeder ve dosya adını döndürür: PoseTrack ise .dtrk, kare listesi ise JSON olarak.
+    """
+    if isinstance(segment, PoseTrack):
+        output_filename = segment_filename(video_name, window, rank, primary_window, TRACK_EXTENSION)
+        save_track(os.path.join(output_dir, output_filename), segment)
+    else:
+        output_filename = segment_filename(video_name, window, rank, primary_window, ".json")
+        with open(os.path.join(output_dir, output_filename), 'w') as f:
+            json.dump(segment, f, indent=4)
+    return output_filename
+
+
+def load_pose_file(path, extension):
+    """Poz dosyasını okur. JSON tabanlı dosyalarda orijinal kare listesi de döndürülür."""
+    if extension == track_extension:
+        return load_track(path), None  # Bellek eşlemeli okuma, kopya yapılmaz
+    if extension == stream_extension:
+        frame_data = read_stream(path)
+    else:
+        with open(path, 'r') as f:
+            frame_data = json.load(f)  # Tüm kare verilerini yükle
+    return track_from_frames(frame_data), frame_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poz dosyalarından en istikrarlı (ideal) segmentleri çıkarır.")
+    parser.add_argument("--input-dir", default=reference_data_directory, help="Poz dosyalarının bulunduğu dizin")
+    parser.add_argument("--output-dir", default=output_directory, help="Segmentlerin yazılacağı dizin")
+    parser.add_argument("--window-sizes", type=int, nargs="+", default=[WINDOW_SIZE],
+                        help="Pencere boyutları (kare). Hepsi tek geçişte aranır.")
+    parser.add_argument("--top-k", type=int, default=TOP_K,
+                        help="Her pencere boyutu için kaydedilecek örtüşmeyen segment sayısı")
+    parser.add_argument("--smooth", action="store_true",
+                        help="Skorlamadan önce landmark'ları yumuşat (kaydedilen segmentler değişmez)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)  # Dizin yoksa oluştur
+    primary_window = args.window_sizes[0]
+
+    print(f"Referans veri dizini: {args.input_dir}")
+    print(f"Çıktı dizini: {args.output_dir}")
+    print(f"Pencere boyutları (kare): {args.window_sizes}, pencere başına segment: {args.top_k}")
+    print(f"Görünürlük ceza faktörü: {VISIBILITY_PENALTY_FACTOR}")
+
+    # Dizindeki tüm poz dosyalarını (JSON, .dtrk ve .ndjson) tara
+    for filename in sorted(os.listdir(args.input_dir)):
+        extension = next((ext for ext in (json_extension, track_extension, stream_extension)
+                          if filename.endswith(ext)), None)
+        if extension is None:
+            continue
 
+        path = os.path.join(args.input_dir, filename)
+        video_name = filename.replace(extension, '')  # Video adını al
         print(f"\n--- '{filename}' dosyası işleniyor... ---")
 
         try:
-            with open(json_path, 'r') as f:
-                frame_data = json.load(f)  # Tüm kare verilerini yükle
-        except json.JSONDecodeError as e:
-            print(f"Hata: '{filename}' dosyası okunurken JSON hatası oluştu: {e}")
+            track, frame_data = load_pose_file(path, extension)
+        except ValueError as e:  # json.JSONDecodeError da bir ValueError'dır
+            print(f"Hata: '{filename}' dosyası okunurken hata oluştu: {e}")
             continue
         except FileNotFoundError:
             print(f"Hata: '{filename}' dosyası bulunamadı.")
             continue
 
-        if not frame_data:
-            print(f"Uyarı: '{filename}' dosyasında hiç kare verisi yok. Atlanıyor.")
-            continue
-        if len(frame_data) < WINDOW_SIZE:
-            print(
-                f"Uyarı: '{filename}' dosyasındaki kare sayısı ({len(frame_data)}) pencere boyutundan ({WINDOW_SIZE}) küçük. Atlanıyor.")
+        if len(track) == 0 or track.landmarks is None:
+            print(f"Uyarı: '{filename}' dosyasında hiç kare (landmark) verisi yok. Atlanıyor.")
             continue
 
-        # Her kare için kalite skorunu hesapla
-        # Kalite skoru = (açı değişiminin toplamı) + (düşük görünürlük cezası)
-        # Daha düşük skor = daha yüksek kalite / daha ideal segment
-        frame_quality_scores = []
-        for i in range(len(frame_data) - 1):
-            current_frame = frame_data[i]
-            next_frame = frame_data[i + 1]
-
-            current_frame_angles = current_frame['angles']
-            next_frame_angles = next_frame['angles']
-            current_frame_landmarks = current_frame['landmarks']
-
-            # Açı değişimini hesapla
-            frame_delta_sum = 0
-            for angle_name in IMPORTANT_ANGLES:
-                if angle_name in current_frame_angles and angle_name in next_frame_angles:
-                    delta = abs(current_frame_angles[angle_name] - next_frame_angles[angle_name])
-                    frame_delta_sum += delta
-
-            # Önemli landmark'ların ortalama görünürlüğünü hesapla
-            total_visibility = 0
-            visible_landmark_count = 0
-            for lm_data in current_frame_landmarks:
-                if lm_data['id'] in IMPORTANT_LANDMARK_IDS:
-                    total_visibility += lm_data['visibility']
-                    visible_landmark_count += 1
-
-            avg_visibility = total_visibility / visible_landmark_count if visible_landmark_count > 0 else 0
-
-            # Düşük görünürlük için ceza hesapla
-            # (1 - avg_visibility) değeri 0 (tam görünür) ile 1 (hiç görünmez) arasında değişir.
-            # Bu değeri PENALTY_FACTOR ile çarparak açı değişimine ekliyoruz.
-            visibility_penalty = (1 - avg_visibility) * VISIBILITY_PENALTY_FACTOR
-
-            # Kare kalitesi skoru: Açı değişimi + Görünürlük cezası
-            frame_quality_scores.append(frame_delta_sum + visibility_penalty)
-
-        # En istikrarlı ve kaliteli (en düşük toplam skora sahip) pencereyi bul
-        min_window_quality_score = float('inf')
-        best_start_frame_index = -1
-
-        # Pencereyi kaydırarak en iyi segmenti bul
-        # frame_quality_scores listesi frame_data'dan 1 kısa olduğu için döngü sınırına dikkat et
-        for i in range(len(frame_quality_scores) - WINDOW_SIZE + 1):
-            current_window_quality_sum = sum(frame_quality_scores[i: i + WINDOW_SIZE])
-
-            if current_window_quality_sum < min_window_quality_score:
-                min_window_quality_score = current_window_quality_sum
-                best_start_frame_index = i
-
-        if best_start_frame_index == -1:
-            print(f"Uyarı: '{filename}' için ideal segment bulunamadı. Atlanıyor.")
-            continue
+        # Kalite skorları bir kez hesaplanır, tüm pencere boyutları kümülatif toplamla aranır.
+        # Skor dizisi izden 1 kısa olduğu için en fazla len(track) - 1 boyutunda pencere aranabilir.
+        scores = track_quality_scores(track, args.smooth)
+        segments = best_windows(scores, args.window_sizes, args.top_k)
+
+        for window in args.window_sizes:
+            if not segments[window]:
+                print(f"Uyarı: '{filename}' kare sayısı ({len(track)}) {window} karelik pencere için yetersiz. Atlanıyor.")
+                continue
 
-        # İdeal segmenti çıkar
-        # best_start_frame_index, frame_quality_scores listesindeki başlangıç indeksidir,
-        # bu da aslında frame_data'daki başlangıç karesine karşılık gelir.
-        ideal_segment_frames = frame_data[best_start_frame_index: best_start_frame_index + WINDOW_SIZE]
+            for rank, (start, window_score) in enumerate(segments[window], start=1):
+                # start, skor dizisindeki başlangıç indeksidir; bu da izdeki başlangıç karesine karşılık gelir.
+                # Segment girdiyle aynı formatta kaydedilir (.dtrk girdisi için .dtrk, diğerleri için JSON).
+                if extension == track_extension:
+                    segment = track.slice(start, start + window)
+                else:
+                    segment = frame_data[start: start + window]
+                output_filename = save_segment(args.output_dir, video_name, window, rank, primary_window, segment)
 
-        # Çıktı JSON dosyasının adı
-        output_json_filename = f"{video_name}_ideal_segment.json"
-        output_path = os.path.join(output_directory, output_json_filename)
+                print(f"{window} kare, #{rank}: {output_filename} "
+                      f"(başlangıç karesi ~{start + 1}, toplam pencere kalite skoru: {window_score:.2f})")
 
-        # İdeal segmenti yeni bir JSON dosyasına kaydet
-        with open(output_path, 'w') as f:
-            json.dump(ideal_segment_frames, f, indent=4)
+    print("\nTüm poz dosyalarının işlenmesi tamamlandı!")
 
-        print(f"'{filename}' için ideal segment başarıyla kaydedildi: {output_json_filename}")
-        print(f"Başlangıç karesi (yaklaşık): {best_start_frame_index + 1}")  # +1 çünkü liste 0'dan başlar
-        print(f"Toplam pencere kalite skoru: {min_window_quality_score:.2f}")
 
-print("\nTüm JSON dosyalarının işlenmesi tamamlandı!")
+if __name__ == '__main__':
+    main()
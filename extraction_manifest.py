@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+
+# Çıktı dizininde tutulan manifest dosyasının adı
+MANIFEST_FILENAME = "extraction_manifest.json"
+
+# Hash hesaplarken okunacak blok boyutu (1 MB)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """Dosyanın içeriğinden SHA-256 özetini hesaplar (büyük videolar için parça parça okur)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionManifest:
+    """
+    Her videonun içerik hash'ini, çıkarım ayarlarını ve çıktı dosyasını saklar.
+    Video içeriği ve ayarlar değişmediyse ve çıktı dosyası hala duruyorsa video tekrar işlenmez.
+
+    Hash hesaplamasını da atlamak için dosya boyutu ve değiştirilme zamanı saklanır;
+    bunlar aynıysa önceki hash yeniden kullanılır.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f).get("videos", {})
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Uyarı: Manifest okunamadı, tüm videolar yeniden işlenecek: {e}")
+
+    def video_hash(self, video_path):
+        """Videonun hash'ini döndürür; dosya değişmediyse manifestteki hash'i kullanır."""
+        stat = os.stat(video_path)
+        entry = self.entries.get(os.path.basename(video_path))
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return entry["hash"]
+        return file_hash(video_path)
+
+    def is_up_to_date(self, video_path, content_hash, settings):
+        """Videonun geçerli (aynı içerik + aynı ayarlar + var olan çıktı) bir kaydı var mı?"""
+        entry = self.entries.get(os.path.basename(video_path))
+        return (entry is not None
+                and entry.get("hash") == content_hash
+                and entry.get("settings") == settings
+                and entry.get("output") is not None
+                and os.path.exists(entry["output"]))
+
+    def record(self, video_path, content_hash, settings, output_path, frames):
+        stat = os.stat(video_path)
+        self.entries[os.path.basename(video_path)] = {
+            "hash": content_hash,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "settings": settings,
+            "output": output_path,
+            "frames": frames,
+        }
+
+    def save(self):
+        """Manifesti önce geçici dosyaya yazar, sonra yerine taşır (yarım yazılmış manifest kalmaz)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"videos": self.entries}, f, indent=4)
+        os.replace(tmp_path, self.path)
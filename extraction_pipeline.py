@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+
+# Aşamalar arası kuyrukların kapasitesi. Dolu kuyruk üreticiyi bekletir (backpressure);
+# böylece hızlı çözümleme (decode) yavaş poz çıkarımının önüne geçip belleği doldurmaz.
+DEFAULT_QUEUE_SIZE = 8
+
+# Durdurma isteğini kontrol etme aralığı (saniye)
+_POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+class StageStats:
+    """
+    Bir aşamanın sayaçları: işlenen öğe, çalışma süresi, girdi beklerken geçen süre (starved)
+    ve çıktı kuyruğu dolu olduğu için beklenen süre (blocked).
+    Darboğaz aşama en az bekleyen, en yüksek çalışma süreli aşamadır.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    @property
+    def throughput(self):
+        """Aşamanın tek başına ulaşabileceği hız (öğe/sn), beklemeler hariç."""
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.name}: {self.items} öğe, {self.throughput:.1f} öğe/sn "
+                f"(çalışma {self.busy_seconds:.2f} sn, girdi bekleme {self.starved_seconds:.2f} sn, "
+                f"çıktı bekleme {self.blocked_seconds:.2f} sn)")
+
+
+def _put(out_queue, item, stop, stats):
+    start_time = time.perf_counter()
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=_POLL_INTERVAL)
+            break
+        except queue.Full:
+            continue
+    stats.blocked_seconds += time.perf_counter() - start_time
+
+
+def _get(in_queue, stop, stats):
+    start_time = time.perf_counter()
+    item = _END
+    while not stop.is_set():
+        try:
+            item = in_queue.get(timeout=_POLL_INTERVAL)
+            break
+        except queue.Empty:
+            continue
+    stats.starved_seconds += time.perf_counter() - start_time
+    return item
+
+
+def _run_source(source, out_queue, stop, stats):
+    try:
+        iterator = iter(source)
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                stats.busy_seconds += time.perf_counter() - start_time
+            stats.items += 1
+            _put(out_queue, item, stop, stats)
+        _put(out_queue, _END, stop, stats)
+    except BaseException as e:
+        _put(out_queue, _Failure(e), stop, stats)
+
+
+def _run_stage(function, in_queue, out_queue, stop, stats):
+    while not stop.is_set():
+        item = _get(in_queue, stop, stats)
+        if item is _END or isinstance(item, _Failure):
+            _put(out_queue, item, stop, stats)  # Bitiş/hata bilgisini sonraki aşamaya ilet
+            return
+        start_time = time.perf_counter()
+        try:
+            result = function(item)
+        except BaseException as e:
+            _put(out_queue, _Failure(e), stop, stats)
+            return
+        stats.busy_seconds += time.perf_counter() - start_time
+        stats.items += 1
+        _put(out_queue, result, stop, stats)
+
+
+def pipelined(source, stages, source_name="source", consumer_name="consumer", queue_size=DEFAULT_QUEUE_SIZE,
+              stats=None):
+    """
+    source'u kendi thread'inde tüketir, her öğeyi sırayla stages içindeki fonksiyonlardan geçirir
+    (her aşama kendi thread'inde) ve sonuçları girdi sırasıyla üretir.
+
+    source: öğe üreten iterable (ör. video karelerini çözümleyen bir generator). Kaynak nesnesi
+    (ör. cv2.VideoCapture) sadece kaynak thread'inde kullanılır.
+    stages: [(aşama adı, fonksiyon), ...]. Her aşama tek thread olduğu için sıra korunur ve durum tutan
+    işlemler (ör. takip yapan MediaPipe Pose) güvenle kullanılabilir.
+    source_name, consumer_name: kaynağın ve bu generator'ı tüketen döngünün (son aşama) sayaçlardaki adı.
+    stats: verilirse aşama adı -> StageStats sözlüğü doldurulur.
+
+    Aşamalardan birinde hata olursa tüketicide aynı hata fırlatılır. Tüketici erken durursa
+    (generator kapatılırsa) tüm thread'ler durdurulur.
+    """
+    stats = stats if stats is not None else {}
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    stats[source_name] = StageStats(source_name)
+    threads = [threading.Thread(target=_run_source, args=(source, queues[0], stop, stats[source_name]),
+                                name=f"pipeline-{source_name}", daemon=True)]
+    for i, (name, function) in enumerate(stages):
+        stats[name] = StageStats(name)
+        threads.append(threading.Thread(target=_run_stage, args=(function, queues[i], queues[i + 1], stop, stats[name]),
+                                        name=f"pipeline-{name}", daemon=True))
+    consumer_stats = stats[consumer_name] = StageStats(consumer_name)
+
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = _get(queues[-1], stop, consumer_stats)
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            start_time = time.perf_counter()
+            yield item
+            consumer_stats.busy_seconds += time.perf_counter() - start_time
+            consumer_stats.items += 1
+    finally:
+        stop.set()
+        # Bekleyen üreticilerin çıkabilmesi için kuyrukları boşalt
+        for q in queues:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+        for thread in threads:
+            thread.join()
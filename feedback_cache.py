@@ -0,0 +1,128 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Varsayılan ayarlar (8.38app.py ortam değişkenleriyle değiştirebilir)
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_BIN_DEGREES = 10.0
+
+
+def bucket_angles(values, bin_size):
+    """
+    Açı (veya açı farkı) değerlerini bin_size derecelik kovalara yuvarlar.
+    Aynı hatayı tekrarlayan öğrencilerin neredeyse aynı açıları aynı anahtarı üretir.
+    Hesaplanamayan (None/NaN) değerler 'x' olur.
+    """
+    buckets = []
+    for value in values:
+        if value is None or math.isnan(value):
+            buckets.append('x')
+        else:
+            buckets.append(str(int(math.floor(value / bin_size + 0.5))))
+    return ",".join(buckets)
+
+
+class FeedbackCache:
+    """
+    /evaluate_pose geri bildirimleri için LRU + TTL önbellek.
+
+    Anahtar: referans kare kimliği + (kullanıcı - referans) açı farklarının kovalanmış hali.
+    Bellek katmanı süreç içidir; disk katmanı (isteğe bağlı, SQLite) aynı dosyayı kullanan
+    tüm işçi süreçler arasında paylaşılır.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 bin_size=DEFAULT_BIN_DEGREES, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bin_size = bin_size
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()  # anahtar -> (son geçerlilik zamanı, metin)
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")  # Birden fazla süreç aynı anda okuyabilsin
+            self._db.execute("CREATE TABLE IF NOT EXISTS feedback (key TEXT PRIMARY KEY, text TEXT, expires REAL)")
+
+    def make_key(self, reference_id, angle_diffs):
+        """reference_id: referans karenin kimliği; angle_diffs: işaretli (kullanıcı - referans) açı farkları."""
+        return f"{reference_id}|{bucket_angles(angle_diffs, self.bin_size)}"
+
+    def get(self, key):
+        """Önbellekteki geri bildirimi döndürür; yoksa veya süresi dolduysa None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            text = self._disk_get(key)
+            if text is not None:
+                self.disk_hits += 1
+                self._store(key, text, now)
+                return text
+
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        now = time.monotonic()
+        with self._lock:
+            self._store(key, text, now)
+            if self._db is not None:
+                # Disk katmanında süreçler arası ortak saat olarak duvar saati kullanılır
+                self._db.execute("INSERT OR REPLACE INTO feedback (key, text, expires) VALUES (?, ?, ?)",
+                                 (key, text, time.time() + self.ttl_seconds))
+
+    def _store(self, key, text, now):
+        self._entries[key] = (now + self.ttl_seconds, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # En uzun süredir kullanılmayan kaydı at
+            self.evictions += 1
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT text, expires FROM feedback WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= time.time():
+            self._db.execute("DELETE FROM feedback WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+def cache_from_env():
+    """Ortam değişkenlerinden önbellek oluşturur. FEEDBACK_CACHE_DB verilirse disk katmanı açılır."""
+    return FeedbackCache(
+        max_entries=int(os.getenv("FEEDBACK_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES))),
+        ttl_seconds=float(os.getenv("FEEDBACK_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+        bin_size=float(os.getenv("FEEDBACK_CACHE_BIN_DEGREES", str(DEFAULT_BIN_DEGREES))),
+        disk_path=os.getenv("FEEDBACK_CACHE_DB") or None,
+    )
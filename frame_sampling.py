@@ -0,0 +1,73 @@
+import math
+
+import cv2
+import numpy as np
+
+
+def sampling_step(source_fps, target_fps):
+    """
+    Kaynak karelerden kaçta birinin işleneceği (1.0 = hepsi). Oran tam sayı olmak zorunda değildir (60 -> 25 FPS).
+    Hedef FPS verilmemişse, kaynak FPS bilinmiyorsa veya hedef kaynaktan büyükse tüm kareler işlenir.
+    """
+    if not target_fps or not source_fps or target_fps >= source_fps:
+        return 1.0
+    return source_fps / target_fps
+
+
+class FrameSampler:
+    """
+    Hangi karelerde poz çıkarımı yapılacağına karar verir. Karar sadece kare numarasına bağlıdır;
+    böylece yarıda kalan bir çıkarım kaldığı yerden devam ettiğinde aynı kareler seçilir.
+    """
+
+    def __init__(self, step, start_frame=0):
+        self.step = step
+        self._last_sample = math.floor((start_frame - 1) / step) if start_frame > 0 else -1
+
+    def keep(self, frame_count):
+        """frame_count: 1'den başlayan kare numarası. Kare yeni bir örnekleme aralığına düşüyorsa True."""
+        sample = math.floor((frame_count - 1) / self.step)
+        if sample == self._last_sample:
+            return False
+        self._last_sample = sample
+        return True
+
+
+def downscale(frame, max_size):
+    """
+    Karenin uzun kenarı max_size pikselden büyükse en-boy oranını koruyarak küçültür.
+    MediaPipe landmark'ları 0-1 arasında normalize olduğu için sonuçlar yeniden ölçeklenmez.
+    """
+    if not max_size:
+        return frame
+    height, width = frame.shape[:2]
+    scale = max_size / max(height, width)
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def interpolate_records(records, max_gap, previous=None):
+    """
+    Atlanan kareleri komşu işlenmiş karelerin landmark'larından doğrusal olarak doldurur.
+
+    records: kare numarasına göre sıralı (kare numarası, zaman damgası, (33, 4) landmark) kayıtları.
+    max_gap: en fazla bu kadar kare aralıklı komşular arası doldurulur (poz algılanamayan uzun boşluklar
+    uydurulmaz). previous: önceki parçanın son kaydı (akış modunda parçalar arası boşluk için); çıktıya eklenmez.
+    """
+    if previous is not None:
+        records = [previous] + list(records)
+    filled = []
+    for i, record in enumerate(records):
+        if i > 0:
+            prev_frame, prev_ts, prev_landmarks = records[i - 1]
+            gap = record[0] - prev_frame
+            if 1 < gap <= max_gap:
+                weights = np.arange(1, gap) / gap
+                timestamps = prev_ts + weights * (record[1] - prev_ts)
+                landmarks = prev_landmarks + weights[:, None, None] * (record[2] - prev_landmarks)
+                filled.extend((prev_frame + k, float(timestamps[k - 1]), landmarks[k - 1]) for k in range(1, gap))
+        if previous is None or i > 0:
+            filled.append(record)
+    return filled
@@ -0,0 +1,131 @@
+import json
+import os
+
+# Akış (streaming) çıktısı: her satırda bir kare olan NDJSON dosyası.
+# İlk satır, dosyanın hangi video/ayarlarla üretildiğini belirten başlıktır:
+#   {"stream_header": {...}}
+#   {"frame_number": 1, "timestamp_ms": 0.0, "angles": {...}, "landmarks": [...]}
+#   ...
+# Kareler üretildikçe yazılır ve diske aktarılır; yarıda kesilen bir çalışma geçerli bir
+# kısmi dosya bırakır ve sonraki çalışma son yazılan kareden devam edebilir.
+STREAM_EXTENSION = ".ndjson"
+
+
+class FrameStreamWriter:
+    """Kareleri NDJSON satırları olarak dosyaya ekler. Bellekte sadece o anki parça tutulur."""
+
+    def __init__(self, path, header, resume=False):
+        self.path = path
+        self.frames_written = 0
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if not resume:
+            self._file.write(json.dumps({"stream_header": header}) + "\n")
+            self._file.flush()
+
+    def write_frames(self, frames):
+        """Bir parça kareyi yazar ve diske aktarır (çökme durumunda en fazla bu parça kaybolur)."""
+        if not frames:
+            return
+        self._file.write("".join(json.dumps(frame) + "\n" for frame in frames))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.frames_written += len(frames)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def recover_stream(path, header):
+    """
+    Yarıda kalmış bir akış dosyasını devam etmeye hazırlar.
+
+    Dosya yoksa veya başlığı verilen başlıkla uyuşmuyorsa (farklı video/ayarlar) None döndürür;
+    bu durumda dosya baştan yazılmalıdır. Aksi halde yarım yazılmış son satırı keser ve
+    (son tam yazılmış karenin numarası, yazılmış kare sayısı) döndürür; hiç kare yoksa (0, 0).
+    """
+    if not os.path.exists(path):
+        return None
+    header = json.loads(json.dumps(header))  # Karşılaştırma için JSON'dan okunmuş hale getir
+
+    last_frame_number = 0
+    frame_count = 0
+    valid_length = 0
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+        try:
+            if not first_line.endswith(b"\n") or json.loads(first_line).get("stream_header") != header:
+                return None
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            return None
+        valid_length = len(first_line)
+
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Çökme sırasında yarım kalmış satır
+            try:
+                last_frame_number = json.loads(line)["frame_number"]
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                break
+            valid_length += len(line)
+            frame_count += 1
+
+    if valid_length < os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(valid_length)
+    return last_frame_number, frame_count
+
+
+def iter_stream(path):
+    """Akış dosyasındaki kareleri (başlık hariç) sırayla okur. Yarım son satır yok sayılır."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            record = json.loads(line)
+            if "stream_header" not in record:
+                yield record
+
+
+def read_last_frame(path, block_size=64 * 1024):
+    """
+    Akış dosyasının son tam yazılmış karesini döndürür; hiç kare yoksa None. Dosya sondan geriye doğru
+    block_size baytlık bloklarla okunur, uzun dosyalarda tamamı okunmaz. Yarım son satır yok sayılır.
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + data
+            lines = data.split(b"\n")
+            # Son eleman yeni satırla bitmemiş kısımdır; dosyanın başına gelinmediyse ilk eleman da yarımdır
+            for line in reversed(lines[:-1] if position == 0 else lines[1:-1]):
+                if line.strip():
+                    record = json.loads(line)
+                    return None if "stream_header" in record else record
+    return None
+
+
+def iter_stream_chunks(path, chunk_size):
+    """Akış dosyasındaki kareleri en fazla chunk_size karelik listeler halinde okur; bellekte tek parça tutulur."""
+    chunk = []
+    for frame in iter_stream(path):
+        chunk.append(frame)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_stream(path):
+    """Akış dosyasındaki kareleri (başlık hariç) bir liste olarak okur. Yarım son satır yok sayılır."""
+    return list(iter_stream(path))
@@ -1,37 +1,30 @@
 import cv2
 import mediapipe as mp
 import numpy as np
+import argparse
+import contextlib
 import json
+import multiprocessing
+import multiprocessing.util
 import os
+import time
+
+from pose_angles import ANGLE_SET_VERSION, REFERENCE_ANGLES, compute_angles, landmarks_to_array
+from pose_track import PoseTrack, TRACK_EXTENSION, save_track, track_from_frames
+from frame_stream import STREAM_EXTENSION, FrameStreamWriter, iter_stream_chunks, read_last_frame, recover_stream
+from extraction_manifest import ExtractionManifest
+from frame_sampling import FrameSampler, downscale, interpolate_records, sampling_step
+from extraction_pipeline import DEFAULT_QUEUE_SIZE, pipelined
+from extract_ideal_json import VISIBILITY_PENALTY_FACTOR, quality_inputs, save_segment, track_quality_scores
+from segment_search import RunningSegmentSearch, best_windows
+from pose_filter import MISSING_POSE, PoseFilter, is_missing
 
 # MediaPipe çizim ve poz çözümlerini başlat
 mp_drawing = mp.solutions.drawing_utils
 mp_pose = mp.solutions.pose
 
-# Açı hesaplama fonksiyonu (2D düzlemde)
-# Bu fonksiyon MediaPipe'ın verdiği x,y koordinatlarını kullanır.
-# 3D açılar için daha karmaşık bir hesaplama gerekir.
-def calculateAngle(a, b, c):
-    a, b, c = np.array(a), np.array(b), np.array(c) # Noktaları NumPy dizilerine dönüştür
-
-    # Vektörleri oluştur
-    vec1 = b - a
-    vec2 = b - c
-
-    # Nokta çarpımı ve büyüklükleri kullanarak açıyı hesapla
-    # Güvenlik için sıfıra bölme hatasını önle
-    dot_product = np.dot(vec1, vec2)
-    magnitude1 = np.linalg.norm(vec1)
-    magnitude2 = np.linalg.norm(vec2)
-
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0.0 # Sıfır büyüklükte vektörler için açı tanımsız, 0 döndür
-
-    radians = np.arccos(dot_product / (magnitude1 * magnitude2))
-    angle = np.degrees(radians) # Radyanı dereceye çevir
-
-    # Açının 0-180 derece arasında olmasını sağla
-    return angle
+# Açılar pose_angles.py içindeki ortak motorla (2D düzlemde, vektörel) hesaplanır.
+# Her videonun tüm kareleri için açılar tek seferde hesaplanır.
 
 # Videoların bulunduğu ana dizin
 # ÖNEMLİ: Kendi video dizininizin yolunu buraya yazın
@@ -40,140 +33,459 @@ video_directory = r"C:\Users\MS\Desktop\videos"
 # JSON dosyalarının kaydedileceği çıktı dizini
 # Bu dizin yoksa otomatik olarak oluşturulacaktır.
 output_directory = r"C:\Users\MS\dance-tracker\src\reference_data"
-os.makedirs(output_directory, exist_ok=True) # Dizin yoksa oluştur
 
 # Desteklenen video uzantıları
 video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.flv')
 
-# Video dizinindeki tüm dosyaları listele
-for filename in os.listdir(video_directory):
-    # Dosyanın bir video olup olmadığını kontrol et
-    if filename.lower().endswith(video_extensions):
-        video_path = os.path.join(video_directory, filename)
-        print(f"\n--- Video işleniyor: {filename} ---")
-
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print(f"Hata: Video açılamadı! Yol: {video_path}")
-            continue # Sonraki videoya geç
-
-        frame_data = [] # Her video için yeni bir liste başlat
-
-        # MediaPipe Pose modelini başlat
-        with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-            frame_count = 0
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break # Kare okunamadıysa (video bittiyse) döngüden çık
-
-                frame_count += 1
-                # Görüntüyü BGR'den RGB'ye dönüştür (MediaPipe RGB bekler)
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False # Görüntüyü salt okunur yap (performans için)
-                results = pose.process(image) # Poz algılama işlemini yap
-                image.flags.writeable = True # Görüntüyü tekrar yazılabilir yap
-
-                try:
-                    # Algılanan poz landmark'larını al
-                    landmarks = results.pose_landmarks.landmark
-
-                    # --- Belirli eklem noktalarının koordinatlarını çıkar ---
-                    # MediaPipe'ın landmark indekslerini kullanarak koordinatları alıyoruz.
-                    # x, y, z değerleri 0 ile 1 arasında normalize edilmiş değerlerdir.
-                    # visibility değeri, landmark'ın ne kadar güvenilir bir şekilde algılandığını gösterir.
-
-                    # Sol taraf koordinatları
-                    left_shoulder = [landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                                     landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-                    left_elbow = [landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                                  landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-                    left_wrist = [landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                                  landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-                    left_hip = [landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                                landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-                    left_knee = [landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                                 landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y]
-                    left_ankle = [landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                                  landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y]
-                    left_ear = [landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].x,
-                                landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].y]
-                    left_mouth = [landmarks[mp_pose.PoseLandmark.MOUTH_LEFT.value].x,
-                                  landmarks[mp_pose.PoseLandmark.MOUTH_LEFT.value].y]
-                    left_nose = [landmarks[mp_pose.PoseLandmark.NOSE.value].x,
-                                 landmarks[mp_pose.PoseLandmark.NOSE.value].y]
-
-
-                    # Sağ taraf koordinatları
-                    right_shoulder = [landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                                      landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-                    right_elbow = [landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                                   landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-                    right_wrist = [landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                                   landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-                    right_hip = [landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                                   landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y]
-                    right_knee = [landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].x,
-                                  landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y]
-                    right_ankle = [landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                                   landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y]
-                    right_ear = [landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].x,
-                                 landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].y]
-                    right_mouth = [landmarks[mp_pose.PoseLandmark.MOUTH_RIGHT.value].x,
-                                   landmarks[mp_pose.PoseLandmark.MOUTH_RIGHT.value].y]
-                    right_nose = [landmarks[mp_pose.PoseLandmark.NOSE.value].x,
-                                  landmarks[mp_pose.PoseLandmark.NOSE.value].y]
-
-                    # --- Hesaplanan Açılar ---
-                    angles = {
-                        "left_elbow_angle": calculateAngle(left_shoulder, left_elbow, left_wrist),
-                        "left_shoulder_angle": calculateAngle(left_elbow, left_shoulder, left_hip),
-                        "left_hip_angle": calculateAngle(left_shoulder, left_hip, left_knee),
-                        "left_knee_angle": calculateAngle(left_hip, left_knee, left_ankle),
-                        "left_neck_angle": calculateAngle(left_shoulder, left_nose, left_ear),
-
-                        "right_elbow_angle": calculateAngle(right_shoulder, right_elbow, right_wrist),
-                        "right_shoulder_angle": calculateAngle(right_elbow, right_shoulder, right_hip),
-                        "right_hip_angle": calculateAngle(right_shoulder, right_hip, right_knee),
-                        "right_knee_angle": calculateAngle(right_hip, right_knee, right_ankle),
-                        "right_neck_angle": calculateAngle(right_shoulder, right_nose, right_ear)
-                    }
-
-                    # --- Tüm Landmark Koordinatlarını Kaydet ---
-                    # Her landmark için x, y, z ve visibility değerlerini içeren bir liste oluştur
-                    landmark_list = []
-                    for lm_id, lm in enumerate(landmarks):
-                        landmark_list.append({
-                            'id': lm_id,
-                            'x': lm.x,
-                            'y': lm.y,
-                            'z': lm.z,
-                            'visibility': lm.visibility
-                        })
-
-                    # Her kare için hem açıları hem de landmarkları kaydet
-                    frame_data.append({
-                        "frame_number": frame_count, # cap.get(cv2.CAP_PROP_POS_FRAMES) yerine frame_count kullanıldı
-                        "timestamp_ms": cap.get(cv2.CAP_PROP_POS_MSEC),
-                        "angles": angles,
-                        "landmarks": landmark_list
-                    })
-
-                except Exception as e:
-                    # Poz algılanamazsa veya bir hata oluşursa devam et
-                    print(f"Kare {frame_count} işlenirken hata oluştu veya poz algılanamadı: {e}")
-                    continue
-
-        cap.release() # Mevcut videoyu serbest bırak
-
-        # JSON dosyasının adı (video adından türetilir)
-        json_filename = os.path.splitext(filename)[0] + "_pose_data.json"
-        output_path = os.path.join(output_directory, json_filename)
-
-        # Toplanan verileri JSON dosyasına yaz
+# Çıktı formatları:
+#   "json"   - eski, okunabilir format (tüm video bellekte toplanıp sonda yazılır)
+#   "binary" - .dtrk sütun formatı (pose_track.py)
+#   "ndjson" - akış modu: kareler üretildikçe yazılır, yarıda kalırsa kaldığı yerden devam eder
+OUTPUT_EXTENSIONS = {"json": ".json", "binary": TRACK_EXTENSION, "ndjson": STREAM_EXTENSION}
+OUTPUT_FORMATS = tuple(OUTPUT_EXTENSIONS)
+
+# Akış modunda diske yazılmadan önce bellekte tutulan en fazla kare sayısı
+STREAM_CHUNK_SIZE = 256
+
+# MediaPipe Pose model ayarları
+MIN_DETECTION_CONFIDENCE = 0.5
+MIN_TRACKING_CONFIDENCE = 0.5
+
+# Hızlı çıkarım ayarları (None/False = kapalı, her kare tam çözünürlükte işlenir):
+#   TARGET_FPS          - sadece bu hızda kare işlenir; aradaki kareler çözümlenmeden (grab) atlanır
+#   MAX_INFERENCE_SIZE  - poz çıkarımından önce karenin uzun kenarı bu piksele küçültülür
+#   INTERPOLATE_SKIPPED - atlanan kareler komşu karelerden doğrusal olarak doldurulur
+#   SMOOTH_LANDMARKS    - landmark'lar One-Euro filtresinden geçirilir (bkz. pose_filter.py); titreme azalır,
+#                         kısa süre poz algılanamayan kareler atlanmak yerine tahminle doldurulur
+TARGET_FPS = None
+MAX_INFERENCE_SIZE = None
+INTERPOLATE_SKIPPED = False
+SMOOTH_LANDMARKS = False
+
+# Kare çözümleme, poz çıkarımı ve açı/yazma aşamaları ayrı thread'lerde, sınırlı kuyruklarla çalışır.
+# Böylece çözümleme (G/Ç) ile poz çıkarımı (CPU) üst üste biner. False: hepsi tek thread'de sırayla.
+USE_PIPELINE = True
+PIPELINE_QUEUE_SIZE = DEFAULT_QUEUE_SIZE
+
+# Verilirse (ör. [25]) her videonun ideal segmentleri çıkarım sırasında, iz ile birlikte yazılır;
+# extract_ideal_json.py ile ikinci bir okuma geçişi gerekmez. None: sadece iz yazılır.
+IDEAL_SEGMENT_WINDOWS = None
+
+
+def sampling_options(target_fps=TARGET_FPS, max_inference_size=MAX_INFERENCE_SIZE, interpolate=INTERPOLATE_SKIPPED,
+                     smooth=SMOOTH_LANDMARKS):
+    return {"target_fps": target_fps, "max_inference_size": max_inference_size, "interpolate": interpolate,
+            "smooth": smooth}
+
+
+def extraction_settings(output_format, sampling=None, segment_windows=None):
+    """Çıktıyı etkileyen ayarlar. Bunlardan biri değişirse önbellekteki çıktılar geçersiz olur."""
+    settings = {
+        "format": output_format,
+        "min_detection_confidence": MIN_DETECTION_CONFIDENCE,
+        "min_tracking_confidence": MIN_TRACKING_CONFIDENCE,
+        "angle_set_version": ANGLE_SET_VERSION,
+        **(sampling or sampling_options()),
+    }
+    if segment_windows:
+        # Segmentsiz çıkarılmış eski çıktılar, segment istendiğinde güncel sayılmaz
+        settings["ideal_segment_windows"] = list(segment_windows)
+    return settings
+
+
+def create_pose():
+    """Ayarlarla yeni bir MediaPipe Pose örneği oluşturur."""
+    return mp_pose.Pose(min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+                        min_tracking_confidence=MIN_TRACKING_CONFIDENCE)
+
+
+def list_videos(directory):
+    """Dizindeki video dosyalarının tam yollarını (isim sırasıyla) döndürür."""
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if filename.lower().endswith(video_extensions)]
+
+
+def iter_decoded_frames(cap, start_frame=0, target_fps=None, max_size=None):
+    """
+    Videonun örneklenen karelerini çözümler ve her biri için (kare numarası, zaman damgası, RGB görüntü) verir.
+    start_frame > 0 ise ilk start_frame kare çözümlenmeden (grab) atlanır.
+    target_fps verilirse sadece o hızda kare çözümlenir (diğerleri grab ile atlanır ve hiç verilmez);
+    max_size verilirse kare renk dönüşümünden önce küçültülür.
+    """
+    sampler = FrameSampler(sampling_step(cap.get(cv2.CAP_PROP_FPS), target_fps), start_frame)
+    frame_count = 0
+    while frame_count < start_frame and cap.grab():
+        frame_count += 1
+
+    while cap.isOpened():
+        if not sampler.keep(frame_count + 1):
+            # Bu kare örneklenmiyor: sadece ilerle, renk dönüşümü ve poz çıkarımı yapma
+            if not cap.grab():
+                break
+            frame_count += 1
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            break # Kare okunamadıysa (video bittiyse) döngüden çık
+
+        frame_count += 1
+        # Görüntüyü (gerekirse küçültüp) BGR'den RGB'ye dönüştür (MediaPipe RGB bekler)
+        image = cv2.cvtColor(downscale(frame, max_size), cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False # Görüntüyü salt okunur yap (performans için)
+
+        # cap.get(cv2.CAP_PROP_POS_FRAMES) yerine frame_count kullanıldı
+        yield frame_count, cap.get(cv2.CAP_PROP_POS_MSEC), image
+
+
+def detect_pose(pose, image):
+    """Poz algılama işlemini yapar; MediaPipe landmark listesini veya poz yoksa None döndürür."""
+    results = pose.process(image)
+    return None if results.pose_landmarks is None else results.pose_landmarks.landmark
+
+
+def iter_video_poses(cap, pose, start_frame=0, target_fps=None, max_size=None, pipeline=False, stats=None,
+                     pose_filter=None):
+    """
+    Videonun karelerini sırayla işler ve her kare için (kare numarası, zaman damgası, landmark dizisi) verir.
+    Poz algılanamayan karelerde landmark dizisi None olur. Örnekleme ayarları için bkz. iter_decoded_frames.
+    pose_filter (PoseFilter) verilirse landmark'lar yumuşatılır; kısa boşluklar filtrenin tahminiyle doldurulur.
+
+    pipeline=True ise çözümleme ve poz çıkarımı ayrı thread'lerde çalışır (bkz. extraction_pipeline.py);
+    çıktı sırası aynıdır. stats verilirse aşama sayaçları (decode, inference, serialize) buraya yazılır.
+    """
+    frames = iter_decoded_frames(cap, start_frame, target_fps, max_size)
+    if pipeline:
+        detections = pipelined(frames, [("inference", lambda item: (item[0], item[1], detect_pose(pose, item[2])))],
+                               source_name="decode", consumer_name="serialize", queue_size=PIPELINE_QUEUE_SIZE,
+                               stats=stats)
+    else:
+        detections = ((frame_count, timestamp_ms, detect_pose(pose, image))
+                      for frame_count, timestamp_ms, image in frames)
+
+    with contextlib.closing(detections):
+        for frame_count, timestamp_ms, landmarks in detections:
+            # x, y, z değerleri 0 ile 1 arasında normalize edilmiş değerlerdir.
+            # visibility değeri, landmark'ın ne kadar güvenilir bir şekilde algılandığını gösterir.
+            landmarks = None if landmarks is None else landmarks_to_array(landmarks)
+            if pose_filter is not None:
+                landmarks = pose_filter.filter(MISSING_POSE if landmarks is None else landmarks, timestamp_ms)
+                if is_missing(landmarks):
+                    landmarks = None
+            yield frame_count, timestamp_ms, landmarks
+
+
+def create_filter(sampling):
+    """Yumuşatma açıksa video başına yeni bir PoseFilter, değilse None."""
+    return PoseFilter() if sampling.get("smooth") else None
+
+
+def records_to_track(records):
+    """(kare numarası, zaman damgası, landmark dizisi) kayıtlarından açıları tek seferde hesaplayıp iz oluşturur."""
+    landmarks = np.array([record[2] for record in records]).reshape(-1, 33, 4)
+    angles = compute_angles(landmarks, REFERENCE_ANGLES)
+    return PoseTrack(landmarks, angles, REFERENCE_ANGLES.names,
+                     np.array([record[0] for record in records], dtype=np.int32),
+                     np.array([record[1] for record in records], dtype=np.float64))
+
+
+def open_video(video_path, pose):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    # Önceki videodan kalan takip (tracking) durumunu temizle.
+    # Böylece aynı Pose örneği birden fazla videoda kullanılsa da sonuç, her video için
+    # yeni bir örnek oluşturmakla aynı olur.
+    pose.reset()
+    return cap
+
+
+def interpolation_gap(cap, sampling):
+    """Atlanan karelerin doldurulacağı en büyük kare aralığı; doldurma kapalıysa 0."""
+    step = sampling_step(cap.get(cv2.CAP_PROP_FPS), sampling["target_fps"])
+    return int(np.ceil(step)) if sampling["interpolate"] and step > 1 else 0
+
+
+def extract_video(video_path, pose, sampling=None, pipeline=USE_PIPELINE, stats=None):
+    """
+    Bir videonun her karesi (veya sampling ayarına göre örneklenen kareleri) için landmark ve açı verilerini çıkarır.
+    Video açılamazsa None, aksi halde (PoseTrack, poz algılanamayan kare sayısı) döndürür.
+    pipeline/stats: bkz. iter_video_poses.
+    """
+    sampling = sampling or sampling_options()
+    cap = open_video(video_path, pose)
+    if cap is None:
+        return None
+
+    detected = []
+    missed_frames = 0
+    for record in iter_video_poses(cap, pose, 0, sampling["target_fps"], sampling["max_inference_size"],
+                                   pipeline, stats, create_filter(sampling)):
+        if record[2] is None:
+            missed_frames += 1 # Poz algılanamazsa bu kareyi atla
+        else:
+            detected.append(record)
+    max_gap = interpolation_gap(cap, sampling)
+    cap.release() # Mevcut videoyu serbest bırak
+
+    if max_gap:
+        detected = interpolate_records(detected, max_gap)
+    return records_to_track(detected), missed_frames
+
+
+def stream_video(video_path, output_path, pose, header, sampling=None, pipeline=USE_PIPELINE, stats=None,
+                 segment_search=None):
+    """
+    Kareleri üretildikçe NDJSON dosyasına yazar; bellekte en fazla STREAM_CHUNK_SIZE kare tutulur.
+    Aynı video ve ayarlarla yarıda kalmış bir dosya varsa son yazılan kareden devam eder.
+    segment_search (RunningSegmentSearch) verilirse yazılan her parça ideal segment aramasına da eklenir.
+    Video açılamazsa None, aksi halde (toplam kare sayısı, poz algılanamayan kare sayısı) döndürür.
+    """
+    sampling = sampling or sampling_options()
+    cap = open_video(video_path, pose)
+    if cap is None:
+        return None
+
+    recovered = recover_stream(output_path, header)
+    start_frame, previous_frames = recovered if recovered is not None else (0, 0)
+    previous = None  # Parçalar arası boşluğu doldurmak için önceki parçanın (veya çalışmanın) son karesi
+    if start_frame > 0:
+        print(f"{os.path.basename(video_path)}: {start_frame}. kareden devam ediliyor.")
+        if segment_search is not None and previous_frames > 0:
+            # Önceki çalışmada yazılmış kareler aramaya parça parça eklenir (bellekte en fazla STREAM_CHUNK_SIZE kare)
+            for written in iter_stream_chunks(output_path, STREAM_CHUNK_SIZE):
+                segment_search.update(*quality_inputs(track_from_frames(written)), written)
+        # Devam noktasındaki boşluk da kesintisiz çalışmadaki gibi son yazılan kareden doldurulur
+        last_frame = read_last_frame(output_path)
+        if last_frame is not None and last_frame.get("landmarks"):
+            previous = (last_frame["frame_number"], last_frame["timestamp_ms"],
+                        landmarks_to_array(last_frame["landmarks"]))
+
+    max_gap = interpolation_gap(cap, sampling)
+
+    def flush(chunk):
+        if max_gap and chunk:
+            chunk = interpolate_records(chunk, max_gap, previous)
+        chunk_track = records_to_track(chunk)
+        frames = chunk_track.to_frames()
+        writer.write_frames(frames)
+        if segment_search is not None and frames:
+            segment_search.update(*quality_inputs(chunk_track), frames)
+
+    missed_frames = 0
+    with FrameStreamWriter(output_path, header, resume=recovered is not None) as writer:
+        chunk = []
+        for record in iter_video_poses(cap, pose, start_frame, sampling["target_fps"], sampling["max_inference_size"],
+                                       pipeline, stats, create_filter(sampling)):
+            if record[2] is None:
+                missed_frames += 1
+                continue
+            chunk.append(record)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                flush(chunk)
+                previous = chunk[-1]
+                chunk = []
+        flush(chunk)
+    cap.release()
+
+    return previous_frames + writer.frames_written, missed_frames
+
+
+def write_track(track, output_path, output_format):
+    """İzi istenen formatta yazar."""
+    if output_format == "binary":
+        save_track(output_path, track)
+    else:
         with open(output_path, 'w') as f:
-            json.dump(frame_data, f, indent=4) # Okunabilir olması için indent kullan
+            json.dump(track.to_frames(), f, indent=4) # Okunabilir olması için indent kullan
+
+
+def save_ideal_segments(output_dir, video_name, segments, segment_at):
+    """
+    Her pencere boyutunun en iyi segmentini extract_ideal_json.py ile aynı adlarla kaydeder.
+    segments: best_windows biçiminde sonuçlar; segment_at(pencere, başlangıç) kaydedilecek segmenti döndürür.
+    Yazılan dosya adlarını döndürür.
+    """
+    primary_window = next(iter(segments), None)
+    filenames = []
+    for window, found in segments.items():
+        for rank, (start, _) in enumerate(found, start=1):
+            filenames.append(save_segment(output_dir, video_name, window, rank, primary_window,
+                                          segment_at(window, start)))
+    return filenames
+
+
+def process_video(video_path, output_dir, pose, output_format="json", stream_header=None, sampling=None,
+                  pipeline=USE_PIPELINE, segment_windows=None):
+    """
+    Tek bir videoyu işler ve <video_adı>_pose_data.json (.dtrk / .ndjson) dosyasını yazar.
+    stream_header, akış modunda yarım kalmış dosyanın aynı video/ayarlara ait olduğunu doğrulamak için kullanılır.
+    sampling: hızlı çıkarım ayarları (bkz. sampling_options). pipeline: aşamaları ayrı thread'lerde çalıştır.
+    segment_windows verilirse bu pencere boyutlarının ideal segmentleri de aynı geçişte yazılır
+    (.dtrk çıktısı için .dtrk, diğerleri için JSON).
+    İlerleme raporu için bir sonuç sözlüğü döndürür; "stages" aşama sayaçlarının özetleridir (darboğaz tespiti için).
+    """
+    start_time = time.perf_counter()
+    filename = os.path.basename(video_path)
+    video_name = os.path.splitext(filename)[0]
+    result = {"video": filename, "output": None, "frames": 0, "missed_frames": 0, "stages": [], "segments": []}
+    stats = {}
+
+    # Çıktı dosyasının adı (video adından türetilir)
+    output_path = os.path.join(output_dir, video_name + "_pose_data" + OUTPUT_EXTENSIONS[output_format])
+
+    if output_format == "ndjson":
+        search = RunningSegmentSearch(segment_windows, VISIBILITY_PENALTY_FACTOR) if segment_windows else None
+        streamed = stream_video(video_path, output_path, pose, stream_header or {"video": filename}, sampling,
+                                pipeline, stats, search)
+        if streamed is not None:
+            result["frames"], result["missed_frames"] = streamed
+            result["output"] = output_path
+            if search is not None:
+                result["segments"] = save_ideal_segments(output_dir, video_name, search.result(),
+                                                         lambda window, start: search.segment(window))
+    else:
+        extracted = extract_video(video_path, pose, sampling, pipeline, stats)
+        if extracted is not None:
+            track, result["missed_frames"] = extracted
+            result["frames"] = len(track)
+
+            # Toplanan verileri dosyaya yaz
+            write_track(track, output_path, output_format)
+            result["output"] = output_path
+
+            if segment_windows:
+                # Skorlar bellekteki izden hesaplanır; yazılan dosya tekrar okunmaz
+                def segment_at(window, start):
+                    segment = track.slice(start, start + window)
+                    return segment if output_format == "binary" else segment.to_frames()
+
+                segments = best_windows(track_quality_scores(track), segment_windows)
+                result["segments"] = save_ideal_segments(output_dir, video_name, segments, segment_at)
+
+    result["seconds"] = time.perf_counter() - start_time
+    result["stages"] = [stage.summary() for stage in stats.values()]
+    return result
+
+
+# --- Paralel çalışma (her işçi sürecin kendi Pose örneği olur) ---
+_worker_pose = None
+
+
+def _init_worker():
+    global _worker_pose
+    _worker_pose = create_pose()
+    # İşçi süreç kapanırken Pose (ve MediaPipe grafiği) kapatılır. Havuz işçileri os._exit ile çıktığı için
+    # atexit çalışmaz; multiprocessing'in sonlandırıcıları ise işçi normal şekilde bittiğinde çalıştırılır.
+    multiprocessing.util.Finalize(None, _worker_pose.close, exitpriority=10)
+
+
+def _process_video_in_worker(task):
+    video_path, output_dir, output_format, stream_header, sampling, pipeline, segment_windows = task
+    return process_video(video_path, output_dir, _worker_pose, output_format, stream_header, sampling, pipeline,
+                         segment_windows)
+
+
+def run_serial(tasks):
+    """
+    Videoları tek süreçte sırayla işler.
+    tasks: (video, çıktı dizini, format, akış başlığı, örnekleme ayarları, pipeline, segment pencereleri) demetleri.
+    """
+    with create_pose() as pose:
+        for video_path, output_dir, output_format, stream_header, sampling, pipeline, segment_windows in tasks:
+            yield process_video(video_path, output_dir, pose, output_format, stream_header, sampling, pipeline,
+                                segment_windows)
+
+
+def run_parallel(tasks, workers):
+    """Videoları bir süreç havuzunda paralel işler. Sonuçlar bittikçe döndürülür."""
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_process_video_in_worker, tasks)
+        # terminate() yerine normal kapanış: işçiler Pose örneklerini kapatarak çıkar
+        pool.close()
+        pool.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Videolardan poz ve açı verilerini çıkarır.")
+    parser.add_argument("--video-dir", default=video_directory, help="Videoların bulunduğu dizin")
+    parser.add_argument("--output-dir", default=output_directory, help="Poz dosyalarının yazılacağı dizin")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Paralel işçi süreç sayısı (1 = seri, 0 = tüm çekirdekler)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                        help="Çıktı formatı: json, binary (.dtrk) veya ndjson (akış modu, devam edilebilir)")
+    parser.add_argument("--force", action="store_true",
+                        help="Önbelleği yok say ve tüm videoları yeniden işle")
+    parser.add_argument("--target-fps", type=float, default=TARGET_FPS,
+                        help="Sadece bu hızda kare işle (ör. 30; 60 FPS videolarda kareler yarı yarıya atlanır)")
+    parser.add_argument("--max-inference-size", type=int, default=MAX_INFERENCE_SIZE,
+                        help="Poz çıkarımından önce karenin uzun kenarını bu piksele küçült (ör. 640)")
+    parser.add_argument("--interpolate", action="store_true", default=INTERPOLATE_SKIPPED,
+                        help="Atlanan kareleri komşu karelerden doğrusal olarak doldur")
+    parser.add_argument("--smooth", action="store_true", default=SMOOTH_LANDMARKS,
+                        help="Landmark'ları One-Euro filtresiyle yumuşat ve kısa poz kayıplarını doldur")
+    parser.add_argument("--no-pipeline", dest="pipeline", action="store_false", default=USE_PIPELINE,
+                        help="Çözümleme, poz çıkarımı ve yazma aşamalarını tek thread'de sırayla çalıştır")
+    parser.add_argument("--ideal-segments", type=int, nargs="+", default=IDEAL_SEGMENT_WINDOWS, metavar="WINDOW",
+                        help="Bu pencere boyutları (kare) için ideal segmenti de aynı geçişte yaz (ör. 25); "
+                             "extract_ideal_json.py ile ikinci geçiş gerekmez")
+    parser.add_argument("--stage-stats", action="store_true",
+                        help="Her video için aşama sayaçlarını (hız, bekleme süreleri) yazdır")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True) # Dizin yoksa oluştur
+
+    # İçeriği ve ayarları değişmemiş, çıktısı hala duran videoları atla
+    manifest = ExtractionManifest(args.output_dir)
+    sampling = sampling_options(args.target_fps, args.max_inference_size, args.interpolate, args.smooth)
+    settings = extraction_settings(args.format, sampling, args.ideal_segments)
+    video_hashes = {}
+    tasks = []
+    skipped = 0
+    for video_path in list_videos(args.video_dir):
+        content_hash = manifest.video_hash(video_path)
+        if not args.force and manifest.is_up_to_date(video_path, content_hash, settings):
+            skipped += 1
+            continue
+        video_hashes[os.path.basename(video_path)] = (video_path, content_hash)
+        stream_header = {"video": os.path.basename(video_path), "hash": content_hash, "settings": settings}
+        tasks.append((video_path, args.output_dir, args.format, stream_header, sampling, args.pipeline,
+                      args.ideal_segments))
+
+    workers = args.workers or os.cpu_count() or 1
+    workers = min(workers, max(len(tasks), 1))
+
+    print(f"{len(tasks)} video işlenecek ({skipped} video önbellekte güncel), {workers} işçi kullanılacak.")
+    start_time = time.perf_counter()
+
+    if workers > 1:
+        results = run_parallel(tasks, workers)
+    else:
+        results = run_serial(tasks)
+
+    total_frames = 0
+    for done, result in enumerate(results, start=1):
+        prefix = f"[{done}/{len(tasks)}] {result['video']}"
+        if result["output"] is None:
+            print(f"{prefix}: Hata: Video açılamadı!")
+            continue
+        total_frames += result["frames"]
+        video_path, content_hash = video_hashes[result["video"]]
+        manifest.record(video_path, content_hash, settings, result["output"], result["frames"])
+        manifest.save() # Yarıda kesilirse tamamlanan videolar kaybolmasın
+        fps = result["frames"] / result["seconds"] if result["seconds"] > 0 else 0.0
+        print(f"{prefix}: {result['frames']} kare ({result['missed_frames']} karede poz algılanamadı), "
+              f"{result['seconds']:.1f} sn ({fps:.1f} kare/sn) -> {result['output']}")
+        for segment_file in result["segments"]:
+            print(f"    ideal segment -> {segment_file}")
+        if args.stage_stats:
+            for summary in result["stages"]:
+                print(f"    {summary}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nTüm videoların işlenmesi tamamlandı! {total_frames} kare, {elapsed:.1f} sn")
 
-        print(f"Poz verileri başarıyla kaydedildi: {output_path}")
 
-print("\nTüm videoların işlenmesi tamamlandı!")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+import argparse
+import concurrent.futures
+import json
+import re
+import threading
+import time
+
+from llm_gateway import CANCEL_POLL_INTERVAL, FakeModel, FakeResponse, ModelGateway, ModelTimeout, RequestCancelled
+
+# Varsayılan ayarlar (8.38app.py ortam değişkenleriyle değiştirebilir)
+DEFAULT_MAX_BATCH = 8  # Bir model çağrısında en fazla bu kadar öğrencinin geri bildirimi istenir
+DEFAULT_MAX_WAIT_MS = 20.0  # İlk iş geldikten sonra diğerleri için en fazla bu kadar beklenir
+
+# Toplu prompt'ta her öğrencinin verisi bu başlıkla ayrılır; yanıt aynı kimliklerle JSON olarak istenir
+STUDENT_HEADER = "### Öğrenci {job_id}"
+_STUDENT_PATTERN = re.compile(r"^### Öğrenci (\S+)$", re.MULTILINE)
+
+BATCH_INSTRUCTIONS = """
+Aşağıda birden fazla öğrencinin verisi var. Her öğrenci için yukarıdaki talimatlara göre ayrı bir geri bildirim yaz.
+Yanıtı sadece bir JSON nesnesi olarak ver, başka metin ekleme. Anahtarlar öğrenci kimlikleri, değerler geri bildirim
+metinleridir. Örnek: {"o1": "Harika gidiyorsun! ...", "o2": "Sol dizini biraz daha bük. ..."}
+"""
+
+
+class _Job:
+    def __init__(self, prompt, timeout):
+        self.prompt = prompt
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout  # Toplama, toplu çağrı ve tek tek yeniden sorma dahil
+        self.job_id = None
+        self.future = concurrent.futures.Future()
+        self.call = None  # (gateway future'ı, aynı çağrıdaki işler)
+        self.abandoned = False  # İstemci yanıtı beklemekten vazgeçti
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+
+def parse_batch_response(text, job_ids):
+    """
+    Toplu yanıttan {kimlik: geri bildirim} sözlüğü çıkarır. Kod bloğu (```json) içindeki yanıtlar da kabul edilir.
+    Çözümlenemeyen yanıtta boş sözlük döner; sadece istenen kimliklere ait, boş olmayan metinler alınır.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if "\n" in text else ""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(answers, dict):
+        return {}
+    return {job_id: answers[job_id].strip() for job_id in job_ids
+            if isinstance(answers.get(job_id), str) and answers[job_id].strip()}
+
+
+class FeedbackBatcher:
+    """
+    Aynı anda gelen geri bildirim isteklerini birkaç milisaniye toplayıp tek bir model çağrısında birleştirir.
+
+    Her iş, ortak talimatların (instructions) yerine sadece öğrenciye özel veriyi taşır. Toplu prompt talimatları
+    bir kez içerir ve öğrenci kimlikleriyle anahtarlanmış bir JSON yanıt ister; yanıt bekleyen isteklere dağıtılır.
+    Toplu yanıt çözümlenemezse (veya bir öğrencinin yanıtı eksikse) o işler tek tek modele sorulur.
+
+    Çağrı, max_batch iş toplandığında veya ilk işten max_wait_ms sonra yapılır. Model çağrıları ModelGateway
+    üzerinden gider (eşzamanlılık sınırı aynen geçerlidir). Zaman aşımı iş gönderildiğinde başlar ve toplu çağrı
+    ile tek tek yeniden sormayı birlikte kapsar; süre dolan iş yeniden sorulmadan ModelTimeout ile biter.
+    Bir çağrıdaki tüm işlerin istemcileri vazgeçerse model çağrısı iptal edilir.
+    """
+
+    def __init__(self, gateway, instructions, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.gateway = gateway
+        self.instructions = instructions.strip()
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.model_calls = 0
+        self.batches = 0
+        self.batched_jobs = 0
+        self.fallbacks = 0
+
+        self._pending = []
+        self._deadline = None
+        self._closed = False
+        self._calls_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="feedback-batcher", daemon=True)
+        self._thread.start()
+
+    def stats(self):
+        return {"model_calls": self.model_calls, "batches": self.batches, "batched_jobs": self.batched_jobs,
+                "fallbacks": self.fallbacks, "pending": len(self._pending)}
+
+    def single_prompt(self, prompt):
+        return f"{self.instructions}\n\n{prompt.strip()}"
+
+    def batch_prompt(self, jobs):
+        students = "\n\n".join(f"{STUDENT_HEADER.format(job_id=job.job_id)}\n{job.prompt.strip()}" for job in jobs)
+        return f"{self.instructions}\n{BATCH_INSTRUCTIONS}\n{students}"
+
+    def submit(self, prompt, timeout=None):
+        """İşi sıraya ekler ve yanıt metnini verecek bir concurrent.futures.Future döndürür."""
+        return self._submit_job(prompt, timeout).future
+
+    def _submit_job(self, prompt, timeout):
+        job = _Job(prompt, timeout or self.gateway.timeout)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("FeedbackBatcher kapatıldı.")
+            self._pending.append(job)
+            if len(self._pending) == 1:
+                self._deadline = time.monotonic() + self.max_wait
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return job
+
+    def generate(self, prompt, timeout=None, cancelled=None):
+        """ModelGateway.generate ile aynı arayüz: yanıt metnini döndürür; iptalde RequestCancelled fırlatır."""
+        job = self._submit_job(prompt, timeout)
+        try:
+            while True:
+                try:
+                    return job.future.result(timeout=CANCEL_POLL_INTERVAL if cancelled else None)
+                except concurrent.futures.TimeoutError:
+                    if job.future.done():
+                        raise
+                    if cancelled():
+                        self._abandon(job)
+                        raise RequestCancelled()
+        except concurrent.futures.CancelledError:
+            raise RequestCancelled()
+
+    def _abandon(self, job):
+        """
+        İstemci vazgeçti. İş henüz gönderilmediyse topludan çıkarılır; gönderildiyse ve aynı model çağrısındaki
+        tüm işlerin istemcileri vazgeçtiyse çağrı iptal edilir (eşzamanlılık yuvası boşalır).
+        """
+        if job.future.cancel():
+            return
+        with self._calls_lock:
+            job.abandoned = True
+            call = job.call
+            if call is None or not all(other.abandoned for other in call[1]):
+                return
+        call[0].cancel()
+
+    def _start_call(self, jobs, prompt, timeout):
+        """Model çağrısını başlatır ve işlere bağlar; bu arada tüm istemciler vazgeçtiyse çağrıyı iptal eder."""
+        future = self.gateway.submit(prompt, timeout)
+        with self._calls_lock:
+            for job in jobs:
+                job.call = (future, jobs)
+            abandoned = all(job.abandoned for job in jobs)
+        if abandoned:
+            future.cancel()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._pending or (len(self._pending) < self.max_batch
+                                                                  and time.monotonic() < self._deadline)):
+                    self._condition.wait(None if not self._pending else self._deadline - time.monotonic())
+                if self._closed and not self._pending:
+                    return
+                jobs, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                if self._pending:
+                    self._deadline = time.monotonic()  # Kalanlar beklemeden bir sonraki çağrıya
+            self._dispatch(jobs)
+
+    def _dispatch(self, jobs):
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]  # İptal edilenleri atla
+        if len(jobs) == 1:
+            self._call_single(jobs[0])
+            return
+        if not jobs:
+            return
+        for i, job in enumerate(jobs, start=1):
+            job.job_id = f"o{i}"
+        self.model_calls += 1
+        self.batches += 1
+        self.batched_jobs += len(jobs)
+        future = self._start_call(jobs, self.batch_prompt(jobs), max(job.remaining() for job in jobs))
+        future.add_done_callback(lambda done: self._fan_out(done, jobs))
+
+    def _call_single(self, job):
+        remaining = job.remaining()
+        if remaining <= 0:
+            job.future.set_exception(ModelTimeout(f"Model {job.timeout} saniyede yanıt vermedi."))
+            return
+        self.model_calls += 1
+        future = self._start_call([job], self.single_prompt(job.prompt), remaining)
+        future.add_done_callback(lambda done: _copy_result(done, job.future))
+
+    def _fan_out(self, done, jobs):
+        if done.cancelled() or done.exception() is not None:
+            for job in jobs:
+                _copy_result(done, job.future)
+            return
+        answers = parse_batch_response(done.result(), [job.job_id for job in jobs])
+        for job in jobs:
+            if job.job_id in answers:
+                job.future.set_result(answers[job.job_id])
+            elif job.abandoned:
+                job.future.set_exception(RequestCancelled())
+            else:
+                # Toplu çağrı zaman aşımının bir kısmını kullandı; tek çağrıya sadece kalan süre verilir
+                self.fallbacks += 1
+                self._call_single(job)
+
+    def close(self):
+        """Bekleyen işleri gönderir ve toplama thread'ini durdurur."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+def _copy_result(source, target):
+    if source.cancelled():
+        target.set_exception(RequestCancelled())
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class BatchFakeModel(FakeModel):
+    """
+    Toplu prompt'ları da yanıtlayan sahte model: öğrenci başlıklarını bulup kimlik başına JSON döndürür.
+    Her ek öğrenci yanıt süresine per_item_latency ekler (uzun çıktı daha uzun sürer).
+    faults: FakeModel hata enjeksiyonu ayarları (slow_rate, slow_latency, error_rate, seed).
+    """
+
+    def __init__(self, latency=0.5, text="Harika gidiyorsun! Devam et.", per_item_latency=0.02, **faults):
+        super().__init__(latency, text, **faults)
+        self.per_item_latency = per_item_latency
+
+    def generate_content(self, prompt, stream=False):
+        job_ids = _STUDENT_PATTERN.findall(prompt)
+        response = super().generate_content(prompt, stream)
+        if stream or not job_ids:
+            return response
+        time.sleep(self.per_item_latency * (len(job_ids) - 1))
+        return FakeResponse(json.dumps({job_id: self.text for job_id in job_ids}, ensure_ascii=False))
+
+
+def _measure(students, latency, max_concurrency, max_batch, max_wait_ms):
+    model = BatchFakeModel(latency)
+    gateway = ModelGateway(model, max_concurrency=max_concurrency, timeout=60)
+    batcher = FeedbackBatcher(gateway, "Talimatlar", max_batch=max_batch, max_wait_ms=max_wait_ms)
+    start_time = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=students) as clients:
+        list(clients.map(lambda i: batcher.generate(f"Öğrenci verisi {i}"), range(students)))
+    elapsed = time.perf_counter() - start_time
+    batcher.close()
+    gateway.close()
+    return elapsed, model.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte modelle toplu (batch) geri bildirim verimini ölçer.")
+    parser.add_argument("--students", type=int, default=60, help="Eşzamanlı istek gönderen öğrenci sayısı")
+    parser.add_argument("--latency", type=float, default=0.5, help="Sahte modelin yanıt gecikmesi (saniye)")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Gateway eşzamanlılık sınırı (kota)")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 4, 8, 16],
+                        help="Denenecek en büyük toplu iş boyutları (1 = toplama yok)")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="Toplama bekleme süresi")
+    args = parser.parse_args()
+
+    for max_batch in args.max_batch:
+        elapsed, calls = _measure(args.students, args.latency, args.max_concurrency, max_batch, args.max_wait_ms)
+        print(f"toplu iş={max_batch:3d}: {args.students} geri bildirim {elapsed:.2f} sn, "
+              f"{args.students / elapsed:.1f} istek/sn, {calls} model çağrısı")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+import argparse
+import asyncio
+import concurrent.futures
+import queue
+import random
+import select
+import socket
+import threading
+import time
+
+from llm_resilience import DEFAULT_HEDGE_MIN_SECONDS, DEFAULT_HEDGE_PERCENTILE, CircuitBreaker, LatencyTracker
+
+# Varsayılan ayarlar (8.38app.py ortam değişkenleriyle değiştirebilir)
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 20.0
+
+# Senkron bekleyişte istemcinin bağlantısını kontrol etme aralığı (saniye)
+CANCEL_POLL_INTERVAL = 0.1
+
+_STREAM_END = object()
+
+
+class RequestCancelled(Exception):
+    """İstemci bağlantıyı kapattığı için model çağrısı iptal edildi."""
+
+
+class ModelTimeout(Exception):
+    """Model çağrısı (sırada bekleme dahil) zaman aşımına uğradı."""
+
+
+class CircuitOpen(Exception):
+    """Devre kesici açık olduğu için çağrı modele hiç gönderilmedi."""
+
+
+class ModelGateway:
+    """
+    Model istemcisinin (Gemini) önünde duran, eşzamanlılığı sınırlı asenkron katman.
+
+    Kendi thread'inde bir asyncio event loop çalıştırır. Flask gibi senkron handler'lar
+    generate() ile, asenkron kodlar generate_async() ile aynı sınırlayıcıyı paylaşır.
+    Aynı anda en fazla max_concurrency çağrı modele gider; diğerleri sırada bekler.
+    Her isteğin (sırada bekleme dahil) bir zaman aşımı vardır ve istek iptal edilebilir.
+
+    Kuyruk gecikmesini (p99) sınırlamak için:
+    - breaker (llm_resilience.CircuitBreaker) verilirse her çağrının sonucu ona bildirilir; devre açıkken
+      çağrılar modele gitmeden CircuitOpen ile reddedilir.
+    - hedge_percentile verilirse (ör. 0.95), yanıtı son başarılı çağrıların bu yüzdeliğinden (en az
+      hedge_min_seconds) uzun süren çağrı için boşta yuva varsa ikinci (yedek) bir çağrı başlatılır;
+      önce gelen yanıt kullanılır, diğeri iptal edilir.
+    """
+
+    def __init__(self, model, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 breaker=None, hedge_percentile=None, hedge_min_seconds=DEFAULT_HEDGE_MIN_SECONDS):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.latencies = LatencyTracker()
+        self.in_flight = 0
+        self.waiting = 0
+        self.hedged = 0  # Yedek çağrı başlatılan istek sayısı
+        self.hedge_wins = 0  # Yanıtı yedek çağrıdan gelen istek sayısı
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency,
+                                                               thread_name_prefix="model-call")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="model-gateway", daemon=True)
+        self._thread.start()
+        self._semaphore = self._run_in_loop(self._create_semaphore()).result()
+
+    async def _create_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def _run_in_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _acquire_slot(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def _release_slot(self, _call=None):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def _hold_slot_until_done(self, call):
+        """
+        Thread havuzundaki çağrıyı bekler; eşzamanlılık yuvası çağrı bitince bırakılır. Bekleyen görev iptal
+        edilirse (zaman aşımı, istemci ayrıldı) thread durdurulamaz ve modeli beklemeye devam eder; yuva
+        thread bitene kadar tutulur, böylece modelde aynı anda max_concurrency'den fazla çağrı olmaz.
+        """
+        call.add_done_callback(self._release_slot)
+        return await asyncio.shield(call)
+
+    async def _generate(self, prompt):
+        await self._acquire_slot()
+        # Model asenkron arayüz sunuyorsa onu kullan (iptal çağrıyı gerçekten durdurur),
+        # yoksa senkron çağrıyı thread havuzunda çalıştır
+        if hasattr(self.model, 'generate_content_async'):
+            try:
+                return (await self.model.generate_content_async(prompt)).text
+            finally:
+                self._release_slot()
+        call = self._loop.run_in_executor(self._executor, self.model.generate_content, prompt)
+        return (await self._hold_slot_until_done(call)).text
+
+    def _hedge_delay(self):
+        """Yedek çağrıdan önce beklenecek süre (saniye); yedekleme kapalıysa veya ölçüm azsa None."""
+        if not self.hedge_percentile:
+            return None
+        delay = self.latencies.percentile(self.hedge_percentile)
+        return None if delay is None else max(delay, self.hedge_min_seconds)
+
+    async def _generate_hedged(self, prompt):
+        primary = asyncio.ensure_future(self._generate(prompt))
+        tasks = {primary}
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                # Yedek çağrı sadece boşta yuva varsa: kota dolarken yükü ikiye katlamaz
+                if not done and not self._semaphore.locked():
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(self._generate(prompt)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                if not tasks:
+                    return done.pop().result()  # Hepsi başarısız: son hatayı fırlat
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _generate_with_timeout(self, prompt, timeout):
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpen("Model devre kesicisi açık; çağrı gönderilmedi.")
+        started = time.monotonic()
+        try:
+            text = await asyncio.wait_for(self._generate_hedged(prompt), timeout)
+        except asyncio.TimeoutError:
+            self._record(True)
+            raise ModelTimeout(f"Model {timeout} saniyede yanıt vermedi.")
+        except asyncio.CancelledError:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        except Exception:
+            self._record(True)
+            raise
+        elapsed = time.monotonic() - started
+        self.latencies.add(elapsed)
+        self._record(False, elapsed)
+        return text
+
+    def _record(self, failed, seconds=None):
+        if self.breaker is not None:
+            self.breaker.record(failed, seconds)
+
+    def submit(self, prompt, timeout=None):
+        """Çağrıyı başlatır ve bir concurrent.futures.Future döndürür. future.cancel() çağrıyı iptal eder."""
+        return self._run_in_loop(self._generate_with_timeout(prompt, timeout or self.timeout))
+
+    def generate(self, prompt, timeout=None, cancelled=None):
+        """
+        Senkron çağrı (Flask handler'ları için). Yanıt metnini döndürür.
+
+        cancelled: verilirse düzenli aralıklarla çağrılır; True dönerse (ör. istemci bağlantıyı kapattıysa)
+        model çağrısı iptal edilir ve RequestCancelled fırlatılır. Zaman aşımında ModelTimeout fırlatılır.
+        """
+        future = self.submit(prompt, timeout)
+        try:
+            while True:
+                try:
+                    return future.result(timeout=CANCEL_POLL_INTERVAL if cancelled else None)
+                except concurrent.futures.TimeoutError:
+                    if future.done():
+                        raise  # Modelin kendi fırlattığı bir zaman aşımı hatası
+                    if cancelled():
+                        future.cancel()
+                        raise RequestCancelled()
+        except concurrent.futures.CancelledError:
+            raise RequestCancelled()
+
+    async def _stream(self, prompt, chunks, stop):
+        await self._acquire_slot()
+        await self._hold_slot_until_done(
+            self._loop.run_in_executor(self._executor, self._pump_stream, prompt, chunks, stop))
+
+    def _pump_stream(self, prompt, chunks, stop):
+        """Modelin akış yanıtını (thread havuzunda) okuyup parçaları kuyruğa koyar."""
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                if stop.is_set():
+                    return  # Tüketici vazgeçti; kalan parçalar okunmaz
+                if chunk.text:
+                    chunks.put(chunk.text)
+            chunks.put(_STREAM_END)
+        except Exception as e:
+            chunks.put(e)
+
+    def stream(self, prompt, timeout=None, cancelled=None):
+        """
+        Yanıt metnini model ürettikçe parça parça veren senkron generator (SSE yanıtları için).
+        Eşzamanlılık sınırı akış boyunca geçerlidir; zaman aşımı tüm akışı kapsar (ModelTimeout).
+        cancelled True dönerse veya generator kapatılırsa (istemci ayrıldı) model akışı bırakılır.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpen("Model devre kesicisi açık; çağrı gönderilmedi.")
+        chunks = queue.Queue()
+        stop = threading.Event()
+        future = self._run_in_loop(self._stream(prompt, chunks, stop))
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        failed = None  # None = sonuç bilinmiyor (tüketici vazgeçti)
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    failed = True
+                    raise ModelTimeout(f"Model {timeout} saniyede yanıtı tamamlamadı.")
+                try:
+                    chunk = chunks.get(timeout=min(CANCEL_POLL_INTERVAL, remaining))
+                except queue.Empty:
+                    if cancelled is not None and cancelled():
+                        raise RequestCancelled()
+                    continue
+                if chunk is _STREAM_END:
+                    failed = False
+                    future.result()  # Eşzamanlılık yuvası bırakılana kadar bekle (hemen tamamlanır)
+                    return
+                if isinstance(chunk, Exception):
+                    failed = True
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()
+            if self.breaker is not None:
+                # Akışların süresi yanıt uzunluğuna bağlı olduğundan yavaş çağrı sayılmaz
+                if failed is None:
+                    self.breaker.release()
+                else:
+                    self.breaker.record(failed)
+            if not future.done():
+                future.cancel()
+
+    async def generate_async(self, prompt, timeout=None):
+        """Asenkron çağrı (ASGI handler'ları gibi başka event loop'lardan kullanılabilir)."""
+        future = self.submit(prompt, timeout)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=False)
+
+
+def client_disconnected(environ):
+    """
+    WSGI isteğinin istemcisi bağlantıyı kapattı mı? Sunucu ham soketi environ içinde veriyorsa
+    (werkzeug geliştirme sunucusu ve gunicorn verir) soket okunmadan kontrol edilir; vermiyorsa False döner.
+    """
+    sock = environ.get('werkzeug.socket') or environ.get('gunicorn.socket')
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        # Okunabilir ama veri yoksa karşı taraf bağlantıyı kapatmıştır
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Yapılandırılabilir gecikmeli yerel sahte model (test ve yük denemeleri için). Gemini'yi çağırmaz.
+    stream=True ile metni kelime kelime, toplam gecikmeyi kelimelere bölerek üretir.
+
+    Hata enjeksiyonu: çağrıların slow_rate kadarı slow_latency sürer (kuyruk gecikmesi), error_rate kadarı
+    hata fırlatır. Ayarlar çalışırken değiştirilebilir (ör. kesinti senaryoları için). seed: tekrarlanabilirlik.
+    """
+
+    def __init__(self, latency=0.5, text="Harika gidiyorsun! Devam et.", slow_rate=0.0, slow_latency=5.0,
+                 error_rate=0.0, seed=None):
+        self.latency = latency
+        self.text = text
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next_call(self):
+        """Çağrıyı sayar; (gecikme, hata mı) döndürür."""
+        with self._lock:
+            self.calls += 1
+            slow = self._random.random() < self.slow_rate
+            failed = self._random.random() < self.error_rate
+        return (self.slow_latency if slow else self.latency), failed
+
+    def generate_content(self, prompt, stream=False):
+        latency, failed = self._next_call()
+        if stream:
+            return self._stream_words(latency, failed)
+        time.sleep(latency)
+        if failed:
+            raise RuntimeError("Sahte model hatası (enjekte edildi).")
+        return FakeResponse(self.text)
+
+    def _stream_words(self, latency, failed):
+        words = self.text.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(latency / len(words))
+            if failed and i == len(words) // 2:
+                raise RuntimeError("Sahte model hatası (enjekte edildi).")
+            yield FakeResponse(word if i == 0 else " " + word)
+
+
+def _measure(sessions, latency, max_concurrency):
+    gateway = ModelGateway(FakeModel(latency), max_concurrency=max_concurrency, timeout=60)
+    start_time = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=sessions) as clients:
+        list(clients.map(lambda i: gateway.generate(f"istek {i}"), range(sessions)))
+    elapsed = time.perf_counter() - start_time
+    gateway.close()
+    return elapsed
+
+
+def _measure_stream(latency):
+    """Akışta ilk parçanın ve tüm yanıtın gelme süresi (saniye)."""
+    gateway = ModelGateway(FakeModel(latency, text="Harika gidiyorsun! Sol dizini biraz daha bük ve kollarını "
+                                                   "omuz hizasında tut. Devam et!"), timeout=60)
+    start_time = time.perf_counter()
+    first_chunk = None
+    for _ in gateway.stream("istek"):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start_time
+    total = time.perf_counter() - start_time
+    gateway.close()
+    return first_chunk, total
+
+
+def _measure_tail(requests, latency, slow_rate, hedge_percentile, clients=4):
+    """Yavaş çağrı enjekte edilen sahte modelle istek sürelerinin p50/p99 değerleri (saniye)."""
+    model = FakeModel(latency, slow_rate=slow_rate, slow_latency=latency * 10, seed=1)
+    gateway = ModelGateway(model, max_concurrency=clients * 2, timeout=60, hedge_percentile=hedge_percentile,
+                           hedge_min_seconds=latency)
+
+    def timed(i):
+        start_time = time.perf_counter()
+        gateway.generate(f"istek {i}")
+        return time.perf_counter() - start_time
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=clients) as pool:
+        durations = sorted(pool.map(timed, range(requests)))
+    gateway.close()
+    return durations[len(durations) // 2], durations[min(len(durations) - 1, int(0.99 * len(durations)))], \
+        gateway.hedged, model.calls
+
+
+def _measure_outage(requests, latency, open_seconds=0.5):
+    """
+    Model tamamen hata verirken devre kesicinin etkisi: (açılma sayısı, reddedilen, modele giden çağrı,
+    reddedilen çağrıların ortalama süresi). Sonra model düzelir ve devrenin kapandığı gösterilir.
+    """
+    model = FakeModel(latency, error_rate=1.0, seed=1)
+    breaker = CircuitBreaker(window=10, min_calls=5, open_seconds=open_seconds)
+    gateway = ModelGateway(model, timeout=60, breaker=breaker)
+    rejected_durations = []
+    for i in range(requests):
+        start_time = time.perf_counter()
+        try:
+            gateway.generate(f"istek {i}")
+        except CircuitOpen:
+            rejected_durations.append(time.perf_counter() - start_time)
+        except RuntimeError:
+            pass
+    model.error_rate = 0.0
+    time.sleep(open_seconds)
+    gateway.generate("deneme")
+    gateway.close()
+    mean_rejected = sum(rejected_durations) / len(rejected_durations) if rejected_durations else 0.0
+    return breaker.opened, breaker.rejected, model.calls, mean_rejected, breaker.state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte modelle eşzamanlı oturum verimini ölçer.")
+    parser.add_argument("--sessions", type=int, default=30, help="Eşzamanlı istemci (öğrenci) sayısı")
+    parser.add_argument("--latency", type=float, default=0.5, help="Sahte modelin yanıt gecikmesi (saniye)")
+    parser.add_argument("--max-concurrency", type=int, nargs="+", default=[1, 8, 30],
+                        help="Denenecek eşzamanlılık sınırları")
+    parser.add_argument("--slow-rate", type=float, default=0.02,
+                        help="Kuyruk gecikmesi ölçümünde 10 kat yavaş çağrıların oranı (0 = ölçme)")
+    parser.add_argument("--tail-requests", type=int, default=1000, help="Kuyruk gecikmesi ölçümündeki istek sayısı")
+    args = parser.parse_args()
+
+    for limit in args.max_concurrency:
+        elapsed = _measure(args.sessions, args.latency, limit)
+        print(f"eşzamanlılık={limit:3d}: {args.sessions} istek {elapsed:.2f} sn, "
+              f"{args.sessions / elapsed:.1f} istek/sn")
+
+    first_chunk, total = _measure_stream(args.latency)
+    print(f"akış: ilk parça {first_chunk * 1000:.0f} ms, tüm yanıt {total * 1000:.0f} ms")
+
+    if args.slow_rate > 0:
+        for hedge_percentile in (None, DEFAULT_HEDGE_PERCENTILE):
+            p50, p99, hedged, calls = _measure_tail(args.tail_requests, args.latency / 5, args.slow_rate,
+                                                    hedge_percentile)
+            label = "yedek istek kapalı" if hedge_percentile is None else f"yedek istek p{hedge_percentile * 100:.0f}"
+            print(f"kuyruk ({label}): p50 {p50 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms, "
+                  f"{hedged} yedek çağrı, {calls} model çağrısı")
+
+    opened, rejected, calls, mean_rejected, state = _measure_outage(40, args.latency / 5)
+    print(f"kesinti: devre {opened} kez açıldı, {rejected} çağrı reddedildi (ortalama {mean_rejected * 1000:.1f} ms), "
+          f"{calls} model çağrısı; model düzelince devre: {state}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import collections
+import os
+import threading
+import time
+
+# Devre kesici durumları
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}  # Gauge metriği için sayısal karşılıklar
+
+# Varsayılan ayarlar (8.38app.py ortam değişkenleriyle değiştirebilir)
+DEFAULT_WINDOW = 20  # Hata oranına bakılan son çağrı sayısı
+DEFAULT_MIN_CALLS = 10  # Pencerede bu kadar sonuç birikmeden devre açılmaz
+DEFAULT_FAILURE_RATIO = 0.5  # Son çağrıların bu oranı başarısız/yavaşsa devre açılır
+DEFAULT_SLOW_CALL_SECONDS = 10.0  # Bundan uzun süren başarılı çağrılar da başarısız sayılır
+DEFAULT_OPEN_SECONDS = 30.0  # Devre açıldıktan sonra deneme çağrısına izin verilene kadar geçen süre
+DEFAULT_HALF_OPEN_CALLS = 1  # Yarı açık durumda aynı anda izin verilen deneme çağrısı
+
+# Yedek (hedged) istek ayarları: ilk çağrı son yanıt sürelerinin bu yüzdeliğini aşarsa ikinci çağrı başlatılır
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_SECONDS = 0.5  # Yüzdelik bundan küçükse bu kadar beklenir (ucuz çağrıları ikilememek için)
+DEFAULT_LATENCY_WINDOW = 200
+DEFAULT_LATENCY_MIN_SAMPLES = 20  # Bu kadar ölçüm birikmeden yedek istek gönderilmez
+
+
+class LatencyTracker:
+    """Son başarılı çağrıların süreleri; yedek isteğin ne zaman gönderileceğini belirlemek için yüzdelik verir."""
+
+    def __init__(self, window=DEFAULT_LATENCY_WINDOW, min_samples=DEFAULT_LATENCY_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        """q (0-1) yüzdeliği (saniye); yeterli ölçüm yoksa None."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Model çağrıları için devre kesici. Son window çağrının en az failure_ratio kadarı başarısız (hata, zaman aşımı
+    veya slow_call_seconds'tan uzun) ise devre açılır: open_seconds boyunca çağrılar modele hiç gönderilmez
+    (handler'lar yerel geri bildirime düşer). Süre dolunca devre yarı açılır ve half_open_calls deneme çağrısına
+    izin verilir; deneme başarılıysa devre kapanır, başarısızsa yeniden açılır.
+
+    on_state_change(eski, yeni): durum değiştiğinde çağrılır (ör. metrik için). Thread güvenlidir.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_calls=DEFAULT_MIN_CALLS, failure_ratio=DEFAULT_FAILURE_RATIO,
+                 slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS, open_seconds=DEFAULT_OPEN_SECONDS,
+                 half_open_calls=DEFAULT_HALF_OPEN_CALLS, on_state_change=None):
+        self.min_calls = max(1, min(min_calls, window))
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self.rejected = 0  # Devre açıkken reddedilen çağrı sayısı
+        self.opened = 0  # Devrenin kaç kez açıldığı
+
+        self._state = CLOSED
+        self._outcomes = collections.deque(maxlen=window)  # True = başarısız
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _set_state(self, state):
+        previous, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.opened += 1
+        if state != CLOSED:
+            self._probes = 0
+        self._outcomes.clear()
+        if self.on_state_change is not None:
+            self.on_state_change(previous, state)
+
+    def _refresh(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+
+    def allow(self):
+        """Çağrı modele gönderilebilir mi? İzin verilen her çağrı için record() veya release() çağrılmalıdır."""
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, failed, seconds=None):
+        """Çağrının sonucunu kaydeder. seconds verilirse slow_call_seconds'tan uzun çağrılar başarısız sayılır."""
+        if seconds is not None and self.slow_call_seconds and seconds > self.slow_call_seconds:
+            failed = True
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._set_state(OPEN if failed else CLOSED)
+            elif self._state == CLOSED:
+                self._outcomes.append(failed)
+                if len(self._outcomes) >= self.min_calls and \
+                        sum(self._outcomes) >= self.failure_ratio * len(self._outcomes):
+                    self._set_state(OPEN)
+            # Devre açıkken gelen geç sonuçlar yok sayılır
+
+    def release(self):
+        """Sonucu bilinmeden biten (iptal edilen) çağrının deneme hakkını geri verir."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+
+def breaker_from_env(on_state_change=None):
+    """
+    Ortam değişkenlerinden devre kesici oluşturur: LLM_BREAKER_WINDOW, LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_FAILURE_RATIO, LLM_BREAKER_SLOW_SECONDS, LLM_BREAKER_OPEN_SECONDS.
+    LLM_BREAKER_FAILURE_RATIO=0 verilirse devre kesici kapalıdır (None döner).
+    """
+    failure_ratio = float(os.getenv("LLM_BREAKER_FAILURE_RATIO", str(DEFAULT_FAILURE_RATIO)))
+    if failure_ratio <= 0:
+        return None
+    return CircuitBreaker(
+        window=int(os.getenv("LLM_BREAKER_WINDOW", str(DEFAULT_WINDOW))),
+        min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", str(DEFAULT_MIN_CALLS))),
+        failure_ratio=failure_ratio,
+        slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", str(DEFAULT_SLOW_CALL_SECONDS))),
+        open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", str(DEFAULT_OPEN_SECONDS))),
+        on_state_change=on_state_change,
+    )
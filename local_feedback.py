@@ -0,0 +1,226 @@
+import math
+import os
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES
+
+# Bu farkın altındaki eklemler "doğru" sayılır (derece)
+GOOD_THRESHOLD_DEGREES = 15.0
+
+# En büyük iki hata bu kadar yakınsa ve ikisi de belirginse hangisinin söyleneceği belirsizdir (derece)
+AMBIGUITY_MARGIN_DEGREES = 5.0
+
+# Bu kadar eklem açısı hesaplanamazsa yerel değerlendirme güvenilmez sayılır
+MAX_MISSING_ANGLES = 2
+
+# Doğruluk bu yüzdenin altındaysa öğrenci büyük ihtimalle başka bir hareket yapıyordur (bütüncül yorum gerekir)
+LOW_ACCURACY_PERCENT = 60
+
+# Varsayılan politika: her N. istekte (oturum başına) yine de LLM'e sor; 0 kapatır
+DEFAULT_LLM_EVERY_N = 10
+
+# Politika modları: "auto" (belirsizse/periyodik LLM), "local" (hiç LLM yok), "llm" (her zaman LLM, eski davranış)
+POLICY_MODES = ("auto", "local", "llm")
+
+# Takip edilecek en fazla oturum sayısı (eskiler atılır)
+MAX_TRACKED_SESSIONS = 10000
+
+# Eklemlerin Türkçe adları (FEEDBACK_ANGLES sırasıyla aynı isimler)
+JOINT_LABELS = {
+    "right_elbow": "sağ dirseğini",
+    "left_elbow": "sol dirseğini",
+    "right_shoulder": "sağ kolunu",
+    "left_shoulder": "sol kolunu",
+    "right_knee": "sağ dizini",
+    "left_knee": "sol dizini",
+    "right_hip": "sağ kalçanı",
+    "left_hip": "sol kalçanı",
+}
+
+# Eklem tipi ve hatanın yönüne göre düzeltme önerileri.
+# "too_large": kullanıcının açısı referanstan büyük, "too_small": küçük.
+CORRECTIONS = {
+    "elbow": {"too_large": "{joint} biraz daha bük", "too_small": "{joint} biraz daha aç"},
+    "knee": {"too_large": "{joint} biraz daha bük", "too_small": "{joint} biraz daha uzat"},
+    "shoulder": {"too_large": "{joint} biraz indir", "too_small": "{joint} biraz daha kaldır"},
+    "hip": {"too_large": "{joint} biraz daha kır, gövdeni öne eğ", "too_small": "{joint} aç, gövdeni dikleştir"},
+}
+
+PRAISE_TEMPLATES = (
+    "Harika gidiyorsun! Pozun referansa çok yakın. Devam et!",
+    "Mükemmel! Hareketleri çok iyi yakalıyorsun.",
+    "Süper! Tüm eklemlerin doğru pozisyonda.",
+)
+
+CORRECTION_TEMPLATES = (
+    "Güzel gidiyorsun! {correction}. Devam et!",
+    "İyi iş! Sadece {correction_lower}.",
+    "Az kaldı! {correction}, gerisi çok iyi.",
+)
+
+NOT_VISIBLE_FEEDBACK = "Kamerada tam görünmüyorsun. Lütfen tüm vücudun görünecek şekilde pozisyon al."
+
+
+def _joint_kind(name):
+    return name.rsplit("_", 1)[1]
+
+
+def _capitalize(text):
+    return text[:1].upper() + text[1:]
+
+
+def pose_accuracy(user_row, reference_row):
+    """
+    Frontend'deki calculatePoseSimilarity ile aynı hesap: 1 - (toplam mutlak fark / (açı sayısı * 180)), yüzde olarak.
+    Hesaplanamayan açılar 180 derece fark sayılır.
+    """
+    total = 0.0
+    for user_value, reference_value in zip(user_row, reference_row):
+        if user_value is None or reference_value is None or math.isnan(user_value) or math.isnan(reference_value):
+            total += 180.0
+        else:
+            total += abs(user_value - reference_value)
+    similarity = 1.0 - total / (len(user_row) * 180.0)
+    return int(math.floor(max(0.0, min(1.0, similarity)) * 100))
+
+
+def evaluate_locally(user_row, reference_row, table=FEEDBACK_ANGLES, variant=0):
+    """
+    Açı hatalarını sıralar, en kötü eklem ve yönü için şablondan Türkçe geri bildirim üretir.
+
+    user_row, reference_row: table sırasıyla açılar (NaN/None = hesaplanamadı).
+    variant: aynı öğrenciye hep aynı cümleyi söylememek için şablon seçici (ör. istek sayacı).
+    Sonuç sözlüğündeki "uncertain" True ise yerel motor emin değildir ve LLM'e danışılmalıdır.
+    "not_visible" True ise vücut kamerada görünmüyordur; açılar olmadığı için LLM'e de gidilmez.
+    """
+    signed_errors = []
+    for user_value, reference_value in zip(user_row, reference_row):
+        if user_value is None or reference_value is None or math.isnan(user_value) or math.isnan(reference_value):
+            signed_errors.append(None)
+        else:
+            signed_errors.append(user_value - reference_value)
+    return feedback_from_errors(signed_errors, pose_accuracy(user_row, reference_row), table, variant)
+
+
+def feedback_from_errors(signed_errors, accuracy, table=FEEDBACK_ANGLES, variant=0):
+    """
+    evaluate_locally'nin çekirdeği: işaretli (kullanıcı - referans) açı hatalarından geri bildirim üretir.
+    Toplu değerlendirmede kare başına hatalar yerine eklem başına özet hatalar da verilebilir.
+    """
+    errors = []
+    missing = 0
+    for name, signed_error in zip(table.names, signed_errors):
+        if signed_error is None or math.isnan(signed_error):
+            missing += 1
+            continue
+        errors.append((abs(signed_error), name, signed_error))
+    errors.sort(reverse=True)
+
+    result = {
+        "accuracy": accuracy,
+        "worst_joint": None,
+        "error_degrees": None,
+        "missing_angles": missing,
+        "uncertain": False,
+        "not_visible": False,
+    }
+
+    if missing > MAX_MISSING_ANGLES or not errors:
+        result["feedback"] = NOT_VISIBLE_FEEDBACK
+        result["not_visible"] = True
+        return result
+
+    worst_error, worst_name, signed_error = errors[0]
+    result["worst_joint"] = worst_name
+    result["error_degrees"] = round(float(worst_error), 1)
+
+    if worst_error < GOOD_THRESHOLD_DEGREES:
+        result["feedback"] = PRAISE_TEMPLATES[variant % len(PRAISE_TEMPLATES)]
+        return result
+
+    direction = "too_large" if signed_error > 0 else "too_small"
+    correction = CORRECTIONS[_joint_kind(worst_name)][direction].format(joint=JOINT_LABELS[worst_name])
+    template = CORRECTION_TEMPLATES[variant % len(CORRECTION_TEMPLATES)]
+    result["feedback"] = template.format(correction=_capitalize(correction), correction_lower=correction)
+
+    # İki belirgin hata neredeyse eşitse veya poz genel olarak çok farklıysa tek şablon yetersiz kalır
+    ambiguous = (len(errors) > 1 and errors[1][0] >= GOOD_THRESHOLD_DEGREES
+                 and worst_error - errors[1][0] < AMBIGUITY_MARGIN_DEGREES)
+    result["uncertain"] = ambiguous or accuracy < LOW_ACCURACY_PERCENT
+    return result
+
+
+def score_sequence(user_rows, reference_rows, table=FEEDBACK_ANGLES):
+    """
+    Bir kare dizisini tek seferde (vektörel) puanlar.
+
+    user_rows, reference_rows: (N, A) açı dizileri (NaN = hesaplanamadı).
+    Döndürür: (kare başına doğruluk yüzdeleri (N,), kare başına en kötü eklem indeksleri (N,, -1 = yok),
+    eklem başına medyan işaretli hata (A,), eklem başına ortalama mutlak hata (A,)).
+    """
+    signed = np.asarray(user_rows, dtype=np.float64) - np.asarray(reference_rows, dtype=np.float64)
+    absolute = np.abs(signed)
+    missing = np.isnan(absolute)
+
+    # calculatePoseSimilarity ile aynı: hesaplanamayan açı 180 derece fark sayılır
+    totals = np.where(missing, 180.0, absolute).sum(axis=1)
+    accuracy = np.floor(np.clip(1.0 - totals / (len(table) * 180.0), 0.0, 1.0) * 100).astype(np.int64)
+
+    worst = np.where(missing.all(axis=1), -1, np.argmax(np.where(missing, -1.0, absolute), axis=1))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Hiç görülmemiş eklem için NaN yeterli
+        median_signed = np.nanmedian(signed, axis=0) if len(signed) else np.full(len(table), np.nan)
+        mean_absolute = np.nanmean(absolute, axis=0) if len(signed) else np.full(len(table), np.nan)
+    return accuracy, worst, median_signed, mean_absolute
+
+
+class EscalationPolicy:
+    """
+    Bir /evaluate_pose isteğinin LLM'e gidip gitmeyeceğine karar verir.
+
+    "auto" modunda yerel motor belirsizse veya oturumun her llm_every_n. isteğinde LLM'e gidilir;
+    geri kalan istekler yerel geri bildirimle anında yanıtlanır. Vücut görünmüyorsa (not_visible) modele
+    verilecek açı olmadığından hiçbir modda LLM'e gidilmez.
+    """
+
+    def __init__(self, mode="auto", llm_every_n=DEFAULT_LLM_EVERY_N, max_sessions=MAX_TRACKED_SESSIONS):
+        if mode not in POLICY_MODES:
+            raise ValueError(f"Geçersiz politika modu: {mode} (seçenekler: {', '.join(POLICY_MODES)})")
+        self.mode = mode
+        self.llm_every_n = llm_every_n
+        self.max_sessions = max_sessions
+        self._counters = OrderedDict()  # oturum -> istek sayısı
+        self._lock = threading.Lock()
+
+    def next_request(self, session_key):
+        """Oturumun istek sayacını artırır ve yeni değeri döndürür (şablon seçimi için de kullanılır)."""
+        with self._lock:
+            count = self._counters.pop(session_key, 0) + 1
+            self._counters[session_key] = count
+            while len(self._counters) > self.max_sessions:
+                self._counters.popitem(last=False)
+            return count
+
+    def should_escalate(self, local_result, request_number):
+        if local_result["not_visible"]:
+            return False
+        if self.mode == "llm":
+            return True
+        if self.mode == "local":
+            return False
+        if local_result["uncertain"]:
+            return True
+        return bool(self.llm_every_n) and request_number % self.llm_every_n == 0
+
+
+def policy_from_env():
+    """Ortam değişkenlerinden politika oluşturur: LOCAL_FEEDBACK_MODE, LOCAL_FEEDBACK_LLM_EVERY_N."""
+    return EscalationPolicy(
+        mode=os.getenv("LOCAL_FEEDBACK_MODE", "auto"),
+        llm_every_n=int(os.getenv("LOCAL_FEEDBACK_LLM_EVERY_N", str(DEFAULT_LLM_EVERY_N))),
+    )
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Varsayılan gecikme kovaları (saniye): mikro saniyelik yerel işlemlerden saniyelerce süren LLM çağrılarına kadar
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Prometheus metin biçiminde sayaç, histogram ve anlık değer (gauge) tutan basit, thread-safe kayıt.
+    Harici bağımlılık yoktur; /metrics uç noktası render() çıktısını döndürür.
+    """
+
+    def __init__(self):
+        self._help = {}     # metrik adı -> (tip, açıklama)
+        self._counters = {}  # (ad, etiketler) -> değer
+        self._histograms = {}  # (ad, etiketler) -> _Histogram
+        self._buckets = {}
+        self._sampled = {}  # ad -> değer döndüren fonksiyon (gauge'lar ve başka nesnede sayılan sayaçlar)
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, function=None):
+        """
+        Sadece artan sayaç; değeri inc() ile artırılır. function verilirse değer başka bir nesnede sayılıyordur
+        (ör. gateway.hedged) ve her /metrics isteğinde function() ile okunur.
+        """
+        self._help[name] = ("counter", help_text)
+        if function is not None:
+            self._sampled[name] = function
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._help[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(buckets)
+
+    def gauge(self, name, help_text, function):
+        """Her /metrics isteğinde function() çağrılarak okunan anlık değer (ör. sıradaki istek sayısı)."""
+        self._help[name] = ("gauge", help_text)
+        self._sampled[name] = function
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, endpoint, stage, name="dance_stage_seconds"):
+        """Bir işlem aşamasının süresini ölçer: with metrics.span('evaluate_pose', 'angles'): ..."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, endpoint=endpoint, stage=stage)
+
+    def render(self):
+        """Tüm metrikleri Prometheus metin biçiminde (text/plain; version=0.0.4) döndürür."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(((key, (list(h.counts), h.total, h.count, h.buckets))
+                                 for key, h in self._histograms.items()), key=lambda item: item[0])
+
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in self._help:
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_label_text(labels)} {_format_value(value)}")
+
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            describe(name)
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', repr(float(bound))),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_label_text(labels)} {total!r}")
+            lines.append(f"{name}_count{_label_text(labels)} {count}")
+
+        for name, function in sorted(self._sampled.items()):
+            try:
+                value = function()
+            except Exception:
+                continue  # Okunamayan anlık değer /metrics'i bozmamalı
+            describe(name)
+            lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
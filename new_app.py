@@ -3,9 +3,11 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import google.generativeai as genai
 import os
-import math
+import numpy as np
 from dotenv import load_dotenv  # .env dosyasını yüklemek için
 
+from pose_angles import FEEDBACK_ANGLES, compute_angles, landmarks_to_array, angles_to_dict
+
 # .env dosyasını yükle
 load_dotenv()
 
@@ -27,30 +29,6 @@ else:
 model = genai.GenerativeModel('models/gemini-1.5-flash')
 
 
-def calculate_angle(p1, p2, p3):
-    """Üç eklem noktasının (p1, p2, p3) arasındaki açıyı derece cinsinden hesaplar."""
-    if not p1 or not p2 or not p3:
-        return None
-
-    # Landmark koordinatlarını al
-    v1 = (p1['x'] - p2['x'], p1['y'] - p2['y'])
-    v2 = (p3['x'] - p2['x'], p3['y'] - p2['y'])
-
-    # Vektörler arasındaki açıyı hesapla
-    dot_product = v1[0] * v2[0] + v1[1] * v2[1]
-    magnitude_v1 = math.sqrt(v1[0] ** 2 + v1[1] ** 2)
-    magnitude_v2 = math.sqrt(v2[0] ** 2 + v2[1] ** 2)
-
-    if magnitude_v1 == 0 or magnitude_v2 == 0:
-        return None
-
-    # Cosinüs teorisi ile açıyı bul
-    angle = math.acos(dot_product / (magnitude_v1 * magnitude_v2))
-
-    # Radyanı dereceye çevir
-    return math.degrees(angle)
-
-
 @app.route('/')
 def home():
     """Sunucunun çalışıp çalışmadığını kontrol etmek için basit bir yanıt."""
@@ -98,29 +76,11 @@ def evaluate_pose():
     print("\n----------------------------------")
     print("Poz Değerlendirme İsteği Alındı.")
 
-    # YORUM: Anahtar açıları hesapla
-    # Python tarafında koordinatlara doğrudan erişim için sözlük yapısını kullanıyoruz
-    user_angles = {
-        'right_elbow': calculate_angle(user_pose[11], user_pose[13], user_pose[15]),
-        'left_elbow': calculate_angle(user_pose[12], user_pose[14], user_pose[16]),
-        'right_shoulder': calculate_angle(user_pose[13], user_pose[11], user_pose[23]),
-        'left_shoulder': calculate_angle(user_pose[14], user_pose[12], user_pose[24]),
-        'right_knee': calculate_angle(user_pose[23], user_pose[25], user_pose[27]),
-        'left_knee': calculate_angle(user_pose[24], user_pose[26], user_pose[28]),
-        'right_hip': calculate_angle(user_pose[11], user_pose[23], user_pose[25]),
-        'left_hip': calculate_angle(user_pose[12], user_pose[24], user_pose[26])
-    }
-
-    reference_angles = {
-        'right_elbow': calculate_angle(reference_pose[11], reference_pose[13], reference_pose[15]),
-        'left_elbow': calculate_angle(reference_pose[12], reference_pose[14], reference_pose[16]),
-        'right_shoulder': calculate_angle(reference_pose[13], reference_pose[11], reference_pose[23]),
-        'left_shoulder': calculate_angle(reference_pose[14], reference_pose[12], reference_pose[24]),
-        'right_knee': calculate_angle(reference_pose[23], reference_pose[25], reference_pose[27]),
-        'left_knee': calculate_angle(reference_pose[24], reference_pose[26], reference_pose[28]),
-        'right_hip': calculate_angle(reference_pose[11], reference_pose[23], reference_pose[25]),
-        'left_hip': calculate_angle(reference_pose[12], reference_pose[24], reference_pose[26])
-    }
+    # YORUM: Anahtar açıları iki poz için tek seferde (vektörel) hesapla
+    pose_arrays = np.stack([landmarks_to_array(user_pose), landmarks_to_array(reference_pose)])
+    user_angle_row, reference_angle_row = compute_angles(pose_arrays, FEEDBACK_ANGLES)
+    user_angles = angles_to_dict(user_angle_row, FEEDBACK_ANGLES)
+    reference_angles = angles_to_dict(reference_angle_row, FEEDBACK_ANGLES)
 
     # YORUM: Yeni, daha kısa ve rol tabanlı bir prompt oluştur
     prompt = f"""
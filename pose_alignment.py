@@ -0,0 +1,111 @@
+from collections import deque
+
+import numpy as np
+
+# Hizalamada tutulacak son kullanıcı karesi sayısı
+DEFAULT_WINDOW_FRAMES = 30
+
+# Her kullanıcı karesinin eşlenebileceği referans aralığı: beklenen karenin ± bu kadar karesi
+# (30 FPS referansta 15 kare = ±500 ms)
+DEFAULT_BAND_FRAMES = 15
+
+# Hesaplanamayan açı için kullanılan fark (calculatePoseSimilarity ile aynı)
+MISSING_ANGLE_COST = 180.0
+
+
+def frame_costs(angle_row, reference_rows):
+    """
+    Bir kullanıcı karesinin (A,) açılarının referans karelere (R, A) uzaklığı: eklem başına ortalama mutlak fark.
+    Hesaplanamayan açılar MISSING_ANGLE_COST sayılır. Döndürür: (R,)
+    """
+    diffs = np.abs(np.asarray(reference_rows, dtype=np.float64) - np.asarray(angle_row, dtype=np.float64))
+    return np.where(np.isnan(diffs), MISSING_ANGLE_COST, diffs).mean(axis=1)
+
+
+def cost_to_score(mean_cost):
+    """Ortalama açı farkını 0-100 arası skora çevirir (1 - fark / 180)."""
+    return int(np.floor(np.clip(1.0 - mean_cost / MISSING_ANGLE_COST, 0.0, 1.0) * 100))
+
+
+class StreamingAligner:
+    """
+    Kullanıcının son `window` karesini referans ize bantlı (Sakoe-Chiba) DTW ile hizalar.
+
+    Her kullanıcı karesi sadece zamanına göre beklenen referans karesinin ± band aralığıyla eşlenebilir.
+    Bir karenin bu aralığa olan maliyetleri kare geldiğinde bir kez hesaplanır ve saklanır;
+    her güncellemede sadece pencere üzerindeki DP yeniden yapılır: O(window · band).
+
+    Hizalama açık başlangıçlı ve açık bitişlidir (pencere referansın herhangi bir yerinden başlayıp
+    bitebilir) ve monotondur: ardışık kullanıcı kareleri referansta geri gidemez.
+    Kullanıcı kare hızı referanstan farklı olabilir (ör. 2 Hz istekler, 30 FPS referans).
+    """
+
+    def __init__(self, reference_angles, reference_times_ms, window=DEFAULT_WINDOW_FRAMES, band=DEFAULT_BAND_FRAMES):
+        self.reference_angles = np.asarray(reference_angles, dtype=np.float64)
+        self.reference_times_ms = np.asarray(reference_times_ms, dtype=np.float64)
+        self.window = window
+        self.band = band
+        # Her eleman: (beklenen referans indeksi, bant başlangıcı, bant maliyetleri, kullanıcı zamanı)
+        self._rows = deque(maxlen=window)
+
+    def reset(self):
+        self._rows.clear()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def expected_index(self, timestamp_ms):
+        """Zamana göre beklenen (en yakın) referans kare indeksi."""
+        times = self.reference_times_ms
+        i = int(np.searchsorted(times, timestamp_ms))
+        if i <= 0:
+            return 0
+        if i >= len(times):
+            return len(times) - 1
+        return i if times[i] - timestamp_ms < timestamp_ms - times[i - 1] else i - 1
+
+    def update(self, timestamp_ms, angle_row):
+        """
+        Yeni bir kullanıcı karesi ekler ve pencerenin hizalamasını döndürür:
+        score (zamanlama toleranslı), strict_score (sadece beklenen kareyle), lag_ms (pozitif = kullanıcı geride),
+        reference_index (son karenin eşlendiği referans karesi) ve frames (penceredeki kare sayısı).
+        """
+        expected = self.expected_index(timestamp_ms)
+        lo = max(0, expected - self.band)
+        hi = min(len(self.reference_angles), expected + self.band + 1)
+        costs = frame_costs(angle_row, self.reference_angles[lo:hi])
+        self._rows.append((expected, lo, costs, float(timestamp_ms)))
+
+        total, end_index, path_frames = self._align()
+        return {
+            "score": cost_to_score(total / path_frames),
+            "strict_score": cost_to_score(costs[expected - lo]),
+            "lag_ms": float(timestamp_ms - self.reference_times_ms[end_index]),
+            "reference_index": end_index,
+            "frames": len(self._rows),
+        }
+
+    def _align(self):
+        """
+        Pencere üzerinde DP. Döndürür: (en iyi yolun toplam maliyeti, son karenin eşlendiği referans indeksi,
+        yoldaki kullanıcı karesi sayısı).
+        """
+        rows = iter(self._rows)
+        _, prev_lo, accumulated, _ = next(rows)  # Açık başlangıç: ilk kare bandın her yerinden başlayabilir
+        path_frames = 1
+        for _, lo, costs, _ in rows:
+            # Monotonluk: referans indeksi j'ye, önceki satırda j' <= j olan en ucuz hücreden gelinir
+            prefix_min = np.minimum.accumulate(accumulated)
+            columns = np.arange(lo, lo + len(costs))
+            source = np.minimum(columns, prev_lo + len(accumulated) - 1) - prev_lo
+            best_previous = np.where(source >= 0, prefix_min[np.clip(source, 0, None)], np.inf)
+            accumulated = costs + best_previous
+            path_frames += 1
+            if np.isinf(accumulated).all():
+                # Kullanıcı geri sardı (bantlar örtüşmüyor): hizalamayı bu kareden yeniden başlat
+                accumulated = costs
+                path_frames = 1
+            prev_lo = lo
+
+        end = int(np.argmin(accumulated))  # Açık bitiş
+        return float(accumulated[end]), prev_lo + end, path_frames
@@ -0,0 +1,163 @@
+import numpy as np
+
+# MediaPipe Pose her kare için 33 landmark döndürür.
+NUM_LANDMARKS = 33
+
+# Her landmark için saklanan değerler: x, y, z, visibility
+LANDMARK_FIELDS = ('x', 'y', 'z', 'visibility')
+
+# Açı tanımları veya hesaplama kuralları değiştiğinde artırılmalıdır.
+# Çıkarım önbelleği bu sürüm değişince tüm videoları yeniden işler.
+ANGLE_SET_VERSION = 1
+
+# JSON dosyalarına ve istemci yanıtlarına yazılırken hesaplanamayan açıların (ve eksik landmark değerlerinin)
+# yerine yazılan değer. Eski çıkarıcılar tanımsız açı için 0.0 yazıyordu; istemciler her zaman sayı bekler.
+# Bellekteki dizilerde ve ikili (.dtrk) izlerde eksik değerler NaN olarak kalır.
+JSON_MISSING_VALUE = 0.0
+
+# MediaPipe PoseLandmark indeksleri (mediapipe'ı import etmeden kullanabilmek için)
+NOSE = 0
+LEFT_EAR = 7
+RIGHT_EAR = 8
+MOUTH_LEFT = 9
+MOUTH_RIGHT = 10
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+
+class AngleTable:
+    """
+    Açı adlarını ve her açının (a, b, c) landmark üçlüsünü tutar.
+    Açı her zaman b noktasında, b->a ve b->c vektörleri arasında ölçülür.
+    """
+
+    def __init__(self, triples):
+        self.names = tuple(name for name, _ in triples)
+        self.triples = np.array([ids for _, ids in triples], dtype=np.intp).reshape(-1, 3)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        return self._positions[name]
+
+    def subset(self, names):
+        """Sadece verilen açıları (verilen sırayla) içeren yeni bir tablo döndürür."""
+        return AngleTable([(name, tuple(self.triples[self.index(name)])) for name in names])
+
+
+# Referans videolardan çıkarılan açılar (general_jsonmaker_withangle.py, json_datas/*.json)
+REFERENCE_ANGLES = AngleTable([
+    ("left_elbow_angle", (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)),
+    ("left_shoulder_angle", (LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP)),
+    ("left_hip_angle", (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE)),
+    ("left_knee_angle", (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)),
+    ("left_neck_angle", (LEFT_SHOULDER, NOSE, LEFT_EAR)),
+
+    ("right_elbow_angle", (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST)),
+    ("right_shoulder_angle", (RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP)),
+    ("right_hip_angle", (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE)),
+    ("right_knee_angle", (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE)),
+    ("right_neck_angle", (RIGHT_SHOULDER, NOSE, RIGHT_EAR)),
+])
+
+# Zeybek açı seti (JSON_maker.py, zeybek.json)
+ZEYBEK_ANGLES = AngleTable([
+    ("left_inner_arm_angle", (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)),
+    ("left_armpit_angle", (LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP)),
+    ("left_waist_angle", (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE)),
+    ("left_leg_angle", (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)),
+    ("left_neck_angle", (LEFT_EAR, MOUTH_LEFT, LEFT_SHOULDER)),
+
+    ("right_inner_arm_angle", (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST)),
+    ("right_armpit_angle", (RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP)),
+    ("right_waist_angle", (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE)),
+    ("right_leg_angle", (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE)),
+    ("right_neck_angle", (RIGHT_EAR, MOUTH_RIGHT, RIGHT_SHOULDER)),
+])
+
+# Backend geri bildirim açıları (/evaluate_pose).
+# Kamera görüntüsü ayna olduğu için isimler MediaPipe'ın sol/sağ tanımının tersidir.
+FEEDBACK_ANGLES = AngleTable([
+    ("right_elbow", (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)),
+    ("left_elbow", (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST)),
+    ("right_shoulder", (LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP)),
+    ("left_shoulder", (RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP)),
+    ("right_knee", (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)),
+    ("left_knee", (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE)),
+    ("right_hip", (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE)),
+    ("left_hip", (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE)),
+])
+
+
+def landmarks_to_array(landmarks, dtype=np.float64):
+    """
+    Tek bir karenin landmark listesini (33, 4) boyutlu bir diziye dönüştürür.
+    Hem MediaPipe landmark nesnelerini hem de {'x', 'y', 'z', 'visibility'} sözlüklerini kabul eder.
+    Eksik veya hatalı landmark'lar NaN olarak kalır.
+    """
+    arr = np.full((NUM_LANDMARKS, 4), np.nan, dtype=dtype)
+    for i, lm in enumerate(list(landmarks)[:NUM_LANDMARKS]):
+        try:
+            if isinstance(lm, dict):
+                arr[i] = (lm['x'], lm['y'], lm.get('z', 0.0), lm.get('visibility', 1.0))
+            else:
+                arr[i] = (lm.x, lm.y, lm.z, lm.visibility)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    return arr
+
+
+def compute_angles(landmarks, table):
+    """
+    Tablodaki tüm açıları tüm kareler için tek seferde (vektörel) hesaplar.
+
+    landmarks: (kare, 33, 4) veya tek kare için (33, 4) boyutlu dizi.
+    Dönüş: (kare, açı) veya (açı,) boyutlu, derece cinsinden dizi.
+
+    Açılar 2D (x, y) düzleminde arccos ile hesaplanır ve 0-180 derece arasındadır.
+    Sıfır uzunluklu vektörlerde veya eksik landmark'larda sonuç NaN olur.
+    """
+    pts = np.asarray(landmarks, dtype=np.float64)
+    single = pts.ndim == 2
+    if single:
+        pts = pts[np.newaxis]
+
+    xy = pts[..., :2]
+    a = xy[:, table.triples[:, 0]]
+    b = xy[:, table.triples[:, 1]]
+    c = xy[:, table.triples[:, 2]]
+
+    v1 = a - b
+    v2 = c - b
+    dot = np.einsum('fai,fai->fa', v1, v2)
+    norms = np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosines = np.clip(dot / norms, -1.0, 1.0)
+    angles = np.degrees(np.arccos(cosines))
+    angles[norms == 0] = np.nan
+
+    return angles[0] if single else angles
+
+
+def angles_to_dict(row, table, missing=None):
+    """
+    Tek bir karenin açı satırını {açı_adı: derece} sözlüğüne çevirir. NaN değerler missing olur
+    (JSON'a yazılacaksa JSON_MISSING_VALUE verilir).
+    """
+    return {
+        name: missing if np.isnan(value) else float(value)
+        for name, value in zip(table.names, row)
+    }
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+from pose_angles import NUM_LANDMARKS
+
+# One-Euro filtresi ayarları (koordinatlar 0-1 arası normalize, zaman saniye cinsinden):
+#   MIN_CUTOFF - durağan landmark'ların kesim frekansı (Hz); küçük değer = daha az titreme, daha fazla gecikme
+#   BETA       - hız arttıkça kesim frekansının artış katsayısı; büyük değer = hızlı harekette daha az gecikme
+#   D_CUTOFF   - hız tahmininin kesim frekansı (Hz)
+MIN_CUTOFF = 1.0
+BETA = 10.0
+D_CUTOFF = 1.0
+
+# Landmark hiç ölçülemediğinde (poz algılanamadı) veya aykırı değer olduğunda en fazla bu süre boyunca
+# tahminle doldurulur (ms). Daha uzun boşluklar uydurulmaz; landmark bir sonraki ölçümle yeniden başlar.
+MAX_GAP_MS = 300.0
+
+# Tahmin edilen konumdan tek karede bu kadar (normalize birim, x-y düzleminde) uzaklaşan ölçüm aykırı değer
+# sayılır (ör. MediaPipe'ın bir anlığına sol/sağ bileği karıştırması). Boşluk MAX_GAP_MS'i aşarsa kabul edilir.
+OUTLIER_DISTANCE = 0.25
+
+# Zaman damgası yoksa veya ilerlemiyorsa kullanılan kare aralığı (ms)
+DEFAULT_FRAME_MS = 1000.0 / 30.0
+
+# Poz algılanamayan kareler için filtreye verilen boş kare (salt okunur)
+MISSING_POSE = np.full((NUM_LANDMARKS, 4), np.nan)
+MISSING_POSE.flags.writeable = False
+
+
+def _alpha(cutoff, dt):
+    """Birinci dereceden alçak geçiren filtrenin katsayısı (cutoff Hz, dizi olabilir; dt saniye)."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class PoseFilter:
+    """
+    Tüm landmark'ları birlikte (vektörel) yumuşatan One-Euro filtresi. Durum (33, 3) dizilerde tutulur;
+    her kare sabit sürede işlenir. Kareler zaman sırasıyla tek tek verilir (akış ve çıkarım için).
+
+    - Düşük visibility'li ölçümler tahmine doğru çekilir: filtreye giren değer visibility ağırlıklıdır.
+    - Ölçülemeyen (NaN) veya aykırı landmark'lar MAX_GAP_MS boyunca son hızla tahmin edilerek doldurulur;
+      doldurulan landmark'ların visibility değeri 0 olur (kalite skorları bu kareleri güvenilir saymaz).
+    """
+
+    def __init__(self, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF, max_gap_ms=MAX_GAP_MS,
+                 outlier_distance=OUTLIER_DISTANCE):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap_ms = max_gap_ms
+        self.outlier_distance = outlier_distance
+        self.reset()
+
+    def reset(self):
+        """Yeni bir video/oturum için durumu temizler."""
+        self._position = np.full((NUM_LANDMARKS, 3), np.nan)  # NaN = landmark için durum yok
+        self._velocity = np.zeros((NUM_LANDMARKS, 3))
+        self._gap_ms = np.zeros(NUM_LANDMARKS)  # Son kabul edilen ölçümden beri geçen süre
+        self._last_timestamp = None
+
+    def _frame_seconds(self, timestamp_ms):
+        dt_ms = DEFAULT_FRAME_MS
+        if timestamp_ms is not None and not math.isnan(timestamp_ms):
+            if self._last_timestamp is not None and timestamp_ms > self._last_timestamp:
+                dt_ms = timestamp_ms - self._last_timestamp
+            self._last_timestamp = timestamp_ms
+        return dt_ms / 1000.0
+
+    def filter(self, landmarks, timestamp_ms=None):
+        """
+        landmarks: (33, 4) dizi (x, y, z, visibility); poz yoksa tamamen NaN olabilir.
+        Döndürür: yumuşatılmış (33, 4) float32 dizi. Doldurulamayan landmark'lar NaN kalır.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float64).reshape(NUM_LANDMARKS, 4)
+        coords, visibility = landmarks[:, :3], landmarks[:, 3]
+        dt = self._frame_seconds(timestamp_ms)
+
+        has_state = ~np.isnan(self._position[:, 0])
+        measured = ~np.isnan(coords).any(axis=1)
+        predicted = self._position + self._velocity * dt
+
+        # Aykırı değer: tahminden çok uzak ölçüm (boşluk çok uzamadıysa)
+        with np.errstate(invalid='ignore'):
+            jump = np.hypot(coords[:, 0] - predicted[:, 0], coords[:, 1] - predicted[:, 1])
+            outlier = measured & has_state & (jump > self.outlier_distance) & (self._gap_ms < self.max_gap_ms)
+        accepted = measured & ~outlier
+
+        # Visibility ağırlıklı ölçüm: görünürlüğü düşük landmark tahmine yakın kalır
+        weight = np.clip(np.nan_to_num(visibility, nan=1.0), 0.0, 1.0)[:, None]
+        target = np.where(has_state[:, None], weight * coords + (1 - weight) * predicted, coords)
+
+        # One-Euro: önce hız yumuşatılır, kesim frekansı yumuşatılmış hıza göre seçilir
+        raw_velocity = np.where(has_state[:, None], (target - self._position) / dt, 0.0)
+        velocity = self._velocity + _alpha(self.d_cutoff, dt) * (raw_velocity - self._velocity)
+        cutoff = self.min_cutoff + self.beta * np.hypot(velocity[:, 0], velocity[:, 1])
+        alpha = _alpha(cutoff, dt)[:, None]
+        smoothed = np.where(has_state[:, None], self._position + alpha * (target - self._position), coords)
+
+        # Ölçüm yoksa veya aykırıysa: boşluk süresince tahminle doldur, sonra landmark'ı bırak
+        gap_ms = np.where(accepted, 0.0, self._gap_ms + dt * 1000.0)
+        filled = ~accepted & has_state & (gap_ms <= self.max_gap_ms)
+        expired = ~accepted & ~filled
+
+        self._position = np.where(accepted[:, None], smoothed, np.where(filled[:, None], predicted, np.nan))
+        self._velocity = np.where(accepted[:, None], velocity, np.where(filled[:, None], self._velocity, 0.0))
+        self._gap_ms = np.where(expired, 0.0, gap_ms)
+
+        result = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        result[:, :3] = self._position
+        result[:, 3] = np.where(accepted, visibility, np.where(filled, 0.0, np.nan))
+        # Aykırı sayılıp süresi dolan landmark'lar için ölçüm olduğu gibi kullanılır ve filtre oradan başlar
+        restart = expired & measured
+        if restart.any():
+            self._position[restart] = coords[restart]
+            result[restart] = landmarks[restart]
+        return result
+
+
+def is_missing(landmarks):
+    """Filtre çıktısında hiç landmark kalmadıysa (poz yok ve doldurulamadı) True."""
+    return bool(np.isnan(landmarks[:, 0]).all())
+
+
+def smooth_landmarks(landmarks, timestamps_ms=None, **options):
+    """
+    Bir izin tüm karelerini (N, 33, 4) sırayla filtreden geçirir (ör. kaydedilmiş izlerin skorlanmasından önce).
+    options: PoseFilter ayarları.
+    """
+    landmarks = np.asarray(landmarks)
+    pose_filter = PoseFilter(**options)
+    smoothed = np.empty(landmarks.shape, dtype=np.float32)
+    for i in range(len(landmarks)):
+        timestamp_ms = None if timestamps_ms is None else float(timestamps_ms[i])
+        smoothed[i] = pose_filter.filter(landmarks[i], timestamp_ms)
+    return smoothed
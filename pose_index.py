@@ -0,0 +1,198 @@
+import heapq
+
+import numpy as np
+
+from pose_angles import (FEEDBACK_ANGLES, LEFT_ANKLE, LEFT_HIP, LEFT_SHOULDER, LEFT_WRIST, RIGHT_ANKLE, RIGHT_HIP,
+                         RIGHT_SHOULDER, RIGHT_WRIST, compute_angles)
+
+# Özellik vektörüne eklenen uç noktalar: aynı eklem açılarıyla farklı duruşları (kol yukarıda / önde) ayırır
+FEATURE_LANDMARKS = (LEFT_WRIST, RIGHT_WRIST, LEFT_ANKLE, RIGHT_ANKLE)
+
+# Kalçaya göre konumlar gövde boyuyla normalize edilir; 1 gövde boyu bu kadar derecelik açı farkı sayılır
+LANDMARK_SCALE_DEGREES = 90.0
+
+FEATURE_SIZE = len(FEEDBACK_ANGLES.names) + 2 * len(FEATURE_LANDMARKS)
+
+# Bir yapraktaki en fazla kare sayısı. Yapraklar numpy ile tek seferde taranır.
+LEAF_SIZE = 32
+
+# Pencere sorgusunda, son kareye en yakın bu kadar aday tüm pencereyle yeniden sıralanır
+WINDOW_CANDIDATES = 64
+
+
+def pose_features(landmarks):
+    """
+    (N, 33, 4) landmark dizisinden (N, D) özellik vektörleri: geri bildirim açıları (derece) ve kalça merkezine
+    göre, gövde boyuyla ölçeklenmiş bilek/ayak bileği konumları. Hesaplanamayan değerler NaN olur.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64).reshape(-1, 33, 4)
+    angles = compute_angles(landmarks, FEEDBACK_ANGLES)
+
+    xy = landmarks[:, :, :2]
+    hip_center = (xy[:, LEFT_HIP] + xy[:, RIGHT_HIP]) / 2
+    shoulder_center = (xy[:, LEFT_SHOULDER] + xy[:, RIGHT_SHOULDER]) / 2
+    torso = np.linalg.norm(shoulder_center - hip_center, axis=1)
+    torso = np.where(torso > 1e-6, torso, np.nan)
+    relative = (xy[:, FEATURE_LANDMARKS] - hip_center[:, None]) / torso[:, None, None]
+    relative = relative.reshape(len(landmarks), 2 * len(FEATURE_LANDMARKS))  # Boş pencerede de (0, 8)
+    return np.concatenate((angles, relative * LANDMARK_SCALE_DEGREES), axis=1)
+
+
+class PoseIndex:
+    """
+    Tüm referans danslarının tüm karelerinin özellik vektörleri üzerinde KD-ağacı.
+    Sorgu, kütüphane büyüdükçe doğrusal değil yaklaşık logaritmik büyür; sonuçlar kesindir (yaklaşık değil).
+
+    Düğümler numpy dizilerinde tutulur (sınır kutuları, çocuklar, yaprak aralıkları); sorgu en yakın kutudan
+    başlayarak (best-first) ilerler ve k. en yakın mesafeden uzak kutuları atlar.
+    """
+
+    def __init__(self, leaf_size=LEAF_SIZE):
+        self.leaf_size = leaf_size
+        self.dance_ids = []
+        self.frame_offsets = np.zeros(1, dtype=np.int64)  # Dans i'nin kareleri [offsets[i], offsets[i+1])
+        self.features = np.zeros((0, 0))
+        self._dances = []
+
+    @classmethod
+    def from_references(cls, references, leaf_size=LEAF_SIZE):
+        """references: DanceReference nesneleri (ör. ReferenceStore.dances.values())."""
+        index = cls(leaf_size)
+        index.build(references)
+        return index
+
+    def __len__(self):
+        return len(self.features)
+
+    def build(self, references):
+        self._dances = list(references)
+        self.dance_ids = [dance.dance_id for dance in self._dances]
+        blocks = [pose_features(dance.ordered_landmarks()) for dance in self._dances]
+        self.frame_offsets = np.concatenate(([0], np.cumsum([len(block) for block in blocks]))).astype(np.int64)
+        features = np.concatenate(blocks) if blocks else np.zeros((0, FEATURE_SIZE))
+
+        # Referanstaki eksik değerler sütun medyanıyla doldurulur (ağaçta NaN olamaz)
+        medians = np.zeros(FEATURE_SIZE)
+        known = ~np.isnan(features).all(axis=0)
+        if len(features) and known.any():
+            medians[known] = np.nanmedian(features[:, known], axis=0)
+        features = self.features = np.where(np.isnan(features), medians, features)
+
+        self._order = np.arange(len(features))
+        self._lower, self._upper, self._children, self._ranges = [], [], [], []
+        if len(features):
+            self._build_node(0, len(features))
+        self._lower = np.array(self._lower)
+        self._upper = np.array(self._upper)
+        self._points = features[self._order]
+        return self
+
+    def _build_node(self, start, stop):
+        node = len(self._ranges)
+        points = self.features[self._order[start:stop]]
+        self._lower.append(points.min(axis=0))
+        self._upper.append(points.max(axis=0))
+        self._ranges.append((start, stop))
+        self._children.append(None)
+        if stop - start <= self.leaf_size:
+            return node
+
+        # En geniş boyutta medyandan böl
+        dim = int(np.argmax(self._upper[node] - self._lower[node]))
+        middle = (start + stop) // 2
+        segment = self._order[start:stop]
+        self._order[start:stop] = segment[np.argpartition(self.features[segment, dim], middle - start)]
+        self._children[node] = (self._build_node(start, middle), self._build_node(middle, stop))
+        return node
+
+    def _box_distance(self, node, query, present):
+        gap = np.maximum(self._lower[node] - query, 0.0) + np.maximum(query - self._upper[node], 0.0)
+        return float(np.dot(gap[present], gap[present]))
+
+    def nearest(self, query, k=5):
+        """
+        Tek bir özellik vektörüne en yakın k kare: [(küresel kare indeksi, kare başına karesel mesafe), ...].
+        Sorgudaki NaN boyutlar mesafeye katılmaz.
+        """
+        query = np.asarray(query, dtype=np.float64)
+        present = ~np.isnan(query)
+        if not len(self) or not present.any():
+            return []
+        query = np.where(present, query, 0.0)
+        dims = present.sum()
+
+        best = []  # (-mesafe, indeks) en büyük yığını; en uzak aday başta
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            children = self._children[node]
+            if children is None:
+                start, stop = self._ranges[node]
+                diffs = self._points[start:stop][:, present] - query[present]
+                distances = np.einsum('ij,ij->i', diffs, diffs)
+                for i in np.argsort(distances)[:k]:
+                    item = (-float(distances[i]), int(self._order[start + i]))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item[0] > best[0][0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+                continue
+            for child in children:
+                child_bound = self._box_distance(child, query, present)
+                if len(best) < k or child_bound < -best[0][0]:
+                    heapq.heappush(heap, (child_bound, child))
+        return sorted(((index, -distance / dims) for distance, index in best), key=lambda item: item[1])
+
+    def locate(self, index):
+        """Küresel kare indeksini (dans, dans içi kare indeksi) çiftine çevirir."""
+        dance_index = int(np.searchsorted(self.frame_offsets, index, side='right')) - 1
+        return self._dances[dance_index], int(index - self.frame_offsets[dance_index])
+
+    def _describe(self, index, distance):
+        dance, frame_index = self.locate(index)
+        return {
+            'dance_id': dance.dance_id,
+            'frame_number': dance.frame_number(frame_index),
+            'timestamp_ms': float(dance.times_ms[frame_index]),
+            'distance': float(np.sqrt(distance)),  # Boyut başına ortalama fark (yaklaşık derece)
+        }
+
+    def query(self, landmarks, k=5):
+        """Tek bir poza ((33, 4) landmark) en yakın k referans karesi."""
+        features = pose_features(landmarks)[0]
+        return [self._describe(index, distance) for index, distance in self.nearest(features, k)]
+
+    def query_window(self, landmarks, k=5):
+        """
+        Kısa bir poz penceresine ((W, 33, 4), en eski kare başta) en çok benzeyen k referans konumu.
+        Son kareye en yakın WINDOW_CANDIDATES aday alınır ve her aday, referansta ondan önceki W - 1 kareyle
+        birlikte tüm pencerenin ortalama mesafesine göre yeniden sıralanır. Dönen kare, pencerenin son karesidir.
+        """
+        features = pose_features(landmarks)
+        window = len(features)
+        if window == 0:
+            return []
+        candidates = np.array([index for index, _ in self.nearest(features[-1], max(k, WINDOW_CANDIDATES))],
+                              dtype=np.int64)
+        if len(candidates) == 0:
+            return []
+
+        # Adayların pencere kareleri: aday - (W - 1) ... aday; dans başlangıcından önceye taşanlar atlanır
+        offsets = np.arange(-(window - 1), 1)
+        positions = candidates[:, None] + offsets[None, :]
+        starts = self.frame_offsets[np.searchsorted(self.frame_offsets, candidates, side='right') - 1]
+        valid = positions >= starts[:, None]
+        diffs = self.features[np.maximum(positions, 0)] - features[None, :, :]
+        squared = np.where(np.isnan(diffs), 0.0, diffs ** 2)
+        counts = (~np.isnan(diffs)).sum(axis=2)
+        per_frame = np.divide(squared.sum(axis=2), counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+        scored = valid & ~np.isnan(per_frame)
+        frames = scored.sum(axis=1)
+        totals = np.where(scored, per_frame, 0.0).sum(axis=1)
+        scores = np.divide(totals, frames, out=np.full(len(candidates), np.inf), where=frames > 0)
+        ranked = np.argsort(scores, kind='stable')[:k]
+        return [self._describe(int(candidates[i]), float(scores[i])) for i in ranked if np.isfinite(scores[i])]
@@ -0,0 +1,93 @@
+import base64
+import binascii
+
+import numpy as np
+
+from pose_angles import NUM_LANDMARKS
+
+# Düz kodlamada bir karedeki sayı adedi: 33 landmark x (x, y, z, visibility)
+FLAT_POSE_SIZE = NUM_LANDMARKS * 4
+
+# Liste biçimlerinde kabul edilen değer tipleri (JSON sayıları ve eksik değer için null).
+# Tam tip karşılaştırması yapılır: bool ve "0.5" gibi metinler sayı sayılmaz.
+_VALUE_TYPES = frozenset((int, float, type(None)))
+
+
+class PosePayloadError(ValueError):
+    """İstekteki poz verisi eksik veya geçersiz."""
+
+
+def parse_pose(payload):
+    """
+    İstekteki tek bir poz verisini (33, 4) boyutlu float32 diziye dönüştürür ve doğrular.
+
+    Kabul edilen biçimler:
+      - 33 landmark sözlüğü listesi: [{"x", "y", "z", "visibility"}, ...] (eski biçim)
+      - düz sayı listesi: [x0, y0, z0, v0, x1, ...] (132 sayı)
+      - iç içe liste: [[x0, y0, z0, v0], ...]
+      - base64 ile kodlanmış little-endian float32 dizi (528 bayt)
+    Eksik değerler (None) NaN olur; sayı olmayan değerler (metin, bool), sonsuz değerler ve yanlış
+    boyutlar PosePayloadError fırlatır.
+    """
+    if isinstance(payload, str):
+        try:
+            raw = base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            raise PosePayloadError("Poz verisi geçerli base64 değil")
+        if len(raw) != FLAT_POSE_SIZE * 4:
+            raise PosePayloadError(f"base64 poz verisi {FLAT_POSE_SIZE} float32 ({FLAT_POSE_SIZE * 4} bayt) olmalıdır")
+        pose = np.frombuffer(raw, dtype='<f4').astype(np.float32).reshape(NUM_LANDMARKS, 4)
+    elif isinstance(payload, list) and payload and isinstance(payload[0], dict):
+        if len(payload) < NUM_LANDMARKS:
+            raise PosePayloadError(f"Poz verisi en az {NUM_LANDMARKS} landmark içermelidir")
+        pose = _dicts_to_array(payload[:NUM_LANDMARKS])
+    elif isinstance(payload, list) and payload:
+        if isinstance(payload[0], list):
+            if len(payload) != NUM_LANDMARKS or any(not isinstance(row, list) or len(row) != 4 for row in payload):
+                raise PosePayloadError(f"İç içe poz verisi {NUM_LANDMARKS} adet 4 sayılık liste içermelidir")
+        elif len(payload) != FLAT_POSE_SIZE:
+            raise PosePayloadError(f"Düz poz verisi {FLAT_POSE_SIZE} sayı içermelidir")
+        pose = _numbers_to_array(payload).reshape(NUM_LANDMARKS, 4)
+    else:
+        raise PosePayloadError("Eksik veya geçersiz poz verisi")
+
+    # Doğrulama tek seferde: NaN (eksik landmark) serbest, sonsuz değer geçersiz
+    if np.isinf(pose).any():
+        raise PosePayloadError("Poz verisi sonsuz değer içeremez")
+    return pose
+
+
+def _numbers_to_array(values):
+    """Sayı/None listesini (iç içe olabilir) float32 diziye çevirir; None NaN olur, diğer tipler hatadır."""
+    array = np.array(values, dtype=object)
+    if not set(map(type, array.ravel().tolist())) <= _VALUE_TYPES:
+        raise PosePayloadError("Poz verisi sayısal olmalıdır")
+    try:
+        return array.astype(np.float32)
+    except OverflowError:
+        raise PosePayloadError("Poz verisi sonsuz değer içeremez")
+
+
+def _dicts_to_array(landmarks):
+    # Sözlük olmayan landmark'lar ve eksik anahtarlar NaN olur; değerler düz listedeki gibi doğrulanır
+    return _numbers_to_array([(lm.get('x'), lm.get('y'), lm.get('z', 0.0), lm.get('visibility', 1.0))
+                              if isinstance(lm, dict) else (None, None, None, None) for lm in landmarks])
+
+
+def parse_pose_or_missing(payload):
+    """parse_pose gibi; ama poz yoksa (kişi kamerada görünmüyorsa) tamamen NaN bir kare döndürür."""
+    if payload is None or (isinstance(payload, (list, str)) and not payload):
+        return np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    return parse_pose(payload)
+
+
+def parse_poses(payloads):
+    """Birden fazla poz verisini (N, 33, 4) boyutlu tek bir diziye dönüştürür. Eksik pozlar NaN olur."""
+    if not payloads:
+        return np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return np.stack([parse_pose_or_missing(payload) for payload in payloads])
+
+
+def encode_pose(pose):
+    """(33, 4) diziyi base64 float32 biçimine kodlar (istemci ve yük testleri için)."""
+    return base64.b64encode(np.asarray(pose, dtype='<f4').tobytes()).decode('ascii')
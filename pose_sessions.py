@@ -0,0 +1,186 @@
+import json
+import queue
+import secrets
+import threading
+import time
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES, compute_angles
+from pose_payload import parse_poses
+from pose_alignment import StreamingAligner
+from local_feedback import feedback_from_errors
+from pose_filter import PoseFilter
+
+# Bu süre boyunca kare gelmeyen oturumlar silinir (saniye)
+SESSION_IDLE_SECONDS = 300.0
+
+# Süresi dolan oturumlar en fazla bu aralıkla (oturum açılırken veya okunurken) taranır (saniye)
+SESSION_SWEEP_SECONDS = 10.0
+
+# Skor yumuşatma katsayısı (üstel hareketli ortalama; büyük değer = daha hızlı tepki)
+SCORE_SMOOTHING = 0.2
+
+# Yumuşatılmış skor en az bu kadar değişmeden (veya geri bildirim değişmeden) istemciye olay gönderilmez
+SCORE_CHANGE_THRESHOLD = 2
+
+# İstemci olayları okumazsa kuyrukta tutulacak en fazla olay (eskiler atılır)
+MAX_PENDING_EVENTS = 64
+
+# Olay akışında bağlantıyı canlı tutmak için yorum satırı gönderme aralığı (saniye)
+KEEPALIVE_SECONDS = 15.0
+
+# Gelen pozlar skorlanmadan önce One-Euro filtresinden geçirilir (titreyen skor ve kısa poz kayıpları için)
+SMOOTH_POSES = True
+
+
+class PoseSession:
+    """
+    Bir öğrencinin canlı akış oturumu: seçili dans, hizalayıcı (kayan açı penceresi), yumuşatılmış skor
+    ve istemciye gönderilmeyi bekleyen olaylar. Kareler gelişi sırasında tek tek işlenir.
+    """
+
+    def __init__(self, session_id, dance):
+        self.session_id = session_id
+        self.dance = dance
+        self.aligner = StreamingAligner(dance.feedback_angles, dance.times_ms)
+        self.pose_filter = PoseFilter() if SMOOTH_POSES else None
+        self.smoothed_score = None
+        self.frames = 0
+        self.last_activity = time.monotonic()
+        self.closed = False
+
+        self._last_event = None  # (yuvarlanmış skor, geri bildirim)
+        self._events = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+        self._lock = threading.Lock()
+
+    def add_frames(self, frames):
+        """
+        frames: [{"timestamp_ms": ..., "user_pose": ...}, ...] (dansın başından itibaren ms; poz biçimleri
+        için bkz. pose_payload.parse_pose). Geçersiz pozda PosePayloadError (ValueError) fırlatılır.
+        Açılar tüm kareler için tek seferde hesaplanır; skor/geri bildirim değiştiyse olay kuyruğa eklenir.
+        Döndürür: kuyruğa eklenen olay sayısı.
+        """
+        timestamps = [float(frame['timestamp_ms']) for frame in frames]
+        if not np.isfinite(timestamps).all():
+            raise ValueError("timestamp_ms sonlu bir sayı olmalıdır")
+        poses = parse_poses([frame.get('user_pose') for frame in frames])
+        published = 0
+        with self._lock:
+            self.last_activity = time.monotonic()
+            if self.pose_filter is not None and len(poses):
+                poses = np.stack([self.pose_filter.filter(pose, timestamp_ms)
+                                  for pose, timestamp_ms in zip(poses, timestamps)])
+            user_rows = compute_angles(poses, FEEDBACK_ANGLES)
+            for timestamp_ms, user_row in zip(timestamps, user_rows):
+                published += self._process(timestamp_ms, user_row)
+        return published
+
+    def _process(self, timestamp_ms, user_row):
+        self.frames += 1
+        alignment = self.aligner.update(timestamp_ms, user_row)
+        if self.smoothed_score is None:
+            self.smoothed_score = float(alignment['score'])
+        else:
+            self.smoothed_score += SCORE_SMOOTHING * (alignment['score'] - self.smoothed_score)
+
+        # Geri bildirim, zamanlama farkı düzeltilmiş (hizalanan) referans karesine göre verilir
+        signed_errors = (user_row - self.dance.feedback_angles[alignment['reference_index']]).tolist()
+        local_result = feedback_from_errors(signed_errors, alignment['score'])
+
+        score = int(round(self.smoothed_score))
+        if self._last_event is not None and (abs(score - self._last_event[0]) < SCORE_CHANGE_THRESHOLD
+                                             and local_result['feedback'] == self._last_event[1]):
+            return 0
+
+        self._last_event = (score, local_result['feedback'])
+        self._publish({
+            'score': score,
+            'strict_score': alignment['strict_score'],
+            'lag_ms': alignment['lag_ms'],
+            'feedback': local_result['feedback'],
+            'worst_joint': local_result['worst_joint'],
+            'frame': self.frames,
+        })
+        return 1
+
+    def _publish(self, event):
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()  # İstemci yavaşsa en eski olayı at; en güncel skor önemli
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self.closed = True
+        self._publish(None)  # Olay akışını sonlandır
+
+    def event_stream(self):
+        """Server-Sent Events biçiminde olay üretir (Flask Response ile kullanılır)."""
+        yield "retry: 2000\n\n"
+        while not self.closed:
+            try:
+                event = self._events.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                break
+            yield f"event: score\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class SessionManager:
+    """
+    Canlı akış oturumlarını tutar; uzun süre kare gelmeyen oturumları siler. Tarama oturum açılırken ve
+    okunurken (en fazla sweep_seconds aralıkla) yapılır; yeni oturum açılmasa da boşta kalanlar kapanır.
+    """
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS, sweep_seconds=SESSION_SWEEP_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self._sessions = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def create(self, dance):
+        self.expire_idle()
+        session = PoseSession(secrets.token_urlsafe(12), dance)
+        with self._lock:
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        """Oturumu döndürür; bilinmeyen veya süresi dolmuş oturumda None."""
+        if time.monotonic() - self._last_sweep >= self.sweep_seconds:
+            self.expire_idle()
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None and time.monotonic() - session.last_activity > self.idle_seconds:
+            self.close(session_id)  # Tarama aralığı dolmadan süresi geçen oturum
+            return None
+        return session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return session is not None
+
+    def expire_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            self._last_sweep = now
+            expired = [sid for sid, session in self._sessions.items() if now - session.last_activity > self.idle_seconds]
+            sessions = [self._sessions.pop(sid) for sid in expired]
+        for session in sessions:
+            session.close()
+        return len(sessions)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from pose_angles import JSON_MISSING_VALUE, NUM_LANDMARKS, landmarks_to_array
+from frame_stream import STREAM_EXTENSION, read_stream
+
+# --- İkili (binary) poz izi formatı (.dtrk) ---
+# Dosya düzeni:
+#   [0:24)   başlangıç: sihirli kelime, sürüm, başlık ofseti, başlık uzunluğu
+#   [64:...) sütun blokları, her biri 64 bayta hizalı:
+#            landmarks     float32 (kare, 33, 4)   x, y, z, visibility (sadece açı içeren izlerde yok)
+#            angles        float32 (kare, açı)     derece, hesaplanamayan açılar NaN
+#            frame_numbers int32   (kare,)
+#            timestamps_ms float64 (kare,)
+#   [sonda]  JSON başlık: kare sayısı, açı adları, blokların ofset/dtype/boyutları
+# Bloklar ham little-endian dizilerdir; np.memmap ile kopyalamadan okunabilir.
+TRACK_MAGIC = b"DTRK"
+TRACK_VERSION = 1
+TRACK_EXTENSION = ".dtrk"
+
+_PREAMBLE = struct.Struct("<4sIQQ")
+_ALIGNMENT = 64
+
+_BLOCK_DTYPES = {
+    "landmarks": "<f4",
+    "angles": "<f4",
+    "frame_numbers": "<i4",
+    "timestamps_ms": "<f8",
+}
+
+
+class PoseTrack:
+    """
+    Bir videonun kare kare landmark, açı ve zaman bilgilerini sütunlar halinde tutar.
+    Sadece açı içeren izlerde landmarks None olur.
+    """
+
+    def __init__(self, landmarks, angles, angle_names, frame_numbers, timestamps_ms):
+        self.landmarks = landmarks
+        self.angles = angles
+        self.angle_names = tuple(angle_names)
+        self.frame_numbers = frame_numbers
+        self.timestamps_ms = timestamps_ms
+
+    def __len__(self):
+        return len(self.frame_numbers)
+
+    def angle_column(self, name):
+        return self.angles[:, self.angle_names.index(name)]
+
+    def slice(self, start, stop):
+        """[start, stop) aralığındaki kareleri içeren yeni bir iz döndürür (mmap'te kopya yapılmaz)."""
+        landmarks = self.landmarks[start:stop] if self.landmarks is not None else None
+        return PoseTrack(landmarks, self.angles[start:stop], self.angle_names,
+                         self.frame_numbers[start:stop], self.timestamps_ms[start:stop])
+
+    def to_frames(self):
+        """
+        İzi, general_jsonmaker_withangle.py'nin yazdığı JSON kare listesine geri çevirir.
+        Hesaplanamayan açılar ve eksik landmark değerleri JSON_MISSING_VALUE olarak yazılır (geçerli JSON).
+        """
+        frames = []
+        angles = np.where(np.isnan(self.angles), JSON_MISSING_VALUE, self.angles)
+        for i in range(len(self)):
+            frame = {
+                "frame_number": int(self.frame_numbers[i]),
+                "timestamp_ms": float(self.timestamps_ms[i]),
+                "angles": dict(zip(self.angle_names, angles[i].tolist())),
+            }
+            if self.landmarks is not None and not np.isnan(self.landmarks[i]).all():
+                landmarks = np.where(np.isnan(self.landmarks[i]), JSON_MISSING_VALUE, self.landmarks[i])
+                frame["landmarks"] = [
+                    {'id': lm_id, 'x': x, 'y': y, 'z': z, 'visibility': visibility}
+                    for lm_id, (x, y, z, visibility) in enumerate(landmarks.tolist())
+                ]
+            frames.append(frame)
+        return frames
+
+
+def track_from_frames(frames):
+    """
+    JSON kare listesinden iz oluşturur. İki biçim desteklenir:
+    - json_datas/*.json: {"frame_number", "timestamp_ms", "angles", "landmarks"} kareleri
+    - zeybek.json: sadece açı sözlüklerinden oluşan liste
+    """
+    angle_dicts = [frame.get("angles", frame) for frame in frames]
+    angle_names = list(angle_dicts[0].keys()) if angle_dicts else []
+
+    angles = np.array(
+        [[np.nan if d.get(name) is None else d[name] for name in angle_names] for d in angle_dicts],
+        dtype=np.float32,
+    ).reshape(len(frames), len(angle_names))
+
+    # Sadece açı içeren dosyalarda (zeybek.json) landmark bloğu hiç oluşturulmaz
+    landmarks = None
+    if any(frame.get("landmarks") for frame in frames):
+        landmarks = np.full((len(frames), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        for i, frame in enumerate(frames):
+            if frame.get("landmarks"):
+                landmarks[i] = landmarks_to_array(frame["landmarks"], dtype=np.float32)
+
+    frame_numbers = np.array([frame.get("frame_number", i + 1) for i, frame in enumerate(frames)], dtype=np.int32)
+    timestamps_ms = np.array([frame.get("timestamp_ms", np.nan) for frame in frames], dtype=np.float64)
+    return PoseTrack(landmarks, angles, angle_names, frame_numbers, timestamps_ms)
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def save_track(path, track):
+    """İzi ikili formatta yazar. Önce geçici dosyaya yazılır, sonra yerine taşınır."""
+    blocks = {
+        "landmarks": track.landmarks,
+        "angles": track.angles,
+        "frame_numbers": track.frame_numbers,
+        "timestamps_ms": track.timestamps_ms,
+    }
+    header = {"version": TRACK_VERSION, "frames": len(track), "angle_names": list(track.angle_names), "blocks": {}}
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        offset = _ALIGNMENT
+        for name, values in blocks.items():
+            if values is None:
+                continue
+            data = np.ascontiguousarray(values, dtype=_BLOCK_DTYPES[name])
+            f.seek(offset)
+            f.write(data.tobytes())
+            header["blocks"][name] = {"offset": offset, "dtype": _BLOCK_DTYPES[name], "shape": list(data.shape)}
+            offset = _align(offset + data.nbytes)
+
+        header_bytes = json.dumps(header).encode('utf-8')
+        f.seek(offset)
+        f.write(header_bytes)
+        f.seek(0)
+        f.write(_PREAMBLE.pack(TRACK_MAGIC, TRACK_VERSION, offset, len(header_bytes)))
+    os.replace(tmp_path, path)
+
+
+def _load_binary(path, mmap):
+    with open(path, 'rb') as f:
+        magic, version, header_offset, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != TRACK_MAGIC:
+            raise ValueError(f"'{path}' bir poz izi dosyası değil.")
+        if version > TRACK_VERSION:
+            raise ValueError(f"'{path}' desteklenmeyen iz sürümü: {version}")
+        f.seek(header_offset)
+        header = json.loads(f.read(header_length).decode('utf-8'))
+
+    arrays = {}
+    for name, info in header["blocks"].items():
+        shape = tuple(info["shape"])
+        count = int(np.prod(shape))
+        if mmap and count > 0:
+            arrays[name] = np.memmap(path, dtype=info["dtype"], mode='r', offset=info["offset"], shape=shape)
+        else:
+            arrays[name] = np.fromfile(path, dtype=info["dtype"], count=count, offset=info["offset"]).reshape(shape)
+
+    return PoseTrack(arrays.get("landmarks"), arrays["angles"], header["angle_names"],
+                     arrays["frame_numbers"], arrays["timestamps_ms"])
+
+
+def load_track(path, mmap=True):
+    """
+    Bir poz izini uzantısına göre yükler: .dtrk ikili dosyalar (varsayılan olarak bellek eşlemeli),
+    .ndjson akış dosyaları veya eski JSON dosyaları.
+    """
+    if path.endswith(TRACK_EXTENSION):
+        return _load_binary(path, mmap)
+    if path.endswith(STREAM_EXTENSION):
+        return track_from_frames(read_stream(path))
+    with open(path, 'r') as f:
+        return track_from_frames(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON poz dosyalarını ikili .dtrk formatına çevirir.")
+    parser.add_argument("paths", nargs="+", help="Çevrilecek JSON dosyaları (ör. json_datas/*.json)")
+    parser.add_argument("--output-dir", help="Çıktı dizini (varsayılan: JSON dosyasının yanı)")
+    args = parser.parse_args()
+
+    for json_path in args.paths:
+        output_dir = args.output_dir or os.path.dirname(json_path)
+        os.makedirs(output_dir or ".", exist_ok=True)
+        output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(json_path))[0] + TRACK_EXTENSION)
+
+        start_time = time.perf_counter()
+        track = load_track(json_path)
+        json_seconds = time.perf_counter() - start_time
+        save_track(output_path, track)
+
+        start_time = time.perf_counter()
+        load_track(output_path)
+        binary_seconds = time.perf_counter() - start_time
+
+        json_size = os.path.getsize(json_path)
+        binary_size = os.path.getsize(output_path)
+        print(f"{json_path} -> {output_path}: {len(track)} kare, "
+              f"{json_size / 1024:.0f} KB -> {binary_size / 1024:.0f} KB ({json_size / max(binary_size, 1):.1f}x), "
+              f"okuma {json_seconds * 1000:.1f} ms -> {binary_seconds * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES
+
+# Prompt'larda kullanılan eklem adları (FEEDBACK_ANGLES sırasıyla)
+PROMPT_JOINT_NAMES = {
+    "right_elbow": "Sağ Dirsek",
+    "left_elbow": "Sol Dirsek",
+    "right_shoulder": "Sağ Omuz",
+    "left_shoulder": "Sol Omuz",
+    "right_knee": "Sağ Diz",
+    "left_knee": "Sol Diz",
+    "right_hip": "Sağ Kalça",
+    "left_hip": "Sol Kalça",
+}
+
+# Prompt'a en fazla bu kadar eklem yazılır (farkı en büyük olanlar); bundan küçük farklar hiç yazılmaz (derece)
+MAX_PROMPT_JOINTS = 3
+MIN_PROMPT_DIFF_DEGREES = 5.0
+
+# Token tahmini: ortalama karakter/token oranı (Gemini'de Türkçe metin için kaba bir değer).
+# Gerçek sayım için model.count_tokens gerekir; bu tahmin istek başına ölçüm ve karşılaştırma içindir.
+CHARS_PER_TOKEN = 4.0
+
+# Sabit talimat önekleri. Her istekte aynı metin başta olduğu için toplu çağrılarda bir kez gönderilir
+# ve modelin önek önbelleğinden yararlanabilir. Öğrenciye özel veri her zaman bu metnin arkasına eklenir.
+FEEDBACK_INSTRUCTIONS = (
+    "Sen bir dans eğitmenisin. Öğrenci referans bir dans pozunu taklit ediyor. "
+    "Aşağıda öğrencinin referanstan en çok ayrılan eklem açıları var (derece; öğrenci/referans, fark). "
+    "En belirgin farkı düzeltmek için tek, net, eyleme geçirilebilir bir öneri ver; "
+    "açılar yakınsa kısaca tebrik et. En fazla 2-3 cümle, motive edici ve teşvik edici yaz.\n"
+    'Örnek: "Harika gidiyorsun! Sol kolunu biraz daha bükük tutmaya çalış. Devam et!"'
+)
+
+SEQUENCE_INSTRUCTIONS = (
+    "Sen bir dans eğitmenisin ve öğrencinin kaydedilmiş bir bölümünü değerlendiriyorsun. "
+    "Aşağıda bölümün ortalama doğruluğu ve referanstan en çok ayrılan eklemlerin ortalama açı farkları var. "
+    "En çok geliştirilmesi gereken bir veya iki noktayı ve nasıl düzeltileceğini anlat. "
+    "En fazla 3-4 cümle, motive edici ve teşvik edici yaz."
+)
+
+
+def estimate_tokens(text):
+    """Metnin yaklaşık token sayısı (bkz. CHARS_PER_TOKEN)."""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def _ranked_joints(errors, max_joints, min_diff):
+    """(eklem adı, fark) çiftlerini mutlak farka göre büyükten küçüğe sıralar; küçük ve eksik farkları atar."""
+    ranked = sorted(((name, error) for name, error in zip(FEEDBACK_ANGLES.names, errors)
+                     if not np.isnan(error) and abs(error) >= min_diff),
+                    key=lambda item: -abs(item[1]))
+    return ranked[:max_joints]
+
+
+def pose_prompt(user_row, reference_row, max_joints=MAX_PROMPT_JOINTS, min_diff=MIN_PROMPT_DIFF_DEGREES):
+    """
+    Tek bir poz için öğrenciye özel prompt bölümü (talimatlar hariç). Biçim sabittir:
+        Sol Diz: 95/120 (-25)
+        Sağ Dirsek: 150/165 (-15)
+        Görünmüyor: Sağ Kalça
+    Sadece farkı en büyük max_joints eklem, tam sayıya yuvarlanarak yazılır.
+    """
+    user_row = np.asarray(user_row, dtype=np.float64)
+    reference_row = np.asarray(reference_row, dtype=np.float64)
+    errors = user_row - reference_row
+    positions = {name: i for i, name in enumerate(FEEDBACK_ANGLES.names)}
+
+    lines = [f"{PROMPT_JOINT_NAMES[name]}: {user_row[positions[name]]:.0f}/{reference_row[positions[name]]:.0f} "
+             f"({error:+.0f})" for name, error in _ranked_joints(errors, max_joints, min_diff)]
+    if not lines and not np.isnan(errors).all():
+        lines.append(f"Tüm açılar referansa {min_diff:.0f} dereceden yakın.")
+    missing = [PROMPT_JOINT_NAMES[name] for name, error in zip(FEEDBACK_ANGLES.names, errors) if np.isnan(error)]
+    if missing:
+        lines.append("Görünmüyor: " + ", ".join(missing))
+    return "\n".join(lines)
+
+
+def sequence_prompt(frame_count, accuracy, mean_errors, max_joints=MAX_PROMPT_JOINTS,
+                    min_diff=MIN_PROMPT_DIFF_DEGREES):
+    """
+    Kaydedilmiş bir bölümün özeti için öğrenciye özel prompt bölümü.
+    mean_errors: FEEDBACK_ANGLES sırasıyla eklem başına ortalama mutlak açı farkı (NaN = hiç görünmedi).
+    """
+    lines = [f"{frame_count} kare, ortalama doğruluk %{accuracy}"]
+    ranked = _ranked_joints(np.asarray(mean_errors, dtype=np.float64), max_joints, min_diff)
+    lines.extend(f"{PROMPT_JOINT_NAMES[name]}: ortalama {abs(error):.0f} derece fark" for name, error in ranked)
+    if not ranked:
+        lines.append(f"Tüm eklemler referansa ortalama {min_diff:.0f} dereceden yakın.")
+    return "\n".join(lines)
+
+
+def with_instructions(instructions, student_part):
+    """Tek çağrılık tam prompt: sabit talimat öneki + öğrenciye özel bölüm."""
+    return f"{instructions.strip()}\n\n{student_part.strip()}"
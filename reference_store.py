@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from pose_angles import FEEDBACK_ANGLES, compute_angles
+from pose_track import TRACK_EXTENSION, load_track
+from frame_stream import STREAM_EXTENSION
+
+# Zaman damgası olmayan izlerde (ör. sadece açı içeren dosyalar) varsayılan kare hızı
+DEFAULT_FPS = 30.0
+
+# Aynı dans için birden fazla dosya varsa tercih sırası (ikili format en hızlı yüklenen)
+_EXTENSION_PRIORITY = (TRACK_EXTENSION, STREAM_EXTENSION, ".json")
+
+
+class DanceReference:
+    """
+    Bir dansın referans izi ve ondan önceden hesaplanmış geri bildirim açıları.
+    Kareler, izin ilk karesine göre göreli zamana (ms) göre sıralıdır; arama O(log n)'dir.
+    """
+
+    def __init__(self, dance_id, track):
+        self.dance_id = dance_id
+        self.track = track
+
+        timestamps = np.asarray(track.timestamps_ms, dtype=np.float64)
+        if len(timestamps) == 0 or np.isnan(timestamps).any():
+            timestamps = np.arange(len(track), dtype=np.float64) * (1000.0 / DEFAULT_FPS)
+        order = np.argsort(timestamps, kind='stable')
+        self._order = order
+        self.times_ms = timestamps[order] - (timestamps[order[0]] if len(order) else 0.0)
+
+        # /evaluate_pose açıları her istekte yeniden hesaplanmasın diye bir kez, tüm kareler için hesaplanır
+        self.feedback_angles = compute_angles(self.ordered_landmarks(), FEEDBACK_ANGLES)
+
+    def __len__(self):
+        return len(self.times_ms)
+
+    @property
+    def duration_ms(self):
+        return float(self.times_ms[-1]) if len(self) else 0.0
+
+    def frame_index(self, timestamp_ms):
+        """Verilen göreli zamana (ms) en yakın karenin indeksini ikili aramayla bulur."""
+        i = int(np.searchsorted(self.times_ms, timestamp_ms))
+        if i <= 0:
+            return 0
+        if i >= len(self):
+            return len(self) - 1
+        return i if self.times_ms[i] - timestamp_ms < timestamp_ms - self.times_ms[i - 1] else i - 1
+
+    def frame_indices(self, timestamps_ms):
+        """frame_index'in vektörel hali: birçok zaman damgası için en yakın kare indeksleri."""
+        timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+        if len(self) <= 1:
+            return np.zeros(timestamps_ms.shape, dtype=np.intp)
+        right = np.clip(np.searchsorted(self.times_ms, timestamps_ms), 1, len(self) - 1)
+        left = right - 1
+        choose_right = np.abs(self.times_ms[right] - timestamps_ms) < np.abs(timestamps_ms - self.times_ms[left])
+        return np.where(choose_right, right, left)
+
+    def frame_number(self, index):
+        return int(self.track.frame_numbers[self._order[index]])
+
+    def landmarks(self, index):
+        return np.asarray(self.track.landmarks[self._order[index]])
+
+    def ordered_landmarks(self):
+        """Tüm karelerin landmark'ları (kare, 33, 4), times_ms ile aynı sırada."""
+        return np.asarray(self.track.landmarks)[self._order]
+
+
+class ReferenceStore:
+    """Sunucu açılışında referans dans kütüphanesini bir kez yükler ve dans kimliğine göre indeksler."""
+
+    def __init__(self):
+        self.dances = {}
+
+    def load_directory(self, directory):
+        """
+        Dizindeki .dtrk, .ndjson ve .json izlerini yükler. Dans kimliği dosya adıdır (uzantısız).
+        Landmark içermeyen (sadece açı) dosyalar atlanır.
+        """
+        candidates = {}
+        for filename in sorted(os.listdir(directory)):
+            for priority, extension in enumerate(_EXTENSION_PRIORITY):
+                if filename.endswith(extension):
+                    dance_id = filename[:-len(extension)]
+                    if dance_id not in candidates or priority < candidates[dance_id][0]:
+                        candidates[dance_id] = (priority, os.path.join(directory, filename))
+                    break
+
+        for dance_id, (_, path) in candidates.items():
+            try:
+                track = load_track(path)
+            except (OSError, ValueError) as e:
+                print(f"Uyarı: '{path}' referans olarak yüklenemedi: {e}")
+                continue
+            if track.landmarks is None or len(track) == 0:
+                print(f"Uyarı: '{path}' landmark içermiyor, referans olarak kullanılamaz.")
+                continue
+            self.dances[dance_id] = DanceReference(dance_id, track)
+        return self
+
+    def get(self, dance_id):
+        """Dansı kimliğiyle döndürür; bilinmeyen veya metin olmayan (ör. istekten gelen liste) kimlikte None."""
+        if not isinstance(dance_id, str):
+            return None
+        return self.dances.get(dance_id)
+
+    def summary(self):
+        return [
+            {"dance_id": dance_id, "frames": len(dance), "duration_ms": dance.duration_ms}
+            for dance_id, dance in sorted(self.dances.items())
+        ]
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+def frame_quality_scores(angles, visibility, penalty_factor):
+    """
+    Her kare için kalite skorunu vektörel olarak hesaplar.
+    Kalite skoru = (sonraki kareye göre açı değişimlerinin toplamı) + (düşük görünürlük cezası)
+    Daha düşük skor = daha yüksek kalite / daha istikrarlı kare.
+
+    angles: (kare, açı) dizisi; hesaplanamayan (NaN) açılar toplama katılmaz.
+    visibility: (kare, landmark) dizisi; önemli landmark'ların visibility değerleri.
+    Dönüş: (kare - 1,) boyutlu skor dizisi (son karenin sonraki karesi olmadığı için).
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    visibility = np.asarray(visibility, dtype=np.float64)[:-1]
+
+    deltas = np.nansum(np.abs(np.diff(angles, axis=0)), axis=1)
+
+    # Maskeli ortalama: eksik (NaN) visibility değerleri ortalamaya katılmaz
+    present = ~np.isnan(visibility)
+    counts = present.sum(axis=1)
+    totals = np.where(present, visibility, 0.0).sum(axis=1)
+    avg_visibility = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+    return deltas + (1 - avg_visibility) * penalty_factor
+
+
+def window_sums(cumulative, window):
+    """Kümülatif toplam dizisinden tüm pencere toplamlarını O(n) sürede çıkarır."""
+    return cumulative[window:] - cumulative[:-window]
+
+
+def best_windows(scores, window_sizes, top_k=1):
+    """
+    Her pencere boyutu için skor toplamı en düşük, birbiriyle örtüşmeyen en fazla top_k pencereyi bulur.
+    Kümülatif toplam bir kez hesaplanır ve tüm pencere boyutları için kullanılır.
+
+    Dönüş: {pencere_boyutu: [(başlangıç_indeksi, pencere_toplamı), ...]} (en iyiden kötüye sıralı)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(scores)))
+
+    results = {}
+    for window in window_sizes:
+        if window <= 0 or window > len(scores):
+            results[window] = []
+            continue
+
+        sums = window_sums(cumulative, window)
+        if top_k == 1:
+            start = int(np.argmin(sums))  # Eşitlikte ilk (en erken) pencere
+            results[window] = [(start, float(sums[start]))]
+            continue
+
+        chosen = []
+        # Eşit toplamlarda daha erken başlayan pencere seçilir (stable sıralama)
+        for start in np.argsort(sums, kind='stable'):
+            if all(abs(start - other) >= window for other, _ in chosen):
+                chosen.append((int(start), float(sums[start])))
+                if len(chosen) == top_k:
+                    break
+        results[window] = chosen
+    return results
+
+
+class RunningSegmentSearch:
+    """
+    Kareler parça parça gelirken (ör. çıkarım sırasında) her pencere boyutu için skor toplamı en düşük
+    pencereyi bulur; sonuç tüm skorlar üzerinde best_windows(..., top_k=1) ile aynı penceredir.
+
+    Bellekte sadece en büyük pencere kadar son skor ve kare tutulur. En iyi pencere değiştiğinde o pencerenin
+    kareleri (items) saklanır; böylece segment, iz dosyası tekrar okunmadan yazılabilir.
+    """
+
+    def __init__(self, window_sizes, penalty_factor):
+        self.window_sizes = list(window_sizes)
+        self.penalty_factor = penalty_factor
+        self._history = max((window for window in self.window_sizes if window > 0), default=0)
+        self._last_angles = None  # Sonraki parçanın ilk karesiyle farkı alınacak son kare
+        self._last_visibility = None
+        self._scores = np.zeros(0)  # Son _history skor
+        self._items = []  # Son _history kare
+        self._scored = 0  # Şimdiye kadar hesaplanan skor sayısı
+        self._seen = 0  # Şimdiye kadar gelen kare sayısı
+        self._best = {}  # pencere boyutu -> (başlangıç indeksi, pencere toplamı)
+        self._segments = {}  # pencere boyutu -> en iyi pencerenin kareleri
+
+    def update(self, angles, visibility, items):
+        """
+        Yeni bir parça ekler. angles/visibility: frame_quality_scores ile aynı biçimde (kare, ...) dizileri;
+        items: aynı karelere ait, segment olarak saklanacak nesneler (ör. JSON kare sözlükleri).
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        visibility = np.asarray(visibility, dtype=np.float64)
+        if len(angles) == 0:
+            return
+        if self._last_angles is not None:
+            angles = np.concatenate((self._last_angles, angles))
+            visibility = np.concatenate((self._last_visibility, visibility))
+        self._last_angles, self._last_visibility = angles[-1:], visibility[-1:]
+        new_scores = frame_quality_scores(angles, visibility, self.penalty_factor)
+
+        # scores[0] ve items[0], baştan itibaren sırasıyla first_score. skora ve first_item. kareye karşılık gelir
+        scores = np.concatenate((self._scores, new_scores))
+        items = self._items + list(items)
+        first_score = self._scored - len(self._scores)
+        first_item = self._seen - len(self._items)
+        cumulative = np.concatenate(([0.0], np.cumsum(scores)))
+
+        for window in self.window_sizes:
+            if window <= 0 or window > len(scores):
+                continue
+            # Sadece yeni skorlardan birini içeren pencereler yenidir; öncekiler zaten değerlendirildi
+            sums = window_sums(cumulative, window)
+            new_from = max(0, len(self._scores) - window + 1)
+            if new_from >= len(sums):
+                continue
+            j = new_from + int(np.argmin(sums[new_from:]))
+            best = self._best.get(window)
+            if best is None or sums[j] < best[1]:  # Eşitlikte önceki (daha erken) pencere kalır
+                start = first_score + j
+                self._best[window] = (start, float(sums[j]))
+                self._segments[window] = items[start - first_item: start - first_item + window]
+
+        self._scored += len(new_scores)
+        self._seen = first_item + len(items)
+        self._scores = scores[-self._history:] if self._history else scores[:0]
+        self._items = items[-self._history:] if self._history else []
+
+    def result(self):
+        """best_windows ile aynı biçim: {pencere_boyutu: [(başlangıç_indeksi, pencere_toplamı)]} (yetersizse [])."""
+        return {window: [self._best[window]] if window in self._best else [] for window in self.window_sizes}
+
+    def segment(self, window):
+        """En iyi pencerenin kareleri (update'e verilen items); pencere bulunamadıysa None."""
+        return self._segments.get(window)
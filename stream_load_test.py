@@ -0,0 +1,150 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+# Sentetik istemcinin gürültü eklemek için çektiği referans poz sayısı
+SAMPLE_POSES = 10
+
+# Landmark koordinatlarına eklenen gürültü (normalize koordinat)
+POSE_NOISE = 0.02
+
+
+def _request(connection, method, path, body=None):
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    return response.status, json.loads(data) if data else None
+
+
+def _noisy(pose):
+    return [
+        {'x': lm['x'] + random.gauss(0, POSE_NOISE), 'y': lm['y'] + random.gauss(0, POSE_NOISE),
+         'z': lm['z'], 'visibility': lm['visibility']}
+        for lm in pose
+    ]
+
+
+class SyntheticClient(threading.Thread):
+    """Bir öğrenciyi taklit eder: oturum açar, olayları dinler ve kareleri sabit hızda gönderir."""
+
+    def __init__(self, host, port, dance, poses, fps, batch, seconds):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.dance = dance
+        self.poses = poses
+        self.fps = fps
+        self.batch = batch
+        self.seconds = seconds
+        self.latencies = []
+        self.frames_sent = 0
+        self.events = 0
+        self.errors = 0
+
+    def _listen(self, session_id):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.seconds + 30)
+        connection.request('GET', f"/sessions/{session_id}/events")
+        response = connection.getresponse()
+        for line in response:
+            if line.startswith(b"event: score"):
+                self.events += 1
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        status, body = _request(connection, 'POST', '/sessions', {'dance_id': self.dance['dance_id']})
+        if status != 201:
+            self.errors += 1
+            return
+        session_id = body['session_id']
+        threading.Thread(target=self._listen, args=(session_id,), daemon=True).start()
+
+        frame_interval = 1.0 / self.fps
+        start_time = time.perf_counter()
+        frame_index = 0
+        while time.perf_counter() - start_time < self.seconds:
+            frames = []
+            for _ in range(self.batch):
+                timestamp_ms = (frame_index * frame_interval * 1000.0) % max(self.dance['duration_ms'], 1.0)
+                frames.append({'timestamp_ms': timestamp_ms,
+                               'user_pose': _noisy(self.poses[frame_index % len(self.poses)])})
+                frame_index += 1
+
+            sent_at = time.perf_counter()
+            try:
+                status, _ = _request(connection, 'POST', f"/sessions/{session_id}/frames", {'frames': frames})
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - sent_at)
+            if status != 200:
+                self.errors += 1
+            else:
+                self.frames_sent += len(frames)
+
+            # Bir sonraki gönderim zamanına kadar bekle (gerçek kamera hızı)
+            delay = start_time + frame_index * frame_interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        _request(connection, 'DELETE', f"/sessions/{session_id}")
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canlı akış uç noktaları için sentetik istemcilerle yük testi.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Çalışan backend adresi (8.38app.py)")
+    parser.add_argument("--clients", type=int, default=20, help="Eşzamanlı sentetik öğrenci sayısı")
+    parser.add_argument("--fps", type=float, default=30.0, help="İstemci başına gönderilen kare hızı")
+    parser.add_argument("--batch", type=int, default=1, help="Bir POST isteğindeki kare sayısı")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Test süresi")
+    parser.add_argument("--dance-id", help="Kullanılacak dans (varsayılan: ilk yüklü dans)")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    _, dances = _request(connection, 'GET', '/dances')
+    if not dances:
+        print("Hata: sunucuda yüklü dans yok.")
+        return
+    dance = next((d for d in dances if d['dance_id'] == args.dance_id), dances[0])
+
+    # Sentetik pozlar: referans dansın birkaç karesi (her gönderimde gürültü eklenir)
+    poses = []
+    for i in range(SAMPLE_POSES):
+        timestamp_ms = dance['duration_ms'] * i / SAMPLE_POSES
+        _, frame = _request(connection, 'GET', f"/dances/{dance['dance_id']}/pose?timestamp_ms={timestamp_ms}")
+        poses.append(frame['landmarks'])
+
+    print(f"Dans: {dance['dance_id']}, {args.clients} istemci x {args.fps:g} FPS "
+          f"(POST başına {args.batch} kare), {args.seconds:g} sn")
+    clients = [SyntheticClient(url.hostname, url.port or 80, dance, poses, args.fps, args.batch, args.seconds)
+               for _ in range(args.clients)]
+    start_time = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start_time
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    frames = sum(client.frames_sent for client in clients)
+    print(f"Toplam kare: {frames} ({frames / elapsed:.1f} kare/sn, "
+          f"istemci başına {frames / elapsed / args.clients:.1f} FPS)")
+    print(f"POST gecikmesi: p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {_percentile(latencies, 0.95) * 1000:.1f} ms, p99 {_percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Alınan olay: {sum(client.events for client in clients)}, hata: {sum(client.errors for client in clients)}")
+
+
+if __name__ == '__main__':
+    main()
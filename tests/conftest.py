@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture
+def dance_app(monkeypatch):
+    """
+    8.38app.py, Gemini yerine sahte modelle (benchmarks/load.py'deki gibi) yüklenir.
+    Flask ve Gemini istemcisi kurulu değilse bu fixture'ı kullanan testler atlanır.
+    """
+    for module in ("flask", "flask_cors", "dotenv", "google.generativeai"):
+        pytest.importorskip(module)
+    from benchmarks.load import load_app
+
+    for name in ("LOCAL_FEEDBACK_MODE", "REFERENCE_DATA_DIR", "VERBOSE_LOGGING", "FEEDBACK_CACHE_SIZE"):
+        monkeypatch.delenv(name, raising=False)  # load_app bunları ayarlar; test sonunda geri alınır
+    monkeypatch.setenv("LLM_BATCH_MAX_SIZE", "1")
+    app = load_app("llm", cache_enabled=False, model_latency=0.01)
+    yield app
+    app.feedback_batcher.close()
+    app.gateway.close()
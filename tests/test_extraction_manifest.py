@@ -0,0 +1,58 @@
+import os
+
+from extraction_manifest import MANIFEST_FILENAME, ExtractionManifest, file_hash
+
+SETTINGS = {"angle_set_version": 1, "target_fps": None}
+
+
+def write_file(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    return str(path)
+
+
+def recorded_manifest(tmp_path):
+    video = write_file(tmp_path / "dance.mp4", b"video-bytes")
+    output = write_file(tmp_path / "dance.json", b"[]")
+    manifest = ExtractionManifest(str(tmp_path))
+    content_hash = manifest.video_hash(video)
+    manifest.record(video, content_hash, SETTINGS, output, 0)
+    manifest.save()
+    return video, output, content_hash
+
+
+def test_up_to_date_after_reload(tmp_path):
+    video, _, content_hash = recorded_manifest(tmp_path)
+    manifest = ExtractionManifest(str(tmp_path))
+    assert manifest.video_hash(video) == content_hash == file_hash(video)
+    assert manifest.is_up_to_date(video, content_hash, SETTINGS)
+    assert not os.path.exists(manifest.path + ".tmp")
+
+
+def test_changed_settings_or_missing_output_reprocess(tmp_path):
+    video, output, content_hash = recorded_manifest(tmp_path)
+    manifest = ExtractionManifest(str(tmp_path))
+    assert not manifest.is_up_to_date(video, content_hash, dict(SETTINGS, target_fps=10))
+    os.remove(output)
+    assert not manifest.is_up_to_date(video, content_hash, SETTINGS)
+
+
+def test_changed_content_changes_hash(tmp_path):
+    video, _, content_hash = recorded_manifest(tmp_path)
+    write_file(video, b"other-video-bytes")
+    manifest = ExtractionManifest(str(tmp_path))
+    new_hash = manifest.video_hash(video)
+    assert new_hash != content_hash
+    assert not manifest.is_up_to_date(video, new_hash, SETTINGS)
+
+
+def test_unchanged_stat_reuses_stored_hash(tmp_path, monkeypatch):
+    video, _, content_hash = recorded_manifest(tmp_path)
+    manifest = ExtractionManifest(str(tmp_path))
+    monkeypatch.setattr("extraction_manifest.file_hash", lambda path: "should-not-be-called")
+    assert manifest.video_hash(video) == content_hash
+
+
+def test_corrupt_manifest_starts_empty(tmp_path):
+    write_file(tmp_path / MANIFEST_FILENAME, b"{not json")
+    assert ExtractionManifest(str(tmp_path)).entries == {}
@@ -0,0 +1,63 @@
+import math
+
+from feedback_cache import FeedbackCache, bucket_angles
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_angles():
+    assert bucket_angles([0.0, 4.9, 5.0, -5.1, None, math.nan], 10.0) == "0,0,1,-1,x,x"
+
+
+def test_similar_errors_share_a_key():
+    cache = FeedbackCache(bin_size=10.0)
+    assert cache.make_key("dance1#3", [12.0, -31.0]) == cache.make_key("dance1#3", [9.0, -28.0])
+    assert cache.make_key("dance1#3", [12.0, -31.0]) != cache.make_key("dance1#4", [12.0, -31.0])
+    assert cache.make_key("dance1#3", [12.0, -31.0]) != cache.make_key("dance1#3", [12.0, 31.0])
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = FeedbackCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # a en son kullanılan olur
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 3, 2, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("feedback_cache.time.monotonic", clock)
+    cache = FeedbackCache(ttl_seconds=60)
+    cache.put("a", "A")
+    clock.now += 59
+    assert cache.get("a") == "A"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_layer_shared_between_instances(tmp_path, monkeypatch):
+    path = str(tmp_path / "feedback.db")
+    FeedbackCache(disk_path=path).put("a", "A")
+
+    other = FeedbackCache(disk_path=path)
+    assert other.get("a") == "A"
+    assert other.get("a") == "A"
+    assert (other.disk_hits, other.hits) == (1, 1)
+
+    clock = Clock()
+    clock.now = 10 ** 10
+    monkeypatch.setattr("feedback_cache.time.time", clock)
+    assert FeedbackCache(disk_path=path).get("a") is None  # Diskteki kaydın süresi dolmuş
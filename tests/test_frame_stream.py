@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from frame_stream import FrameStreamWriter, iter_stream_chunks, read_last_frame, read_stream, recover_stream
+
+HEADER = {"video": "dance.mp4", "settings": {"angle_set_version": 1}}
+
+
+def frames(start, stop):
+    return [{"frame_number": n, "timestamp_ms": n * 33.3, "angles": {"a": float(n)}} for n in range(start, stop)]
+
+
+def write_stream(path, chunks):
+    with FrameStreamWriter(str(path), HEADER) as writer:
+        for chunk in chunks:
+            writer.write_frames(chunk)
+    return str(path)
+
+
+def test_write_and_read(tmp_path):
+    path = write_stream(tmp_path / "s.ndjson", [frames(1, 4), [], frames(4, 6)])
+    assert read_stream(path) == frames(1, 6)
+    with open(path) as f:
+        assert json.loads(f.readline()) == {"stream_header": HEADER}
+
+
+def test_recover_truncates_partial_line_and_resumes(tmp_path):
+    path = write_stream(tmp_path / "s.ndjson", [frames(1, 4)])
+    with open(path, 'a') as f:
+        f.write('{"frame_number": 4, "timest')  # Çökme sırasında yarım kalan satır
+
+    assert recover_stream(path, HEADER) == (3, 3)
+    assert read_stream(path) == frames(1, 4)
+
+    with FrameStreamWriter(path, HEADER, resume=True) as writer:
+        writer.write_frames(frames(4, 6))
+    assert read_stream(path) == frames(1, 6)
+
+
+def test_recover_rejects_other_header_or_missing_file(tmp_path):
+    path = write_stream(tmp_path / "s.ndjson", [frames(1, 3)])
+    assert recover_stream(path, dict(HEADER, video="other.mp4")) is None
+    assert recover_stream(str(tmp_path / "missing.ndjson"), HEADER) is None
+
+
+def test_recover_header_only(tmp_path):
+    path = write_stream(tmp_path / "s.ndjson", [])
+    assert recover_stream(path, HEADER) == (0, 0)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 100])
+def test_iter_stream_chunks(tmp_path, chunk_size):
+    path = write_stream(tmp_path / "s.ndjson", [frames(1, 8)])
+    chunks = list(iter_stream_chunks(path, chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    assert [frame for chunk in chunks for frame in chunk] == frames(1, 8)
+
+
+@pytest.mark.parametrize("block_size", [7, 64, 64 * 1024])
+def test_read_last_frame(tmp_path, block_size):
+    path = write_stream(tmp_path / "s.ndjson", [frames(1, 30)])
+    assert read_last_frame(path, block_size) == frames(29, 30)[0]
+    with open(path, 'a') as f:
+        f.write('{"frame_number": 30, "timest')
+    assert read_last_frame(path, block_size) == frames(29, 30)[0]
+
+
+def test_read_last_frame_without_frames(tmp_path):
+    assert read_last_frame(write_stream(tmp_path / "s.ndjson", [])) is None
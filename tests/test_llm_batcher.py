@@ -0,0 +1,181 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+
+import pytest
+
+from llm_batcher import _STUDENT_PATTERN, BatchFakeModel, FeedbackBatcher, parse_batch_response
+from llm_gateway import FakeResponse, ModelGateway, ModelTimeout, RequestCancelled
+
+
+class GarbledBatchModel(BatchFakeModel):
+    """Toplu prompt'a JSON olmayan metin döner; tek prompt'lar normal yanıtlanır."""
+
+    def generate_content(self, prompt, stream=False):
+        if _STUDENT_PATTERN.search(prompt):
+            time.sleep(self.latency)
+            return FakeResponse("Herkes harika gidiyor!")
+        return super().generate_content(prompt, stream)
+
+
+class PartialBatchModel(BatchFakeModel):
+    """Toplu yanıtta ilk öğrencinin geri bildirimini atlar."""
+
+    def generate_content(self, prompt, stream=False):
+        response = super().generate_content(prompt, stream)
+        job_ids = _STUDENT_PATTERN.findall(prompt)
+        if not job_ids:
+            return response
+        answers = json.loads(response.text)
+        del answers[job_ids[0]]
+        return FakeResponse(json.dumps(answers, ensure_ascii=False))
+
+
+class SlowSingleModel(GarbledBatchModel):
+    """Toplu yanıt çözümlenemez; tek tek yeniden sorma single_latency sürer."""
+
+    def __init__(self, latency, single_latency):
+        super().__init__(latency)
+        self.single_latency = single_latency
+
+    def generate_content(self, prompt, stream=False):
+        if _STUDENT_PATTERN.search(prompt):
+            return super().generate_content(prompt, stream)
+        self.calls += 1
+        time.sleep(self.single_latency)
+        return FakeResponse(self.text)
+
+
+class AsyncBatchModel:
+    """Asenkron sahte model; iptal edilince gerçekten durur."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.started = 0
+        self.cancelled = 0
+
+    async def generate_content_async(self, prompt):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return FakeResponse("{}")
+
+
+@pytest.fixture
+def make_batcher():
+    created = []
+
+    def make(model, max_batch=4, max_wait_ms=50.0, timeout=5.0):
+        gateway = ModelGateway(model, max_concurrency=4, timeout=timeout)
+        batcher = FeedbackBatcher(gateway, "Talimatlar", max_batch=max_batch, max_wait_ms=max_wait_ms)
+        created.append((batcher, gateway))
+        return batcher
+
+    yield make
+    for batcher, gateway in created:
+        batcher.close()
+        gateway.close()
+
+
+def generate_all(batcher, count, **kwargs):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=count) as clients:
+        futures = [clients.submit(batcher.generate, f"Öğrenci verisi {i}", **kwargs) for i in range(count)]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_parse_batch_response():
+    assert parse_batch_response('{"o1": " İyi ", "o2": ""}', ["o1", "o2"]) == {"o1": "İyi"}
+    assert parse_batch_response('```json\n{"o1": "İyi"}\n```', ["o1"]) == {"o1": "İyi"}
+    assert parse_batch_response('{"o1": "İyi", "o9": "Fazla"}', ["o1"]) == {"o1": "İyi"}
+    assert parse_batch_response("JSON yok", ["o1"]) == {}
+    assert parse_batch_response('["o1"]', ["o1"]) == {}
+    assert parse_batch_response('{"o1": 3}', ["o1"]) == {}
+
+
+def test_jobs_share_one_model_call(make_batcher):
+    model = BatchFakeModel(latency=0.05)
+    batcher = make_batcher(model, max_batch=4, max_wait_ms=200.0)
+    assert generate_all(batcher, 4) == [model.text] * 4
+    assert model.calls == 1
+    assert batcher.stats() == {"model_calls": 1, "batches": 1, "batched_jobs": 4, "fallbacks": 0, "pending": 0}
+
+
+def test_unparseable_batch_falls_back_to_single_calls(make_batcher):
+    model = GarbledBatchModel(latency=0.02)
+    batcher = make_batcher(model, max_batch=3, max_wait_ms=200.0)
+    assert generate_all(batcher, 3) == [model.text] * 3
+    assert batcher.stats() == {"model_calls": 4, "batches": 1, "batched_jobs": 3, "fallbacks": 3, "pending": 0}
+
+
+def test_partial_batch_answer_retries_only_missing_job(make_batcher):
+    model = PartialBatchModel(latency=0.02)
+    batcher = make_batcher(model, max_batch=3, max_wait_ms=200.0)
+    assert generate_all(batcher, 3) == [model.text] * 3
+    assert batcher.stats() == {"model_calls": 2, "batches": 1, "batched_jobs": 3, "fallbacks": 1, "pending": 0}
+
+
+def test_fallback_gets_only_remaining_time(make_batcher):
+    # Toplu çağrı 0.3 sn sonra çözümlenemeyen yanıt verir; tek çağrı 2 sn sürer. Öğrenci toplamda ~timeout bekler.
+    model = SlowSingleModel(latency=0.3, single_latency=2.0)
+    batcher = make_batcher(model, max_batch=2, max_wait_ms=200.0)
+    started = time.monotonic()
+    results = generate_all(batcher, 2, timeout=0.5)
+    elapsed = time.monotonic() - started
+    assert all(isinstance(result, ModelTimeout) for result in results)
+    assert elapsed < 0.9
+    assert batcher.fallbacks == 2
+
+
+def test_expired_job_is_not_retried(make_batcher):
+    model = SlowSingleModel(latency=0.3, single_latency=0.01)
+    batcher = make_batcher(model, max_batch=2, max_wait_ms=200.0)
+    expired = batcher._submit_job("Öğrenci verisi 0", 5.0)
+    waiting = batcher._submit_job("Öğrenci verisi 1", 5.0)
+    expired.deadline = time.monotonic()  # Toplu çağrı sürerken süresi doluyor
+    with pytest.raises(ModelTimeout):
+        expired.future.result(timeout=2)
+    assert waiting.future.result(timeout=2) == model.text
+    assert batcher.fallbacks == 2
+    assert batcher.model_calls == 2  # Toplu çağrı + sadece süresi kalan öğrenci için tek çağrı
+
+
+def test_batch_timeout_is_bounded(make_batcher):
+    batcher = make_batcher(BatchFakeModel(latency=2.0), max_batch=2, max_wait_ms=200.0)
+    started = time.monotonic()
+    results = generate_all(batcher, 2, timeout=0.3)
+    assert all(isinstance(result, ModelTimeout) for result in results)
+    assert time.monotonic() - started < 0.8
+    assert batcher.fallbacks == 0
+
+
+def test_model_call_cancelled_when_all_students_leave(make_batcher):
+    model = AsyncBatchModel(latency=5.0)
+    batcher = make_batcher(model, max_batch=2, max_wait_ms=200.0)
+    leave = [threading.Event(), threading.Event()]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as clients:
+        futures = [clients.submit(batcher.generate, f"Öğrenci verisi {i}", cancelled=leave[i].is_set)
+                   for i in range(2)]
+        deadline = time.monotonic() + 2
+        while model.started == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+
+        leave[0].set()
+        with pytest.raises(RequestCancelled):
+            futures[0].result(timeout=2)
+        time.sleep(0.1)
+        assert model.cancelled == 0  # Diğer öğrenci hâlâ bekliyor
+
+        leave[1].set()
+        with pytest.raises(RequestCancelled):
+            futures[1].result(timeout=2)
+    deadline = time.monotonic() + 2
+    while model.cancelled == 0:
+        assert time.monotonic() < deadline, "model çağrısı iptal edilmedi"
+        time.sleep(0.005)
+    assert batcher.gateway.in_flight == 0
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_gateway import FakeResponse, ModelGateway, ModelTimeout, RequestCancelled
+
+
+class GatedModel:
+    """Senkron sahte model: her çağrı open() çağrılana kadar bekler; aynı anda çalışan çağrıları sayar."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self._gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._gate.set()
+
+    def generate_content(self, prompt, stream=False):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self._gate.wait(5)
+            return FakeResponse(prompt)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class AsyncSleepModel:
+    """Asenkron arayüzlü sahte model; iptal edilince gerçekten durur."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return FakeResponse(prompt)
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "koşul zamanında sağlanmadı"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def gated():
+    model = GatedModel()
+    gateways = []
+
+    def make(**kwargs):
+        gateway = ModelGateway(model, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield model, make
+    model.open()
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_concurrency_limit(gated):
+    model, make = gated
+    gateway = make(max_concurrency=2, timeout=5)
+    futures = [gateway.submit(f"istek {i}") for i in range(6)]
+    wait_until(lambda: model.active == 2 and gateway.waiting == 4)
+    assert gateway.in_flight == 2
+
+    model.open()
+    assert [future.result(timeout=5) for future in futures] == [f"istek {i}" for i in range(6)]
+    assert model.max_active == 2
+    wait_until(lambda: gateway.in_flight == 0)
+
+
+def test_timeout_keeps_slot_until_thread_finishes(gated):
+    model, make = gated
+    gateway = make(max_concurrency=1, timeout=0.1)
+    with pytest.raises(ModelTimeout):
+        gateway.generate("yavaş")
+    # Thread hala modeli bekliyor: yuva bırakılmaz, sıradaki çağrı modele ulaşmadan zaman aşımına uğrar
+    assert model.active == 1 and gateway.in_flight == 1
+    with pytest.raises(ModelTimeout):
+        gateway.generate("sırada")
+    assert model.calls == 1
+
+    model.open()
+    wait_until(lambda: gateway.in_flight == 0)
+    assert gateway.generate("sonra") == "sonra"
+    assert model.max_active == 1
+
+
+def test_cancelled_request(gated):
+    model, make = gated
+    gateway = make(max_concurrency=1, timeout=5)
+    disconnected = threading.Event()
+    threading.Timer(0.1, disconnected.set).start()
+    with pytest.raises(RequestCancelled):
+        gateway.generate("istek", cancelled=disconnected.is_set)
+    assert gateway.in_flight == 1  # Thread bitene kadar yuva tutulur
+
+    model.open()
+    wait_until(lambda: gateway.in_flight == 0 and model.active == 0)
+
+
+def test_future_cancel_before_slot(gated):
+    model, make = gated
+    gateway = make(max_concurrency=1, timeout=5)
+    first = gateway.submit("birinci")
+    queued = gateway.submit("ikinci")
+    wait_until(lambda: gateway.waiting == 1)
+    queued.cancel()
+    wait_until(lambda: gateway.waiting == 0)
+
+    model.open()
+    assert first.result(timeout=5) == "birinci"
+    assert model.calls == 1
+
+
+def test_async_model_releases_slot_on_timeout():
+    gateway = ModelGateway(AsyncSleepModel(10), max_concurrency=1, timeout=0.1)
+    try:
+        with pytest.raises(ModelTimeout):
+            gateway.generate("istek")
+        wait_until(lambda: gateway.in_flight == 0)
+        gateway.model.latency = 0
+        assert gateway.generate("sonra") == "sonra"
+    finally:
+        gateway.close()
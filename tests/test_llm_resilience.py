@@ -0,0 +1,261 @@
+import json
+import os
+import time
+
+import pytest
+
+import llm_resilience
+from llm_gateway import CircuitOpen, FakeModel, ModelGateway, ModelTimeout
+from llm_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker
+
+
+class FakeClock:
+    """llm_resilience.time yerine geçer; devre kesicinin bekleme süreleri beklemeden geçirilir."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_resilience, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_gateway():
+    gateways = []
+
+    def make(model, **kwargs):
+        gateway = ModelGateway(model, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "koşul zamanında sağlanmadı"
+        time.sleep(0.005)
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=10, min_samples=5)
+    for seconds in (0.4, 0.1, 0.3, 0.2):
+        tracker.add(seconds)
+    assert tracker.percentile(0.95) is None
+    tracker.add(0.5)
+    assert tracker.percentile(0.5) == 0.3
+    assert tracker.percentile(0.95) == 0.5
+    for _ in range(10):
+        tracker.add(1.0)  # Pencere dışına çıkan eski ölçümler unutulur
+    assert tracker.percentile(0.0) == 1.0
+
+
+def test_breaker_opens_on_failure_ratio(clock):
+    transitions = []
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_seconds=30.0,
+                             on_state_change=lambda previous, state: transitions.append((previous, state)))
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(failed)
+    assert breaker.state == CLOSED  # min_calls dolmadan açılmaz
+    breaker.record(True)
+    assert breaker.state == OPEN
+    assert breaker.opened == 1
+    assert transitions == [(CLOSED, OPEN)]
+
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.rejected == 2
+    breaker.record(False)  # Açıkken gelen geç sonuç yok sayılır
+    assert breaker.state == OPEN
+
+
+def test_breaker_half_open_probe_closes_or_reopens(clock):
+    transitions = []
+    breaker = CircuitBreaker(window=2, min_calls=2, open_seconds=30.0, half_open_calls=1,
+                             on_state_change=lambda previous, state: transitions.append(state))
+    breaker.record(True)
+    breaker.record(True)
+    assert breaker.state == OPEN
+
+    clock.now += 29.0
+    assert breaker.state == OPEN
+    clock.now += 1.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # Aynı anda tek deneme çağrısı
+    breaker.record(True)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    assert transitions == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+
+    breaker.record(True)  # Kapanınca pencere sıfırdan başlar
+    assert breaker.state == CLOSED
+
+
+def test_breaker_release_returns_probe(clock):
+    breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=5.0)
+    breaker.record(True)
+    clock.now += 5.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    breaker.release()
+    breaker.release()  # Fazladan release deneme hakkını artırmaz
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_counts_slow_calls_as_failures(clock):
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, slow_call_seconds=1.0)
+    breaker.record(False, 0.5)
+    breaker.record(False, 1.0)
+    breaker.record(False, 1.5)
+    assert breaker.state == CLOSED
+    breaker.record(False, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_gateway_opens_breaker_on_model_errors(make_gateway):
+    model = FakeModel(latency=0.0, error_rate=1.0)
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_seconds=60.0)
+    gateway = make_gateway(model, timeout=2.0, breaker=breaker)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            gateway.generate("prompt")
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen):
+        gateway.generate("prompt")
+    assert model.calls == 4  # Açık devrede model hiç çağrılmaz
+    assert breaker.rejected == 1
+    assert breaker.opened == 1
+
+
+def test_gateway_recovers_through_half_open(make_gateway):
+    model = FakeModel(latency=0.0, error_rate=1.0)
+    breaker = CircuitBreaker(window=2, min_calls=2, open_seconds=0.1)
+    gateway = make_gateway(model, timeout=2.0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            gateway.generate("prompt")
+    assert breaker.state == OPEN
+
+    model.error_rate = 0.0
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    assert gateway.generate("prompt") == model.text
+    assert breaker.state == CLOSED
+
+
+def test_gateway_counts_slow_calls(make_gateway):
+    model = FakeModel(latency=0.05)
+    breaker = CircuitBreaker(window=2, min_calls=2, slow_call_seconds=0.02, open_seconds=60.0)
+    gateway = make_gateway(model, timeout=2.0, breaker=breaker)
+    assert gateway.generate("prompt") == model.text
+    assert gateway.generate("prompt") == model.text
+    assert breaker.state == OPEN
+
+
+def test_gateway_timeout_is_recorded_as_failure(make_gateway):
+    breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=60.0)
+    gateway = make_gateway(FakeModel(latency=0.5), timeout=0.05, breaker=breaker)
+    with pytest.raises(ModelTimeout):
+        gateway.generate("prompt")
+    assert breaker.state == OPEN
+
+
+def test_gateway_cancel_releases_half_open_probe(make_gateway):
+    model = FakeModel(latency=1.0)
+    breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=0.05)
+    gateway = make_gateway(model, max_concurrency=2, timeout=5.0, breaker=breaker)
+    breaker.record(True)
+    time.sleep(0.1)
+
+    future = gateway.submit("prompt")
+    wait_until(lambda: model.calls == 1)
+    assert not breaker.allow()  # Deneme hakkı çalışan çağrıda
+    future.cancel()
+    wait_until(breaker.allow)  # İptal edilen çağrı sonucu bilinmeden deneme hakkını geri verir
+    assert breaker.state == HALF_OPEN
+    assert breaker.opened == 1
+
+
+def test_hedge_fires_after_percentile(make_gateway):
+    model = FakeModel(latency=0.01, slow_latency=0.5)
+    gateway = make_gateway(model, max_concurrency=2, timeout=5.0, hedge_percentile=0.95, hedge_min_seconds=0.05)
+    for _ in range(gateway.latencies.min_samples):
+        gateway.generate("prompt")
+    assert gateway.hedged == 0  # Hızlı çağrılar yedeklenmez
+
+    model.slow_rate = 1.0
+    started = time.monotonic()
+    future = gateway.submit("prompt")
+    wait_until(lambda: model.calls == gateway.latencies.min_samples + 1)
+    model.slow_rate = 0.0  # Sadece ilk çağrı yavaş; yedek çağrı hızlı yanıt verir
+    assert future.result(timeout=2) == model.text
+    elapsed = time.monotonic() - started
+    assert gateway.hedged == 1
+    assert gateway.hedge_wins == 1
+    assert 0.05 <= elapsed < 0.3
+
+
+def test_no_hedge_without_enough_samples(make_gateway):
+    model = FakeModel(latency=0.01, slow_rate=1.0, slow_latency=0.15)
+    gateway = make_gateway(model, max_concurrency=2, timeout=5.0, hedge_percentile=0.95, hedge_min_seconds=0.01)
+    assert gateway.generate("prompt") == model.text
+    assert gateway.hedged == 0
+    assert model.calls == 1
+
+
+def test_no_hedge_when_slots_are_full(make_gateway):
+    model = FakeModel(latency=0.01, slow_latency=0.3)
+    gateway = make_gateway(model, max_concurrency=1, timeout=5.0, hedge_percentile=0.95, hedge_min_seconds=0.05)
+    for _ in range(gateway.latencies.min_samples):
+        gateway.generate("prompt")
+    model.slow_rate = 1.0
+    assert gateway.generate("prompt") == model.text
+    assert gateway.hedged == 0
+
+
+def visible_pose():
+    reference_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "json_datas")
+    with open(os.path.join(reference_dir, "dance1.json")) as f:
+        frames = json.load(f)
+    return next(frame["landmarks"] for frame in frames if frame.get("landmarks"))
+
+
+def test_app_falls_back_locally_on_model_error(dance_app):
+    dance_app.gateway.model.error_rate = 1.0
+    pose = visible_pose()
+    response = dance_app.app.test_client().post('/evaluate_pose', json={'user_pose': pose, 'reference_pose': pose})
+    assert response.status_code == 200
+    assert response.get_json()['source'] == 'local_fallback'
+    assert dance_app.gateway.model.calls == 1
+
+
+def test_app_skips_model_when_circuit_is_open(dance_app):
+    dance_app.gateway.breaker = CircuitBreaker(window=1, min_calls=1, open_seconds=60.0)
+    dance_app.gateway.breaker.record(True)
+    pose = visible_pose()
+    response = dance_app.app.test_client().post('/evaluate_pose', json={'user_pose': pose, 'reference_pose': pose})
+    assert response.status_code == 200
+    assert response.get_json()['source'] == 'local_fallback'
+    assert dance_app.gateway.model.calls == 0
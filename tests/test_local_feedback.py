@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+import pytest
+
+from local_feedback import (NOT_VISIBLE_FEEDBACK, PRAISE_TEMPLATES, EscalationPolicy, evaluate_locally,
+                            pose_accuracy, score_sequence)
+from pose_angles import FEEDBACK_ANGLES
+
+REFERENCE = [90.0, 90.0, 45.0, 45.0, 170.0, 170.0, 160.0, 160.0]
+
+
+def with_changes(row, **changes):
+    row = list(row)
+    for name, value in changes.items():
+        row[FEEDBACK_ANGLES.index(name)] = value
+    return row
+
+
+def test_close_pose_is_praised():
+    result = evaluate_locally(with_changes(REFERENCE, left_knee=175.0), REFERENCE, variant=1)
+    assert result["feedback"] == PRAISE_TEMPLATES[1]
+    assert result["worst_joint"] == "left_knee" and result["error_degrees"] == 5.0
+    assert not result["uncertain"] and not result["not_visible"]
+
+
+@pytest.mark.parametrize("value,expected", [(140.0, "sol dizini biraz daha bük"), (200.0, "sol dizini biraz daha uzat")])
+def test_correction_names_worst_joint_and_direction(value, expected):
+    # Kullanıcının açısı büyükse bükmesi, küçükse uzatması istenir
+    user = with_changes(REFERENCE, left_knee=170.0 + (170.0 - value), right_elbow=95.0)
+    result = evaluate_locally(user, REFERENCE)
+    assert result["worst_joint"] == "left_knee"
+    assert expected in result["feedback"].lower()
+    assert not result["uncertain"]
+
+
+def test_two_similar_errors_are_uncertain():
+    user = with_changes(REFERENCE, left_knee=140.0, right_elbow=62.0)
+    assert evaluate_locally(user, REFERENCE)["uncertain"]
+
+
+def test_missing_angles_are_not_visible():
+    user = with_changes(REFERENCE, left_knee=math.nan, right_knee=None, left_hip=math.nan)
+    result = evaluate_locally(user, REFERENCE)
+    assert result["not_visible"] and not result["uncertain"]
+    assert result["feedback"] == NOT_VISIBLE_FEEDBACK
+    assert result["missing_angles"] == 3
+
+
+def test_pose_accuracy_counts_missing_as_180():
+    assert pose_accuracy(REFERENCE, REFERENCE) == 100
+    assert pose_accuracy(with_changes(REFERENCE, left_knee=math.nan), REFERENCE) == 87  # 1 - 180 / (8 * 180)
+
+
+def test_score_sequence_matches_scalar_path():
+    rng = np.random.default_rng(0)
+    reference_rows = rng.uniform(0, 180, size=(50, len(FEEDBACK_ANGLES)))
+    user_rows = reference_rows + rng.normal(0, 20, size=reference_rows.shape)
+    user_rows[rng.random(user_rows.shape) < 0.1] = np.nan
+    user_rows[3] = np.nan
+
+    accuracy, worst, median_signed, mean_absolute = score_sequence(user_rows, reference_rows)
+    for i in range(len(user_rows)):
+        assert accuracy[i] == pose_accuracy(user_rows[i], reference_rows[i])
+        local = evaluate_locally(user_rows[i], reference_rows[i])
+        if local["worst_joint"] is not None:
+            assert worst[i] == FEEDBACK_ANGLES.index(local["worst_joint"])
+    assert worst[3] == -1
+    np.testing.assert_allclose(mean_absolute, np.nanmean(np.abs(user_rows - reference_rows), axis=0))
+    assert median_signed.shape == (len(FEEDBACK_ANGLES),)
+
+
+def test_auto_policy_escalates_uncertain_and_every_n():
+    policy = EscalationPolicy("auto", llm_every_n=3)
+    confident = {"uncertain": False, "not_visible": False}
+    uncertain = {"uncertain": True, "not_visible": False}
+    numbers = [policy.next_request("student") for _ in range(6)]
+    assert numbers == [1, 2, 3, 4, 5, 6]
+    assert [policy.should_escalate(confident, n) for n in numbers] == [False, False, True, False, False, True]
+    assert policy.should_escalate(uncertain, 1)
+    assert policy.next_request("other") == 1
+
+
+@pytest.mark.parametrize("mode", ["auto", "local", "llm"])
+def test_not_visible_never_escalates(mode):
+    policy = EscalationPolicy(mode, llm_every_n=1)
+    assert not policy.should_escalate({"uncertain": True, "not_visible": True}, 1)
+
+
+def test_policy_modes():
+    result = {"uncertain": True, "not_visible": False}
+    assert EscalationPolicy("llm").should_escalate({"uncertain": False, "not_visible": False}, 1)
+    assert not EscalationPolicy("local").should_escalate(result, 10)
+    with pytest.raises(ValueError):
+        EscalationPolicy("sometimes")
+
+
+def test_session_counters_are_bounded():
+    policy = EscalationPolicy(max_sessions=2)
+    for key in ("a", "b", "c"):
+        policy.next_request(key)
+    assert policy.next_request("a") == 1  # En eski oturum atıldı
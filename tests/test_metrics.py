@@ -0,0 +1,79 @@
+import pytest
+
+from metrics import Metrics
+
+
+def test_counters_with_labels():
+    metrics = Metrics()
+    metrics.counter("requests_total", "İstek sayısı")
+    metrics.inc("requests_total", endpoint="a", status=200)
+    metrics.inc("requests_total", 2, status=200, endpoint="a")
+    metrics.inc("requests_total", endpoint='b"x', status=500)
+    lines = metrics.render().splitlines()
+    assert lines[:2] == ["# HELP requests_total İstek sayısı", "# TYPE requests_total counter"]
+    assert 'requests_total{endpoint="a",status="200"} 3' in lines
+    assert 'requests_total{endpoint="b\\"x",status="500"} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    metrics.histogram("latency_seconds", "Süre", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        metrics.observe("latency_seconds", value, endpoint="a")
+    lines = metrics.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{endpoint="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{endpoint="a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{endpoint="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{endpoint="a"} 3' in lines
+    assert 'latency_seconds_sum{endpoint="a"} 2.55' in lines
+
+
+def test_function_counters_and_gauges():
+    state = {"hedged": 4, "waiting": 2}
+    metrics = Metrics()
+    metrics.counter("hedged_calls_total", "Yedek çağrılar", lambda: state["hedged"])
+    metrics.gauge("waiting", "Sıradakiler", lambda: state["waiting"])
+    metrics.gauge("broken", "Okunamayan", lambda: 1 / 0)
+    lines = metrics.render().splitlines()
+    assert "# TYPE hedged_calls_total counter" in lines and "hedged_calls_total 4" in lines
+    assert "# TYPE waiting gauge" in lines and "waiting 2" in lines
+    assert not any(line.startswith("broken") or "TYPE broken" in line for line in lines)
+
+    state["hedged"] = 5
+    assert "hedged_calls_total 5" in metrics.render().splitlines()
+
+
+def test_span_observes_even_on_error():
+    metrics = Metrics()
+    metrics.histogram("dance_stage_seconds", "Aşamalar")
+    with pytest.raises(RuntimeError):
+        with metrics.span("evaluate_pose", "llm"):
+            raise RuntimeError()
+    assert 'dance_stage_seconds_count{endpoint="evaluate_pose",stage="llm"} 1' in metrics.render().splitlines()
+
+
+def request_count(app, endpoint):
+    prefix = f'dance_request_seconds_count{{endpoint="{endpoint}"}} '
+    for line in app.metrics.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_app_exports_monotonic_values_as_counters(dance_app):
+    text = dance_app.metrics.render()
+    for name in ("dance_llm_circuit_rejected_total", "dance_llm_hedged_calls_total", "dance_llm_hedge_wins_total",
+                 "dance_llm_batched_calls_total", "dance_llm_batch_fallbacks_total"):
+        assert f"# TYPE {name} counter" in text
+
+
+def test_streamed_request_duration_observed_when_stream_finishes(dance_app):
+    client = dance_app.app.test_client()
+    response = client.post('/chat', json={'message': 'merhaba', 'stream': True}, buffered=False)
+    assert response.status_code == 200
+    assert request_count(dance_app, "chat") == 0  # Akış henüz gönderilmedi
+    body = response.get_data(as_text=True)
+    response.close()
+    assert "event: done" in body
+    assert request_count(dance_app, "chat") == 1
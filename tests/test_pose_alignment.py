@@ -0,0 +1,82 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pose_alignment import StreamingAligner, cost_to_score, frame_costs
+
+FPS = 30.0
+
+
+def reference(frame_count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    # Yavaş değişen açılar: komşu kareler benzer, uzak kareler farklı
+    angles = 90.0 + np.cumsum(rng.normal(0, 3, size=(frame_count, 8)), axis=0)
+    times = np.arange(frame_count) * (1000.0 / FPS)
+    return angles, times
+
+
+def brute_force_score(aligner, updates):
+    """Bant içindeki tüm monoton eşlemeleri deneyerek en ucuz hizalamanın skorunu bulur."""
+    bands = []
+    for timestamp_ms, row in updates:
+        expected = aligner.expected_index(timestamp_ms)
+        columns = range(max(0, expected - aligner.band), min(len(aligner.reference_angles), expected + aligner.band + 1))
+        bands.append([(j, frame_costs(row, aligner.reference_angles[j:j + 1])[0]) for j in columns])
+    best = min(sum(cost for _, cost in path) for path in itertools.product(*bands)
+               if all(a[0] <= b[0] for a, b in zip(path, path[1:])))
+    return cost_to_score(best / len(updates))
+
+
+def test_perfect_copy_scores_100():
+    angles, times = reference()
+    aligner = StreamingAligner(angles, times)
+    for i in range(0, 90, 3):
+        result = aligner.update(times[i], angles[i])
+    assert (result["score"], result["strict_score"], result["lag_ms"]) == (100, 100, 0.0)
+    assert result["reference_index"] == 87 and result["frames"] == 30
+
+
+def test_late_user_keeps_score_and_reports_lag():
+    angles, times = reference()
+    aligner = StreamingAligner(angles, times, band=15)
+    lag_frames = 6  # 200 ms geride
+    for i in range(30, 120, 2):
+        result = aligner.update(times[i], angles[i - lag_frames])
+    assert result["score"] == 100
+    assert result["strict_score"] < 100
+    assert result["lag_ms"] == pytest.approx(lag_frames * 1000.0 / FPS)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_brute_force(seed):
+    angles, times = reference(60, seed)
+    rng = np.random.default_rng(seed + 100)
+    aligner = StreamingAligner(angles, times, window=5, band=2)
+    updates = []
+    for step, i in enumerate(range(10, 40, 3)):
+        row = angles[i + rng.integers(-2, 3)] + rng.normal(0, 5, size=8)
+        row[rng.random(8) < 0.1] = np.nan
+        timestamp_ms = times[i] + rng.uniform(-10, 10)
+        updates.append((timestamp_ms, row))
+        result = aligner.update(timestamp_ms, row)
+        assert result["score"] == brute_force_score(aligner, updates[-aligner.window:])
+
+
+def test_rewind_restarts_alignment():
+    angles, times = reference()
+    aligner = StreamingAligner(angles, times, band=5)
+    for i in range(200, 230, 3):
+        aligner.update(times[i], angles[i])
+    result = aligner.update(times[10], angles[10])
+    assert result["score"] == 100 and result["reference_index"] == 10
+    aligner.reset()
+    assert len(aligner) == 0
+
+
+def test_expected_index_clamps():
+    angles, times = reference(10)
+    aligner = StreamingAligner(angles, times)
+    assert aligner.expected_index(-100.0) == 0
+    assert aligner.expected_index(times[-1] + 1000.0) == 9
+    assert aligner.expected_index(times[4] + 10.0) == 4
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+from pose_angles import (FEEDBACK_ANGLES, JSON_MISSING_VALUE, NUM_LANDMARKS, REFERENCE_ANGLES, ZEYBEK_ANGLES,
+                         angles_to_dict, compute_angles)
+from pose_track import PoseTrack
+
+
+def baseline_angle(a, b, c):
+    """general_jsonmaker_withangle.py'deki eski tek açılık calculateAngle (sıfır vektörde 0.0)."""
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    vec1 = b - a
+    vec2 = b - c
+    magnitude1 = np.linalg.norm(vec1)
+    magnitude2 = np.linalg.norm(vec2)
+    if magnitude1 == 0 or magnitude2 == 0:
+        return 0.0
+    return np.degrees(np.arccos(np.clip(np.dot(vec1, vec2) / (magnitude1 * magnitude2), -1.0, 1.0)))
+
+
+def baseline_zeybek_angle(a, b, c):
+    """JSON_maker.py'deki eski atan2 tabanlı calculateAngle."""
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    return 360 - angle if angle > 180 else angle
+
+
+def random_landmarks(frame_count, seed):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, size=(frame_count, NUM_LANDMARKS, 4))
+    # Bazı karelerde iki landmark üst üste (sıfır uzunluklu vektör)
+    landmarks[::7, 13, :2] = landmarks[::7, 11, :2]
+    landmarks[::11, 26, :2] = landmarks[::11, 28, :2]
+    return landmarks
+
+
+def scalar_angles(landmarks, table, angle_fn):
+    return np.array([[angle_fn(*(frame[i, :2] for i in triple)) for triple in table.triples]
+                     for frame in landmarks])
+
+
+@pytest.mark.parametrize("table", [REFERENCE_ANGLES, ZEYBEK_ANGLES, FEEDBACK_ANGLES])
+def test_vectorized_angles_match_baseline(table):
+    landmarks = random_landmarks(200, 0)
+    expected = scalar_angles(landmarks, table, baseline_angle)
+    result = compute_angles(landmarks, table)
+
+    degenerate = np.isnan(result)
+    assert degenerate.any()
+    np.testing.assert_array_equal(expected[degenerate], 0.0)
+    np.testing.assert_allclose(result[~degenerate], expected[~degenerate], atol=1e-9)
+    # JSON'a yazılırken eski çıkarıcının 0.0 değeri korunur
+    np.testing.assert_allclose(np.where(degenerate, JSON_MISSING_VALUE, result), expected, atol=1e-9)
+
+
+def test_vectorized_angles_match_atan2_baseline():
+    landmarks = random_landmarks(200, 1)
+    expected = scalar_angles(landmarks, ZEYBEK_ANGLES, baseline_zeybek_angle)
+    result = compute_angles(landmarks, ZEYBEK_ANGLES)
+    valid = ~np.isnan(result)
+    np.testing.assert_allclose(result[valid], expected[valid], atol=1e-6)
+
+
+def test_single_frame_matches_batch():
+    landmarks = random_landmarks(5, 2)
+    batch = compute_angles(landmarks, FEEDBACK_ANGLES)
+    for i, frame in enumerate(landmarks):
+        np.testing.assert_array_equal(compute_angles(frame, FEEDBACK_ANGLES), batch[i])
+
+
+def test_angles_to_dict_missing_value():
+    row = np.array([90.0] + [np.nan] * (len(FEEDBACK_ANGLES) - 1))
+    assert angles_to_dict(row, FEEDBACK_ANGLES)["left_elbow"] is None
+    angles = angles_to_dict(row, FEEDBACK_ANGLES, JSON_MISSING_VALUE)
+    assert angles["right_elbow"] == 90.0
+    assert angles["left_elbow"] == JSON_MISSING_VALUE
+
+
+def test_track_frames_are_strict_json():
+    landmarks = random_landmarks(10, 3)
+    landmarks[2, 5] = np.nan
+    angles = compute_angles(landmarks, REFERENCE_ANGLES)
+    track = PoseTrack(landmarks.astype(np.float32), angles.astype(np.float32), REFERENCE_ANGLES.names,
+                      np.arange(10, dtype=np.int32), np.arange(10, dtype=np.float64) * 33.3)
+    frames = track.to_frames()
+    json.dumps(frames, allow_nan=False)
+    assert frames[0]["angles"]["left_elbow_angle"] == JSON_MISSING_VALUE
+    assert frames[2]["landmarks"][5]["x"] == JSON_MISSING_VALUE
@@ -0,0 +1,76 @@
+import numpy as np
+
+from pose_angles import NUM_LANDMARKS
+from pose_filter import MISSING_POSE, PoseFilter, is_missing, smooth_landmarks
+
+FRAME_MS = 1000.0 / 30.0
+
+
+def still_pose(value=0.5, visibility=1.0):
+    pose = np.full((NUM_LANDMARKS, 4), value)
+    pose[:, 3] = visibility
+    return pose
+
+
+def test_first_frame_passes_through():
+    pose = np.random.default_rng(0).uniform(0, 1, size=(NUM_LANDMARKS, 4))
+    np.testing.assert_allclose(PoseFilter().filter(pose, 0.0), pose, rtol=1e-6)
+
+
+def test_jitter_is_reduced():
+    rng = np.random.default_rng(1)
+    poses = still_pose() + np.concatenate([rng.normal(0, 0.01, size=(100, NUM_LANDMARKS, 3)),
+                                           np.zeros((100, NUM_LANDMARKS, 1))], axis=2)
+    smoothed = smooth_landmarks(poses, np.arange(100) * FRAME_MS)
+    assert smoothed[20:, :, :3].std() < 0.5 * poses[20:, :, :3].std()
+
+
+def test_follows_fast_motion():
+    # 0.3 birim / saniye sabit hızla hareket: bir saniye sonra gecikme küçük olmalı
+    times = np.arange(30) * FRAME_MS
+    poses = np.stack([still_pose(0.2 + 0.3 * t / 1000.0) for t in times])
+    smoothed = smooth_landmarks(poses, times)
+    assert abs(smoothed[-1, 0, 0] - poses[-1, 0, 0]) < 0.02
+
+
+def test_short_gap_is_filled_then_dropped():
+    pose_filter = PoseFilter(max_gap_ms=100.0)
+    for i in range(5):
+        pose_filter.filter(still_pose(), i * FRAME_MS)
+    filled = pose_filter.filter(MISSING_POSE, 5 * FRAME_MS)
+    assert not is_missing(filled)
+    np.testing.assert_allclose(filled[:, :3], 0.5, atol=1e-6)
+    np.testing.assert_array_equal(filled[:, 3], 0.0)  # Tahmin edilen landmark güvenilir sayılmaz
+
+    for i in range(6, 10):
+        result = pose_filter.filter(MISSING_POSE, i * FRAME_MS)
+    assert is_missing(result)
+
+
+def test_outlier_is_rejected_for_one_frame():
+    pose_filter = PoseFilter()
+    for i in range(5):
+        pose_filter.filter(still_pose(), i * FRAME_MS)
+    jumped = still_pose()
+    jumped[15, :2] = 0.95  # Bilek bir anlığına başka yere sıçradı
+    result = pose_filter.filter(jumped, 5 * FRAME_MS)
+    np.testing.assert_allclose(result[15, :2], 0.5, atol=1e-6)
+    assert result[15, 3] == 0.0
+
+
+def test_low_visibility_stays_near_prediction():
+    pose_filter = PoseFilter()
+    pose_filter.filter(still_pose(0.5), 0.0)
+    visible = PoseFilter()
+    visible.filter(still_pose(0.5), 0.0)
+    hidden_result = pose_filter.filter(still_pose(0.6, visibility=0.1), FRAME_MS)
+    visible_result = visible.filter(still_pose(0.6, visibility=1.0), FRAME_MS)
+    assert abs(hidden_result[0, 0] - 0.5) < abs(visible_result[0, 0] - 0.5)
+
+
+def test_reset_clears_state():
+    pose_filter = PoseFilter()
+    pose_filter.filter(still_pose(0.5), 0.0)
+    pose_filter.reset()
+    assert is_missing(pose_filter.filter(MISSING_POSE, FRAME_MS))
+    np.testing.assert_allclose(pose_filter.filter(still_pose(0.9), 2 * FRAME_MS)[:, :3], 0.9, rtol=1e-6)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from pose_angles import NUM_LANDMARKS
+from pose_index import FEATURE_SIZE, PoseIndex, pose_features
+from pose_track import PoseTrack
+from reference_store import DanceReference
+
+
+def random_dance(dance_id, frame_count, seed):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, size=(frame_count, NUM_LANDMARKS, 4)).astype(np.float32)
+    track = PoseTrack(landmarks, np.zeros((frame_count, 0), dtype=np.float32), (),
+                      np.arange(1, frame_count + 1, dtype=np.int32), np.arange(frame_count) * (1000.0 / 30.0))
+    return DanceReference(dance_id, track)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PoseIndex.from_references([random_dance(f"dance{i}", count, i)
+                                      for i, count in enumerate((150, 7, 400))], leaf_size=8)
+
+
+def brute_force(index, query, k):
+    present = ~np.isnan(query)
+    distances = ((index.features[:, present] - query[present]) ** 2).mean(axis=1)
+    order = np.argsort(distances, kind='stable')[:k]
+    return distances[order]
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_nearest_matches_brute_force(index, k):
+    rng = np.random.default_rng(k)
+    for _ in range(20):
+        query = pose_features(rng.uniform(0, 1, size=(NUM_LANDMARKS, 4)))[0]
+        query[rng.random(FEATURE_SIZE) < 0.1] = np.nan
+        result = index.nearest(query, k)
+        assert len(result) == k
+        np.testing.assert_allclose([distance for _, distance in result], brute_force(index, query, k))
+        for global_index, distance in result:
+            present = ~np.isnan(query)
+            expected = ((index.features[global_index, present] - query[present]) ** 2).mean()
+            assert distance == pytest.approx(expected)
+
+
+def test_exact_frame_is_found(index):
+    dance, frame_index = index.locate(index.frame_offsets[2] + 123)
+    assert (dance.dance_id, frame_index) == ("dance2", 123)
+    match = index.query(dance.landmarks(frame_index), k=1)[0]
+    assert (match["dance_id"], match["frame_number"]) == ("dance2", 124)
+    assert match["distance"] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_window_query_prefers_whole_sequence(index):
+    dance = index._dances[0]
+    window = dance.ordered_landmarks()[60:70]
+    best = index.query_window(window, k=3)[0]
+    assert (best["dance_id"], best["frame_number"]) == ("dance0", 70)
+
+
+def test_empty_index_and_missing_query():
+    assert PoseIndex.from_references([]).nearest(np.zeros(FEATURE_SIZE)) == []
+    index = PoseIndex.from_references([random_dance("dance", 10, 0)])
+    assert index.nearest(np.full(FEATURE_SIZE, np.nan)) == []
+    assert index.query_window(np.empty((0, NUM_LANDMARKS, 4))) == []
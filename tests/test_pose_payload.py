@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from pose_angles import NUM_LANDMARKS
+from pose_payload import FLAT_POSE_SIZE, PosePayloadError, encode_pose, parse_pose, parse_poses
+
+
+@pytest.fixture
+def pose():
+    return np.random.default_rng(0).uniform(0, 1, size=(NUM_LANDMARKS, 4)).astype(np.float32)
+
+
+def as_dicts(pose):
+    return [{"x": float(x), "y": float(y), "z": float(z), "visibility": float(v)} for x, y, z, v in pose]
+
+
+@pytest.mark.parametrize("encoding", ["dicts", "flat", "nested", "base64"])
+def test_accepted_encodings(pose, encoding):
+    payload = {
+        "dicts": lambda: as_dicts(pose),
+        "flat": lambda: pose.ravel().tolist(),
+        "nested": lambda: pose.tolist(),
+        "base64": lambda: encode_pose(pose),
+    }[encoding]()
+    result = parse_pose(payload)
+    assert result.dtype == np.float32 and result.shape == (NUM_LANDMARKS, 4)
+    np.testing.assert_array_equal(result, pose)
+
+
+def test_integers_and_missing_values(pose):
+    flat = pose.ravel().tolist()
+    flat[0], flat[5] = 1, None
+    result = parse_pose(flat)
+    assert result[0, 0] == 1.0 and np.isnan(result[1, 1])
+
+    dicts = as_dicts(pose)
+    del dicts[2]["x"]
+    dicts[3] = None  # Sözlük olmayan landmark
+    dicts.append({"x": 0.0, "y": 0.0})  # 33'ten fazlası yok sayılır
+    result = parse_pose(dicts)
+    assert np.isnan(result[2, 0]) and np.isnan(result[3]).all()
+    np.testing.assert_array_equal(result[4:], pose[4:])
+
+
+def test_dict_defaults(pose):
+    dicts = [{"x": float(x), "y": float(y)} for x, y, _, _ in pose]
+    result = parse_pose(dicts)
+    np.testing.assert_array_equal(result[:, 2], 0.0)
+    np.testing.assert_array_equal(result[:, 3], 1.0)
+
+
+@pytest.mark.parametrize("make_payload", [
+    lambda pose: ["0.5"] * FLAT_POSE_SIZE,  # sayısal metinler
+    lambda pose: [str(v) for v in pose.ravel().tolist()],
+    lambda pose: [[str(v) for v in row] for row in pose.tolist()],
+    lambda pose: [True] + pose.ravel().tolist()[1:],
+    lambda pose: [dict(lm, x="0.5") for lm in as_dicts(pose)],
+    lambda pose: [dict(lm, visibility=False) for lm in as_dicts(pose)],
+    lambda pose: [[0.0, 1.0]] * NUM_LANDMARKS,  # yanlış iç boyut
+    lambda pose: pose.tolist()[:-1],
+    lambda pose: pose.tolist()[:1] + pose.ravel().tolist()[4:],  # karışık iç içe/düz
+    lambda pose: pose.ravel().tolist()[:-1],
+    lambda pose: [float("inf")] + pose.ravel().tolist()[1:],
+    lambda pose: [10 ** 400] + pose.ravel().tolist()[1:],
+    lambda pose: as_dicts(pose)[:-1],
+    lambda pose: "bm90IGEgcG9zZQ==",  # geçerli base64, yanlış uzunluk
+    lambda pose: "not base64!",
+    lambda pose: {"x": 0.5},
+    lambda pose: 42,
+    lambda pose: [],
+    lambda pose: None,
+])
+def test_rejected_payloads(pose, make_payload):
+    with pytest.raises(PosePayloadError):
+        parse_pose(make_payload(pose))
+
+
+def test_parse_poses_missing_frames(pose):
+    result = parse_poses([encode_pose(pose), None, [], as_dicts(pose)])
+    assert result.shape == (4, NUM_LANDMARKS, 4)
+    np.testing.assert_array_equal(result[0], pose)
+    assert np.isnan(result[1]).all() and np.isnan(result[2]).all()
+    np.testing.assert_array_equal(result[3], pose)
+    assert parse_poses([]).shape == (0, NUM_LANDMARKS, 4)
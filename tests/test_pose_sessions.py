@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+
+import pose_sessions
+from pose_angles import NUM_LANDMARKS
+from pose_track import PoseTrack
+from reference_store import DanceReference
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pose_sessions.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def dance():
+    rng = np.random.default_rng(0)
+    count = 90
+    landmarks = rng.uniform(0, 1, size=(count, NUM_LANDMARKS, 4)).astype(np.float32)
+    landmarks[..., 3] = 1.0
+    track = PoseTrack(landmarks, np.zeros((count, 0), dtype=np.float32), (),
+                      np.arange(1, count + 1, dtype=np.int32), np.arange(count) * (1000.0 / 30.0))
+    return DanceReference("dance", track)
+
+
+def pose_frame(dance, index):
+    landmarks = dance.ordered_landmarks()[index]
+    return {"timestamp_ms": float(dance.times_ms[index]),
+            "user_pose": [{"x": float(x), "y": float(y), "z": float(z), "visibility": float(v)}
+                          for x, y, z, v in landmarks]}
+
+
+def test_frames_publish_score_events(dance, clock):
+    manager = pose_sessions.SessionManager()
+    session = manager.create(dance)
+    assert manager.get(session.session_id) is session
+
+    assert session.add_frames([pose_frame(dance, i) for i in range(0, 30, 3)]) >= 1
+    assert session.frames == 10
+    events = session.event_stream()
+    assert next(events).startswith("retry:")
+    payload = json.loads(next(events).split("data: ", 1)[1])
+    assert payload["score"] == 100 and payload["frame"] == 1
+
+    assert manager.close(session.session_id)
+    assert manager.get(session.session_id) is None
+
+
+def test_non_finite_timestamp_is_rejected(dance, clock):
+    session = pose_sessions.SessionManager().create(dance)
+    frame = pose_frame(dance, 0)
+    for value in ("nan", "inf", float("-inf")):
+        with pytest.raises(ValueError):
+            session.add_frames([dict(frame, timestamp_ms=value)])
+    assert session.frames == 0
+
+
+def test_idle_sessions_expire_without_new_sessions(dance, clock):
+    manager = pose_sessions.SessionManager(idle_seconds=60, sweep_seconds=10)
+    idle = manager.create(dance)
+    active = manager.create(dance)
+
+    clock.now += 50
+    active.add_frames([pose_frame(dance, 0)])
+    clock.now += 15
+    # Sadece get() çağrılıyor: tarama boşta kalan oturumu da kapatır
+    assert manager.get(active.session_id) is active
+    assert len(manager) == 1 and idle.closed
+    assert manager.get(idle.session_id) is None
+
+
+def test_get_expires_session_between_sweeps(dance, clock):
+    manager = pose_sessions.SessionManager(idle_seconds=60, sweep_seconds=1000)
+    session = manager.create(dance)
+    clock.now += 61
+    assert manager.get(session.session_id) is None
+    assert session.closed and len(manager) == 0
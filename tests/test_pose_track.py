@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from pose_angles import NUM_LANDMARKS, REFERENCE_ANGLES
+from pose_track import TRACK_EXTENSION, PoseTrack, load_track, save_track, track_from_frames
+
+JSON_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "json_datas")
+
+
+def random_track(frame_count, seed, with_landmarks=True):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, size=(frame_count, NUM_LANDMARKS, 4)).astype(np.float32) if with_landmarks else None
+    angles = rng.uniform(0, 180, size=(frame_count, len(REFERENCE_ANGLES))).astype(np.float32)
+    angles[rng.random(angles.shape) < 0.1] = np.nan
+    frame_numbers = np.arange(1, frame_count + 1, dtype=np.int32)
+    timestamps_ms = frame_numbers * (1000.0 / 30.0)
+    return PoseTrack(landmarks, angles, REFERENCE_ANGLES.names, frame_numbers, timestamps_ms)
+
+
+def assert_same_track(result, expected):
+    assert result.angle_names == expected.angle_names
+    np.testing.assert_array_equal(result.angles, expected.angles)
+    np.testing.assert_array_equal(result.frame_numbers, expected.frame_numbers)
+    np.testing.assert_array_equal(result.timestamps_ms, expected.timestamps_ms)
+    if expected.landmarks is None:
+        assert result.landmarks is None
+    else:
+        np.testing.assert_array_equal(result.landmarks, expected.landmarks)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("with_landmarks", [True, False])
+def test_binary_round_trip(tmp_path, mmap, with_landmarks):
+    track = random_track(50, 0, with_landmarks)
+    path = str(tmp_path / ("track" + TRACK_EXTENSION))
+    save_track(path, track)
+    assert_same_track(load_track(path, mmap=mmap), track)
+
+
+def test_empty_track_round_trip(tmp_path):
+    track = random_track(0, 1)
+    path = str(tmp_path / ("empty" + TRACK_EXTENSION))
+    save_track(path, track)
+    assert len(load_track(path)) == 0
+
+
+def test_json_round_trip_keeps_values(tmp_path):
+    track = random_track(20, 2)
+    track.angles[np.isnan(track.angles)] = 45.0  # JSON'da eksik açılar 0.0 olarak yazılır
+    path = str(tmp_path / "track.json")
+    with open(path, 'w') as f:
+        json.dump(track.to_frames(), f)
+    assert_same_track(load_track(path), track)
+
+
+def test_slice_matches_frames():
+    track = random_track(30, 3)
+    part = track.slice(10, 20)
+    assert len(part) == 10
+    assert part.to_frames() == track.to_frames()[10:20]
+
+
+def test_angle_only_frames():
+    frames = [{"a": 10.0, "b": None}, {"a": 20.0, "b": 30.0}]
+    track = track_from_frames(frames)
+    assert track.landmarks is None
+    assert track.angle_names == ("a", "b")
+    np.testing.assert_array_equal(track.frame_numbers, [1, 2])
+    assert np.isnan(track.angles[0, 1])
+    np.testing.assert_array_equal(track.angle_column("a"), [10.0, 20.0])
+
+
+def test_not_a_track_file(tmp_path):
+    path = str(tmp_path / ("bad" + TRACK_EXTENSION))
+    with open(path, 'wb') as f:
+        f.write(b"\0" * 64)
+    with pytest.raises(ValueError):
+        load_track(path)
+
+
+@pytest.mark.skipif(not os.path.isdir(JSON_DATA_DIR), reason="json_datas yok")
+def test_reference_files_convert_losslessly(tmp_path):
+    for name in sorted(os.listdir(JSON_DATA_DIR)):
+        if not name.endswith(".json"):
+            continue
+        track = load_track(os.path.join(JSON_DATA_DIR, name))
+        path = str(tmp_path / (name + TRACK_EXTENSION))
+        save_track(path, track)
+        assert_same_track(load_track(path), track)
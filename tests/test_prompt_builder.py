@@ -0,0 +1,99 @@
+import math
+
+import pytest
+
+from pose_angles import FEEDBACK_ANGLES
+from prompt_builder import (CHARS_PER_TOKEN, FEEDBACK_INSTRUCTIONS, MAX_PROMPT_JOINTS, PROMPT_JOINT_NAMES,
+                            estimate_tokens, pose_prompt, sequence_prompt, with_instructions)
+
+REFERENCE = [90.0, 90.0, 45.0, 45.0, 170.0, 170.0, 160.0, 160.0]
+
+
+def with_changes(row, **changes):
+    row = list(row)
+    for name, value in changes.items():
+        row[FEEDBACK_ANGLES.index(name)] = value
+    return row
+
+
+def test_joint_names_cover_feedback_angles():
+    assert list(PROMPT_JOINT_NAMES) == list(FEEDBACK_ANGLES.names)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", 0),
+    ("a", 1),
+    ("abcd", 1),
+    ("abcde", 2),
+    ("x" * 100, math.ceil(100 / CHARS_PER_TOKEN)),
+])
+def test_estimate_tokens(text, expected):
+    assert estimate_tokens(text) == expected
+
+
+def test_pose_prompt_ranks_by_absolute_difference():
+    user = with_changes(REFERENCE, left_knee=145.0, right_elbow=105.2, left_hip=150.0)
+    assert pose_prompt(user, REFERENCE).splitlines() == [
+        "Sol Diz: 145/170 (-25)",
+        "Sağ Dirsek: 105/90 (+15)",
+        "Sol Kalça: 150/160 (-10)",
+    ]
+
+
+def test_pose_prompt_limits_joints_and_drops_small_differences():
+    user = with_changes(REFERENCE, left_knee=145.0, right_elbow=105.0, left_hip=150.0, right_hip=163.0,
+                        left_shoulder=52.0)
+    lines = pose_prompt(user, REFERENCE).splitlines()
+    assert len(lines) == MAX_PROMPT_JOINTS
+    assert lines[0].startswith("Sol Diz:")
+
+    assert pose_prompt(user, REFERENCE, max_joints=1) == "Sol Diz: 145/170 (-25)"
+    assert [line.split(":")[0] for line in pose_prompt(user, REFERENCE, max_joints=8, min_diff=5).splitlines()] == \
+        ["Sol Diz", "Sağ Dirsek", "Sol Kalça", "Sol Omuz"]  # 3 derecelik Sağ Kalça farkı yazılmaz
+
+
+def test_pose_prompt_close_pose():
+    assert pose_prompt(with_changes(REFERENCE, left_knee=172.0), REFERENCE) == \
+        "Tüm açılar referansa 5 dereceden yakın."
+    assert pose_prompt(REFERENCE, REFERENCE, min_diff=10) == "Tüm açılar referansa 10 dereceden yakın."
+
+
+def test_pose_prompt_lists_missing_joints():
+    user = with_changes(REFERENCE, left_knee=145.0, right_hip=float("nan"))
+    reference = with_changes(REFERENCE, right_elbow=float("nan"))
+    assert pose_prompt(user, reference).splitlines() == [
+        "Sol Diz: 145/170 (-25)",
+        "Görünmüyor: Sağ Dirsek, Sağ Kalça",
+    ]
+    assert pose_prompt(with_changes(REFERENCE, right_hip=float("nan")), REFERENCE).splitlines() == [
+        "Tüm açılar referansa 5 dereceden yakın.",
+        "Görünmüyor: Sağ Kalça",
+    ]
+
+
+def test_pose_prompt_nothing_visible():
+    missing = [float("nan")] * len(FEEDBACK_ANGLES.names)
+    assert pose_prompt(missing, REFERENCE) == "Görünmüyor: " + ", ".join(PROMPT_JOINT_NAMES.values())
+
+
+def test_sequence_prompt():
+    mean_errors = [20.4, 3.0, float("nan"), 12.0, 8.0, 0.0, 30.0, 1.0]
+    assert sequence_prompt(120, 74, mean_errors).splitlines() == [
+        "120 kare, ortalama doğruluk %74",
+        "Sağ Kalça: ortalama 30 derece fark",
+        "Sağ Dirsek: ortalama 20 derece fark",
+        "Sol Omuz: ortalama 12 derece fark",
+    ]
+    assert sequence_prompt(10, 95, [1.0] * 8).splitlines() == [
+        "10 kare, ortalama doğruluk %95",
+        "Tüm eklemler referansa ortalama 5 dereceden yakın.",
+    ]
+
+
+def test_with_instructions_keeps_fixed_prefix():
+    first = with_instructions(FEEDBACK_INSTRUCTIONS, "Sol Diz: 145/170 (-25)\n")
+    second = with_instructions(FEEDBACK_INSTRUCTIONS, "Sağ Dirsek: 105/90 (+15)")
+    prefix = FEEDBACK_INSTRUCTIONS.strip() + "\n\n"
+    assert first == prefix + "Sol Diz: 145/170 (-25)"
+    assert second.startswith(prefix)
+    assert estimate_tokens(first) > estimate_tokens(FEEDBACK_INSTRUCTIONS)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from pose_angles import NUM_LANDMARKS
+from pose_track import PoseTrack
+from reference_store import DEFAULT_FPS, DanceReference, ReferenceStore
+
+
+def make_reference(timestamps_ms, dance_id="dance"):
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+    count = len(timestamps_ms)
+    rng = np.random.default_rng(count)
+    landmarks = rng.uniform(0, 1, size=(count, NUM_LANDMARKS, 4)).astype(np.float32)
+    track = PoseTrack(landmarks, np.zeros((count, 0), dtype=np.float32), (),
+                      np.arange(1, count + 1, dtype=np.int32), timestamps_ms)
+    return DanceReference(dance_id, track)
+
+
+def test_frame_index_nearest_and_clamped():
+    dance = make_reference([1000.0, 1100.0, 1200.0, 1300.0])
+    assert dance.times_ms.tolist() == [0.0, 100.0, 200.0, 300.0]
+    assert [dance.frame_index(t) for t in (-50.0, 0.0, 49.0, 51.0, 149.9, 250.0, 299.0, 10000.0)] == \
+        [0, 0, 0, 1, 1, 2, 3, 3]
+
+
+def test_unsorted_timestamps():
+    dance = make_reference([300.0, 0.0, 200.0, 100.0])
+    assert dance.times_ms.tolist() == [0.0, 100.0, 200.0, 300.0]
+    assert dance.duration_ms == 300.0
+    # İndeksler sıralı zamana göredir; kare numarası dosyadaki asıl kareyi verir
+    assert [dance.frame_number(dance.frame_index(t)) for t in (0.0, 100.0, 200.0, 300.0)] == [2, 4, 3, 1]
+    np.testing.assert_array_equal(dance.landmarks(0), dance.track.landmarks[1])
+    np.testing.assert_array_equal(dance.ordered_landmarks()[3], dance.track.landmarks[0])
+
+
+@pytest.mark.parametrize("timestamps_ms", [[5.0], [500.0]])
+def test_single_frame(timestamps_ms):
+    dance = make_reference(timestamps_ms)
+    assert len(dance) == 1 and dance.duration_ms == 0.0
+    assert dance.frame_index(-10.0) == dance.frame_index(1e6) == 0
+    np.testing.assert_array_equal(dance.frame_indices([-10.0, 0.0, 1e6]), [0, 0, 0])
+    assert dance.frame_indices(np.empty(0)).shape == (0,)
+
+
+def test_missing_timestamps_use_default_fps():
+    dance = make_reference([np.nan, np.nan, np.nan])
+    np.testing.assert_allclose(dance.times_ms, np.arange(3) * 1000.0 / DEFAULT_FPS)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frame_indices_match_frame_index(seed):
+    rng = np.random.default_rng(seed)
+    timestamps = rng.permutation(np.cumsum(rng.uniform(1, 50, size=40)))
+    dance = make_reference(timestamps)
+    queries = np.concatenate([rng.uniform(-100, dance.duration_ms + 100, size=200),
+                              dance.times_ms,  # tam kare zamanları
+                              (dance.times_ms[1:] + dance.times_ms[:-1]) / 2])  # iki karenin tam ortası
+    expected = [dance.frame_index(t) for t in queries]
+    np.testing.assert_array_equal(dance.frame_indices(queries), expected)
+
+
+def test_store_get_rejects_non_string_ids():
+    store = ReferenceStore()
+    store.dances["dance1"] = make_reference([0.0, 33.0])
+    assert store.get("dance1") is store.dances["dance1"]
+    assert store.get("missing") is None
+    assert store.get(["dance1"]) is None
+    assert store.get(None) is None
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from segment_search import RunningSegmentSearch, best_windows, frame_quality_scores
+
+PENALTY_FACTOR = 50.0
+WINDOW_SIZES = [100, 300]
+
+
+def random_track(frame_count, seed):
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(0, 180, size=(frame_count, 8))
+    angles[rng.random(angles.shape) < 0.05] = np.nan
+    visibility = rng.uniform(0, 1, size=(frame_count, 6))
+    return angles, visibility
+
+
+@pytest.mark.parametrize("chunk_size", [64, 256, 300, 1000])
+@pytest.mark.parametrize("frame_count,seed", [(299, 0), (300, 1), (655, 2), (1200, 3)])
+def test_running_search_matches_batch_search(chunk_size, frame_count, seed):
+    """Parça boyutu pencereden küçük, eşit veya büyük olsa da sonuç toplu arama ile aynı olmalı."""
+    angles, visibility = random_track(frame_count, seed)
+    expected = best_windows(frame_quality_scores(angles, visibility, PENALTY_FACTOR), WINDOW_SIZES)
+
+    search = RunningSegmentSearch(WINDOW_SIZES, PENALTY_FACTOR)
+    for start in range(0, frame_count, chunk_size):
+        stop = start + chunk_size
+        search.update(angles[start:stop], visibility[start:stop], range(start, min(stop, frame_count)))
+    result = search.result()
+
+    for window in WINDOW_SIZES:
+        if not expected[window]:
+            assert result[window] == []
+            assert search.segment(window) is None
+            continue
+        (expected_start, expected_sum), = expected[window]
+        (start, window_sum), = result[window]
+        assert start == expected_start
+        assert window_sum == pytest.approx(expected_sum)
+        assert search.segment(window) == list(range(start, start + window))
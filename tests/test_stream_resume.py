@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+import general_jsonmaker_withangle as extractor  # noqa: E402
+from frame_stream import read_stream  # noqa: E402
+from pose_angles import NUM_LANDMARKS  # noqa: E402
+
+HEADER = {"video": "dance.mp4", "settings": {"target_fps": 10}}
+SAMPLING = {"target_fps": 10, "max_inference_size": None, "smooth": False, "interpolate": True}
+STEP = 3  # Her 3 karede bir kare işlenir, aradakiler doldurulur
+FRAME_COUNT = 60
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeCapture:
+    def release(self):
+        pass
+
+
+def detections():
+    rng = np.random.default_rng(0)
+    records = []
+    for frame_number in range(1, FRAME_COUNT + 1, STEP):
+        landmarks = None if frame_number in (31, 43) else rng.uniform(0, 1, size=(NUM_LANDMARKS, 4))
+        records.append((frame_number, frame_number * 1000.0 / 30.0, landmarks))
+    return records
+
+
+@pytest.fixture
+def fake_video(monkeypatch):
+    """Video okuma ve poz çıkarımı yerine sabit kayıtlar; stop_after verilirse o kadar kayıttan sonra kesilir."""
+    state = {"stop_after": None}
+
+    def iter_video_poses(cap, pose, start_frame, *args):
+        for i, record in enumerate(record for record in detections() if record[0] > start_frame):
+            if state["stop_after"] is not None and i >= state["stop_after"]:
+                raise Interrupted()
+            yield record
+
+    monkeypatch.setattr(extractor, "open_video", lambda path, pose: FakeCapture())
+    monkeypatch.setattr(extractor, "interpolation_gap", lambda cap, sampling: STEP)
+    monkeypatch.setattr(extractor, "iter_video_poses", iter_video_poses)
+    monkeypatch.setattr(extractor, "STREAM_CHUNK_SIZE", 4)
+    return state
+
+
+def stream(path):
+    return extractor.stream_video("dance.mp4", str(path), None, HEADER, SAMPLING, pipeline=False)
+
+
+@pytest.mark.parametrize("stop_after", [5, 8, 13])
+def test_resumed_stream_matches_uninterrupted(tmp_path, fake_video, stop_after):
+    stream(tmp_path / "full.ndjson")
+    expected = read_stream(str(tmp_path / "full.ndjson"))
+    # Poz bulunamayan 31. ve 43. karelerin çevresindeki uzun boşluklar doldurulmaz
+    assert [frame["frame_number"] for frame in expected] == \
+        list(range(1, 29)) + list(range(34, 41)) + list(range(46, 59))
+
+    fake_video["stop_after"] = stop_after
+    with pytest.raises(Interrupted):
+        stream(tmp_path / "resumed.ndjson")
+    fake_video["stop_after"] = None
+    total_frames, _ = stream(tmp_path / "resumed.ndjson")
+
+    assert total_frames == len(expected)
+    assert read_stream(str(tmp_path / "resumed.ndjson")) == expected